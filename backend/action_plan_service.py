@@ -2,6 +2,7 @@
 
 from crewai import Task, Crew, Process
 from agents import strategist, analyst, psychologist
+from deliberation import DeliberationRecorder
 from typing import Dict, List
 import json
 from datetime import datetime, timedelta
@@ -135,16 +136,21 @@ class ActionPlanService:
             context=[analysis_task, plan_task]
         )
         
+        recorder = DeliberationRecorder()
         crew = Crew(
             agents=[self.analyst, self.strategist, self.psychologist],
             tasks=[analysis_task, plan_task, motivation_task],
             process=Process.sequential,
-            verbose=True
+            verbose=True,
+            task_callback=recorder.record
         )
         
-        result = crew.kickoff()
+        result = recorder.kickoff(crew)
         
-        return self._parse_plan_result(str(result), focus_area, hours_per_day)
+        plan = self._parse_plan_result(str(result), focus_area, hours_per_day)
+        plan['deliberation'] = recorder.entries
+        plan['usage'] = recorder.summary()
+        return plan
     
     def _parse_plan_result(self, result: str, focus_area: str, hours_per_day: float) -> Dict:
         """Parse AI result into structured format"""
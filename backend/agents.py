@@ -2,6 +2,8 @@ from crewai import Agent, LLM
 import os
 from dotenv import load_dotenv
 
+from llm_cache import llm_cache
+
 load_dotenv()
 
 # CRITICAL: Remove any OpenAI references from environment
@@ -24,9 +26,41 @@ print(f"✓ Using Groq model: {GROQ_MODEL}")
 # Set Groq API key for LiteLLM
 os.environ["GROQ_API_KEY"] = GROQ_API_KEY
 
-# Use CrewAI's LLM class with Groq provider via LiteLLM
+
+class CachedLLM(LLM):
+    """LLM that answers repeated plain-text prompts from ``llm_cache``.
+
+    Calls that pass tools, functions or a response model go straight to the
+    provider, since their results depend on more than the prompt.
+    """
+
+    def call(self, messages, tools=None, callbacks=None, available_functions=None,
+             from_task=None, from_agent=None, response_model=None):
+        if tools or available_functions or response_model:
+            return super().call(
+                messages, tools=tools, callbacks=callbacks, available_functions=available_functions,
+                from_task=from_task, from_agent=from_agent, response_model=response_model
+            )
+
+        role = getattr(from_agent, "role", None) or "unknown"
+        key = llm_cache.make_key(role, self.model, self.temperature, messages)
+
+        cached_response = llm_cache.get(key)
+        if cached_response is not None:
+            return cached_response
+
+        response = super().call(
+            messages, tools=tools, callbacks=callbacks, available_functions=available_functions,
+            from_task=from_task, from_agent=from_agent, response_model=response_model
+        )
+        if isinstance(response, str) and response.strip():
+            llm_cache.set(key, role, response)
+        return response
+
+
+# Use CrewAI's LLM class with Groq provider via LiteLLM, behind the response cache
 # LiteLLM format for Groq: groq/model-name
-groq_llm = LLM(
+groq_llm = CachedLLM(
     model=f"groq/{GROQ_MODEL}",
     temperature=0.7
 )
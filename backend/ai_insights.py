@@ -1,33 +1,31 @@
 from datetime import datetime, timedelta
-from typing import List, Dict
+from typing import List, Dict, Optional
+import numpy as np
 from sqlalchemy.orm import Session
-import models
+import analytics
 from crew import SageMentorCrew
 
 class ProactiveInsightsEngine:
     """Generate proactive insights based on user behavior"""
     
-    def __init__(self):
-        self.crew = SageMentorCrew()
+    def __init__(self, crew: Optional[SageMentorCrew] = None):
+        self.crew = crew or SageMentorCrew()
     
     def analyze_weekly_patterns(self, user_id: int, db: Session) -> Dict:
         """Analyze weekly patterns and generate insights"""
         
         week_ago = datetime.utcnow() - timedelta(days=7)
         
-        # Get week's data
-        checkins = db.query(models.CheckIn).filter(
-            models.CheckIn.user_id == user_id,
-            models.CheckIn.timestamp >= week_ago
-        ).all()
+        # Get week's data as column arrays, oldest first
+        checkins = analytics.checkin_history(db, user_id, since=week_ago)
         
-        if len(checkins) < 3:
+        if checkins["timestamp"].size < 3:
             return {"insufficient_data": True}
         
         # Calculate metrics
         insights = {
-            "check_in_frequency": len(checkins),
-            "avg_energy": sum(c.energy_level for c in checkins) / len(checkins),
+            "check_in_frequency": int(checkins["timestamp"].size),
+            "avg_energy": analytics.nanmean(checkins["energy"]),
             "success_rate": self._calculate_success_rate(checkins),
             "consistency_score": self._calculate_consistency(checkins),
             "detected_patterns": self._detect_behavioral_patterns(checkins),
@@ -39,45 +37,35 @@ class ProactiveInsightsEngine:
         
         return insights
     
-    def _calculate_success_rate(self, checkins: List[models.CheckIn]) -> float:
+    def _calculate_success_rate(self, checkins: Dict[str, np.ndarray]) -> float:
         """Calculate success rate"""
-        reviewed = [c for c in checkins if c.shipped is not None]
-        if not reviewed:
-            return 0.0
-        return (sum(1 for c in reviewed if c.shipped) / len(reviewed)) * 100
+        return analytics.success_rate(checkins["shipped"])
     
-    def _calculate_consistency(self, checkins: List[models.CheckIn]) -> float:
+    def _calculate_consistency(self, checkins: Dict[str, np.ndarray]) -> float:
         """Calculate consistency score based on check-in frequency"""
-        if len(checkins) < 2:
+        actual = checkins["timestamp"].size
+        if actual < 2:
             return 0.0
         
         # Expected: daily check-ins (7 in a week)
         expected = 7
-        actual = len(checkins)
-        
-        # Check time gaps
-        sorted_checkins = sorted(checkins, key=lambda x: x.timestamp)
-        gaps = []
-        for i in range(1, len(sorted_checkins)):
-            gap = (sorted_checkins[i].timestamp - sorted_checkins[i-1].timestamp).days
-            gaps.append(gap)
         
         # Penalty for large gaps
-        avg_gap = sum(gaps) / len(gaps) if gaps else 1
+        avg_gap = float(analytics.gap_days(checkins["timestamp"]).mean())
         consistency = min(100, (actual / expected) * 100 * (1 / max(1, avg_gap)))
         
         return round(consistency, 1)
     
-    def _detect_behavioral_patterns(self, checkins: List[models.CheckIn]) -> List[Dict]:
+    def _detect_behavioral_patterns(self, checkins: Dict[str, np.ndarray]) -> List[Dict]:
         """Detect behavioral patterns"""
         patterns = []
+        energy = checkins["energy"]
         
-        # Pattern 1: Declining energy
-        if len(checkins) >= 5:
-            recent_energy = [c.energy_level for c in checkins[-3:]]
-            older_energy = [c.energy_level for c in checkins[:3]]
+        # Pattern 1: Declining energy (first vs last 3-check-in average)
+        if energy.size >= 5:
+            energy_trend = analytics.rolling_mean(energy, 3)
             
-            if sum(recent_energy) / 3 < sum(older_energy) / 3 - 2:
+            if energy_trend[-1] < energy_trend[0] - 2:
                 patterns.append({
                     "type": "declining_energy",
                     "severity": "warning",
@@ -85,7 +73,7 @@ class ProactiveInsightsEngine:
                 })
         
         # Pattern 2: Consistent failures
-        recent_fails = sum(1 for c in checkins[-5:] if c.shipped is False)
+        recent_fails = int(np.count_nonzero(checkins["shipped"][-5:] == 0))
         if recent_fails >= 3:
             patterns.append({
                 "type": "commitment_failure",
@@ -96,8 +84,8 @@ class ProactiveInsightsEngine:
         # Pattern 3: Vague commitments
         vague_keywords = ['work on', 'try to', 'maybe', 'think about', 'look into']
         vague_count = sum(
-            1 for c in checkins[-5:]
-            if any(keyword in c.commitment.lower() for keyword in vague_keywords)
+            1 for commitment in checkins["commitment"][-5:]
+            if any(keyword in (commitment or "").lower() for keyword in vague_keywords)
         )
         if vague_count >= 2:
             patterns.append({
@@ -107,10 +95,11 @@ class ProactiveInsightsEngine:
             })
         
         # Pattern 4: Weekend warrior
-        weekend_checkins = [c for c in checkins if c.timestamp.weekday() in [5, 6]]
-        weekday_checkins = [c for c in checkins if c.timestamp.weekday() not in [5, 6]]
+        by_weekday = analytics.weekday_histogram(checkins["timestamp"])
+        weekend_checkins = by_weekday[5:].sum()
+        weekday_checkins = by_weekday[:5].sum()
         
-        if len(weekend_checkins) > len(weekday_checkins) * 1.5:
+        if weekend_checkins > weekday_checkins * 1.5:
             patterns.append({
                 "type": "weekend_warrior",
                 "severity": "info",
@@ -154,9 +143,10 @@ class ProactiveInsightsEngine:
         
         return recommendations
     
-    def generate_weekly_report(self, user_id: int, db: Session) -> str:
+    def generate_weekly_report(self, user_id: int, db: Session, insights: Optional[Dict] = None) -> str:
         """Generate weekly summary report"""
-        insights = self.analyze_weekly_patterns(user_id, db)
+        if insights is None:
+            insights = self.analyze_weekly_patterns(user_id, db)
         
         if insights.get("insufficient_data"):
             return "Insufficient data for weekly report. Check in more regularly."
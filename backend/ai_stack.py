@@ -0,0 +1,106 @@
+# backend/ai_stack.py
+from typing import Callable, Dict, Optional
+import os
+import threading
+import time
+
+
+class LazyService:
+    """Builds a service on first use instead of at import.
+
+    Attribute access is forwarded to the built instance, so a module-level
+    ``LazyService`` can stand in for the object it wraps. Construction runs
+    once even when several threads hit it at the same time.
+    """
+
+    def __init__(self, name: str, factory: Callable[[], object]):
+        self.name = name
+        self._factory = factory
+        self._instance = None
+        self._lock = threading.Lock()
+        self.build_seconds: Optional[float] = None
+        self.error: Optional[str] = None
+
+    @property
+    def ready(self) -> bool:
+        return self._instance is not None
+
+    def get(self):
+        if self._instance is not None:
+            return self._instance
+        with self._lock:
+            if self._instance is None:
+                started = time.perf_counter()
+                try:
+                    self._instance = self._factory()
+                    self.error = None
+                except Exception as e:
+                    self.error = str(e)
+                    raise
+                self.build_seconds = round(time.perf_counter() - started, 3)
+                print(f"✓ {self.name} ready in {self.build_seconds}s")
+        return self._instance
+
+    def __getattr__(self, attr):
+        return getattr(self.get(), attr)
+
+
+# Imports stay inside the factories: crew/agents pull in CrewAI and LiteLLM,
+# which take seconds to load.
+def _build_github_analyzer():
+    from github_integration import GitHubAnalyzer
+    return GitHubAnalyzer()
+
+
+def _build_sage_crew():
+    from crew import SageMentorCrew
+    return SageMentorCrew()
+
+
+def _build_action_plan_service():
+    from action_plan_service import ActionPlanService
+    return ActionPlanService()
+
+
+def _build_insights_engine():
+    from ai_insights import ProactiveInsightsEngine
+    return ProactiveInsightsEngine(crew=sage_crew.get())
+
+
+github_analyzer = LazyService("GitHub analyzer", _build_github_analyzer)
+sage_crew = LazyService("Sage crew", _build_sage_crew)
+action_plan_service = LazyService("Action plan service", _build_action_plan_service)
+insights_engine = LazyService("Insights engine", _build_insights_engine)
+
+SERVICES = (sage_crew, action_plan_service, insights_engine, github_analyzer)
+
+_warm_up_thread: Optional[threading.Thread] = None
+
+
+def _warm_up():
+    for service in SERVICES:
+        try:
+            service.get()
+        except Exception as e:
+            print(f"⚠️ Warm-up of {service.name} failed: {str(e)}")
+
+
+def start_warm_up() -> bool:
+    """Build the AI stack on a background thread unless AI_WARMUP=false"""
+    global _warm_up_thread
+    if os.getenv("AI_WARMUP", "true").lower() != "true":
+        return False
+    if _warm_up_thread is None:
+        _warm_up_thread = threading.Thread(target=_warm_up, name="ai-warmup", daemon=True)
+        _warm_up_thread.start()
+    return True
+
+
+def stats() -> Dict:
+    return {
+        "warming_up": bool(_warm_up_thread and _warm_up_thread.is_alive()),
+        "services": {
+            service.name: {"ready": service.ready, "build_seconds": service.build_seconds, "error": service.error}
+            for service in SERVICES
+        }
+    }
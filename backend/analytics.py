@@ -0,0 +1,174 @@
+# backend/analytics.py
+from datetime import date, datetime
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+import models
+
+DAY = np.timedelta64(1, "D")
+
+
+def _columns(rows: Sequence, names: Sequence[str]) -> Dict[str, list]:
+    """Transpose result rows into one list per column"""
+    if not rows:
+        return {name: [] for name in names}
+    return dict(zip(names, (list(column) for column in zip(*rows))))
+
+
+def to_datetime64(values) -> np.ndarray:
+    return np.array(values, dtype="datetime64[us]")
+
+
+def to_float(values) -> np.ndarray:
+    """Numeric column as floats, with NULLs as NaN"""
+    return np.array(values, dtype=float)
+
+
+# ==================== LOADERS ====================
+
+def checkin_history(db: Session, user_id: int, since: Optional[datetime] = None) -> Dict[str, np.ndarray]:
+    """A user's check-ins, oldest first, as column arrays.
+
+    ``shipped`` is 1.0/0.0 for reviewed check-ins and NaN otherwise.
+    """
+    query = db.query(
+        models.CheckIn.timestamp,
+        models.CheckIn.energy_level,
+        models.CheckIn.shipped,
+        models.CheckIn.commitment
+    ).filter(models.CheckIn.user_id == user_id)
+    if since is not None:
+        query = query.filter(models.CheckIn.timestamp >= since)
+
+    columns = _columns(query.order_by(models.CheckIn.timestamp.asc()).all(),
+                       ("timestamp", "energy", "shipped", "commitment"))
+    return {
+        "timestamp": to_datetime64(columns["timestamp"]),
+        "energy": to_float(columns["energy"]),
+        "shipped": to_float(columns["shipped"]),
+        "commitment": np.array(columns["commitment"], dtype=object)
+    }
+
+
+def pomodoro_history(db: Session, user_id: int, since: Optional[datetime] = None) -> Dict[str, np.ndarray]:
+    """A user's Pomodoro sessions as column arrays"""
+    query = db.query(
+        models.PomodoroSession.started_at,
+        models.PomodoroSession.completed,
+        models.PomodoroSession.session_type,
+        models.PomodoroSession.duration_minutes,
+        models.PomodoroSession.focus_rating
+    ).filter(models.PomodoroSession.user_id == user_id)
+    if since is not None:
+        query = query.filter(models.PomodoroSession.started_at >= since)
+
+    columns = _columns(query.all(), ("started_at", "completed", "session_type", "duration", "focus_rating"))
+    return {
+        "started_at": to_datetime64(columns["started_at"]),
+        "completed": np.array([bool(c) for c in columns["completed"]], dtype=bool),
+        "work": np.array([t == "work" for t in columns["session_type"]], dtype=bool),
+        "duration": np.nan_to_num(to_float(columns["duration"])),
+        "focus_rating": to_float(columns["focus_rating"])
+    }
+
+
+def completed_pomodoro_days(db: Session, user_id: int) -> np.ndarray:
+    """Distinct days with at least one completed Pomodoro, ascending"""
+    starts = db.query(models.PomodoroSession.started_at).filter(
+        models.PomodoroSession.user_id == user_id,
+        models.PomodoroSession.completed == True
+    ).all()
+    return np.unique(to_datetime64([s[0] for s in starts]).astype("datetime64[D]"))
+
+
+def skill_focus_history(db: Session, user_id: int, since: Optional[datetime] = None) -> Dict[str, np.ndarray]:
+    """A user's skill focus logs as column arrays"""
+    query = db.query(
+        models.SkillFocusLog.skill_name,
+        models.SkillFocusLog.time_spent,
+        models.SkillFocusLog.confidence_level
+    ).filter(models.SkillFocusLog.user_id == user_id)
+    if since is not None:
+        query = query.filter(models.SkillFocusLog.focus_date >= since)
+
+    columns = _columns(query.all(), ("skill", "time_spent", "confidence"))
+    return {
+        "skill": np.array(columns["skill"], dtype=object),
+        "time_spent": np.nan_to_num(to_float(columns["time_spent"])),
+        "confidence": to_float(columns["confidence"])
+    }
+
+
+# ==================== METRICS ====================
+
+def nanmean(values: np.ndarray, default: float = 0.0) -> float:
+    """Mean ignoring NaNs, or ``default`` when nothing is left"""
+    values = values[~np.isnan(values)]
+    return float(values.mean()) if values.size else default
+
+
+def success_rate(shipped: np.ndarray) -> float:
+    """Percent of reviewed commitments shipped"""
+    return nanmean(shipped) * 100
+
+
+def weekdays(timestamps: np.ndarray) -> np.ndarray:
+    """Weekday per timestamp, Monday = 0"""
+    # 1970-01-01 was a Thursday
+    return (timestamps.astype("datetime64[D]").astype(np.int64) + 3) % 7
+
+
+def weekday_histogram(timestamps: np.ndarray) -> np.ndarray:
+    return np.bincount(weekdays(timestamps), minlength=7)
+
+
+def gap_days(timestamps: np.ndarray) -> np.ndarray:
+    """Whole days between consecutive timestamps"""
+    return np.diff(np.sort(timestamps)) // DAY
+
+
+def rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    """Mean of each full ``window``-long run of values"""
+    if values.size < window:
+        return np.empty(0)
+    sums = np.cumsum(np.insert(values.astype(float), 0, 0.0))
+    return (sums[window:] - sums[:-window]) / window
+
+
+def group_index(keys: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Distinct keys in order of first appearance, and each row's position among them"""
+    if keys.size == 0:
+        return keys, np.empty(0, dtype=np.int64)
+    if keys.dtype == object:
+        # np.unique sorts, and None doesn't compare with str; group missing keys under ""
+        keys = np.array([key if key is not None else "" for key in keys], dtype=object)
+    unique, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+    order = np.argsort(first)
+    rank = np.empty_like(order)
+    rank[order] = np.arange(order.size)
+    return unique[order], rank[inverse.ravel()]
+
+
+def group_sum(index: np.ndarray, values: np.ndarray, groups: int) -> np.ndarray:
+    """Per-group totals for the positions returned by ``group_index``"""
+    return np.bincount(index, weights=values, minlength=groups)
+
+
+def day_streaks(days: np.ndarray, today: date) -> Tuple[int, int]:
+    """Current and best run of consecutive days from sorted, distinct days.
+
+    The current streak counts if its last day is today or yesterday.
+    """
+    if days.size == 0:
+        return 0, 0
+
+    # Break points where the next day isn't consecutive
+    breaks = np.flatnonzero(np.diff(days) != DAY)
+    run_ends = np.append(breaks, days.size - 1)
+    run_lengths = np.diff(np.insert(run_ends + 1, 0, 0))
+
+    days_since_last = (np.datetime64(today, "D") - days[-1]) // DAY
+    current_streak = int(run_lengths[-1]) if 0 <= days_since_last <= 1 else 0
+    return current_streak, int(run_lengths.max())
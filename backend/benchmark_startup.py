@@ -0,0 +1,80 @@
+# backend/benchmark_startup.py
+"""Measure how long a fresh worker takes to import the app and answer a request.
+
+    python benchmark_startup.py [--runs 5] [--budget 1.0] [--warm-up]
+
+Each run is a new interpreter, like a worker booting. The exit code is 1
+when the median time to first response exceeds ``--budget`` seconds.
+With ``--warm-up`` it also reports how long the lazily built AI stack
+takes, which happens off the request path in a real worker.
+"""
+from statistics import median
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+PROBE = """
+import json, time
+started = time.perf_counter()
+import main
+imported = time.perf_counter()
+from fastapi.testclient import TestClient
+with TestClient(main.app) as client:
+    client.get("/")
+responded = time.perf_counter()
+result = {"import": imported - started, "first_response": responded - started}
+if WARM_UP:
+    import ai_stack
+    for service in ai_stack.SERVICES:
+        service.get()
+    result["ai_stack"] = time.perf_counter() - responded
+print("BENCHMARK " + json.dumps(result))
+"""
+
+
+def run_once(warm_up: bool) -> dict:
+    env = dict(os.environ, AI_WARMUP="false")
+    env.setdefault("GROQ_API_KEY", "benchmark")
+    started = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-c", f"WARM_UP = {warm_up}\n{PROBE}"],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        env=env, capture_output=True, text=True
+    )
+    wall = time.perf_counter() - started
+
+    for line in completed.stdout.splitlines():
+        if line.startswith("BENCHMARK "):
+            result = json.loads(line[len("BENCHMARK "):])
+            result["process"] = wall
+            return result
+    raise RuntimeError(f"Probe failed:\n{completed.stderr[-2000:]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget", type=float, default=1.0, help="seconds allowed for median time to first response")
+    parser.add_argument("--warm-up", action="store_true", help="also time building the AI stack")
+    args = parser.parse_args()
+
+    results = [run_once(args.warm_up) for _ in range(args.runs)]
+
+    print(f"⏱️  Startup over {args.runs} fresh processes (median / max seconds)")
+    for key in ("import", "first_response", "process", "ai_stack"):
+        values = [r[key] for r in results if key in r]
+        if values:
+            print(f"   {key:<15} {median(values):6.3f} / {max(values):6.3f}")
+
+    first_response = median(r["first_response"] for r in results)
+    if first_response > args.budget:
+        print(f"❌ Median time to first response {first_response:.3f}s is over the {args.budget}s budget")
+        sys.exit(1)
+    print(f"✓ Median time to first response {first_response:.3f}s is within the {args.budget}s budget")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,91 +1,525 @@
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from functools import wraps
-from typing import Optional, Callable
+from typing import Any, Optional, Callable, Dict, Iterable, List, Set
+import asyncio
+import inspect
 import json
 import hashlib
-from datetime import datetime, timedelta
+import os
+import pickle
+import sys
+import threading
+import time
+
+
+class CacheBackend:
+    """Interface shared by the in-process and shared cache backends.
+
+    Entries can carry tags (e.g. ``user:octocat``) so related keys can be
+    invalidated together without scanning the whole keyspace.
+    """
+
+    def get(self, key: str) -> Optional[any]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: any, ttl_seconds: int = 300, tags: Optional[Iterable[str]] = None):
+        raise NotImplementedError
+
+    def delete(self, key: str):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    def invalidate_tag(self, tag: str) -> int:
+        """Delete every key stored with ``tag``; returns the number removed"""
+        raise NotImplementedError
+
+    def invalidate_tags(self, *tags: str) -> int:
+        """Delete every key stored with any of ``tags``"""
+        return sum(self.invalidate_tag(tag) for tag in tags)
+
+    def stats(self) -> Dict:
+        raise NotImplementedError
+
+
+def _estimate_size(value) -> int:
+    try:
+        return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        return sys.getsizeof(value)
+
+
+class MemoryCache(CacheBackend):
+    """Bounded in-process LRU cache with TTLs and a background expiry sweep"""
+
+    def __init__(self, max_entries: int = 2000, max_memory_bytes: int = 64 * 1024 * 1024,
+                 sweep_interval_seconds: int = 30):
+        self.max_entries = max_entries
+        self.max_memory_bytes = max_memory_bytes
+        self.sweep_interval = sweep_interval_seconds
+        # key -> (value, expires_at, size, tags)
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._tags: Dict[str, Set[str]] = defaultdict(set)
+        self._memory_bytes = 0
+        self._lock = threading.RLock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0}
+
+        self._stop = threading.Event()
+        self._sweeper = None
+        if sweep_interval_seconds > 0:
+            self._sweeper = threading.Thread(target=self._sweep_loop, name="cache-sweep", daemon=True)
+            self._sweeper.start()
 
-class SimpleCache:
-    """Simple in-memory cache with TTL"""
-    
-    def __init__(self):
-        self._cache = {}
-        self._timestamps = {}
-    
     def get(self, key: str) -> Optional[any]:
         """Get value from cache if not expired"""
-        if key not in self._cache:
-            return None
-        
-        timestamp = self._timestamps.get(key)
-        if timestamp and timestamp < datetime.now():
-            # Expired
-            self.delete(key)
-            return None
-        
-        return self._cache[key]
-    
-    def set(self, key: str, value: any, ttl_seconds: int = 300):
-        """Set value in cache with TTL"""
-        self._cache[key] = value
-        self._timestamps[key] = datetime.now() + timedelta(seconds=ttl_seconds)
-    
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+
+            if entry[1] < time.monotonic():
+                self._remove(key)
+                self._stats["expirations"] += 1
+                self._stats["misses"] += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return entry[0]
+
+    def set(self, key: str, value: any, ttl_seconds: int = 300, tags: Optional[Iterable[str]] = None):
+        """Set value in cache with TTL, evicting least recently used entries past the caps"""
+        size = _estimate_size(value)
+        tags = frozenset(tags or ())
+        with self._lock:
+            self._remove(key)
+            if size > self.max_memory_bytes:
+                return
+
+            self._entries[key] = (value, time.monotonic() + ttl_seconds, size, tags)
+            self._memory_bytes += size
+            for tag in tags:
+                self._tags[tag].add(key)
+
+            while self._entries and (
+                len(self._entries) > self.max_entries or self._memory_bytes > self.max_memory_bytes
+            ):
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self._stats["evictions"] += 1
+
     def delete(self, key: str):
         """Delete key from cache"""
-        self._cache.pop(key, None)
-        self._timestamps.pop(key, None)
-    
+        with self._lock:
+            self._remove(key)
+
+    def _remove(self, key: str):
+        """Drop a key and its tag index entries (caller holds the lock)"""
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self._memory_bytes -= entry[2]
+        for tag in entry[3]:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
     def clear(self):
         """Clear entire cache"""
-        self._cache.clear()
-        self._timestamps.clear()
-    
-    def invalidate_pattern(self, pattern: str):
-        """Invalidate all keys matching pattern"""
-        keys_to_delete = [k for k in self._cache.keys() if pattern in k]
-        for key in keys_to_delete:
-            self.delete(key)
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+            self._memory_bytes = 0
+
+    def invalidate_tag(self, tag: str) -> int:
+        with self._lock:
+            keys = list(self._tags.get(tag, ()))
+            for key in keys:
+                self._remove(key)
+            return len(keys)
+
+    def sweep(self) -> int:
+        """Remove all expired entries"""
+        now = time.monotonic()
+        with self._lock:
+            expired = [k for k, entry in self._entries.items() if entry[1] < now]
+            for key in expired:
+                self._remove(key)
+            self._stats["expirations"] += len(expired)
+        return len(expired)
+
+    def _sweep_loop(self):
+        while not self._stop.wait(self.sweep_interval):
+            try:
+                self.sweep()
+            except Exception as e:
+                print(f"⚠️ Cache sweep failed: {str(e)}")
+
+    def stop(self):
+        """Stop the background sweep thread"""
+        self._stop.set()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "backend": "memory",
+                "entries": len(self._entries),
+                "tags": len(self._tags),
+                "memory_bytes": self._memory_bytes,
+                "max_entries": self.max_entries,
+                "max_memory_bytes": self.max_memory_bytes,
+                **self._stats
+            }
+
+
+class RedisCache(CacheBackend):
+    """Cache shared between workers, backed by Redis or any client with the redis-py API.
+
+    Values are pickled under ``<prefix>key:<key>``; each tag is a set of keys
+    under ``<prefix>tag:<tag>`` that expires with the longest-lived member.
+    That uses ``EXPIRE ... GT/NX``, so the server must be Redis 7 or newer;
+    on older servers tagged writes report errors and tag sets never expire.
+    """
+
+    def __init__(self, client=None, url: Optional[str] = None, prefix: str = "sage:"):
+        if client is None:
+            try:
+                import redis
+            except ImportError as e:
+                raise ImportError("CACHE_BACKEND=redis requires the 'redis' package (pip install redis)") from e
+            client = redis.Redis.from_url(url or "redis://localhost:6379/0")
+
+        self.client = client
+        self.prefix = prefix
+        self._stats = {"hits": 0, "misses": 0, "errors": 0}
+        self._lock = threading.Lock()
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}key:{key}"
+
+    def _tag(self, tag: str) -> str:
+        return f"{self.prefix}tag:{tag}"
+
+    def _count(self, stat: str):
+        with self._lock:
+            self._stats[stat] += 1
+
+    def get(self, key: str) -> Optional[any]:
+        try:
+            raw = self.client.get(self._key(key))
+        except Exception as e:
+            self._count("errors")
+            print(f"⚠️ Cache read failed: {str(e)}")
+            return None
+
+        if raw is None:
+            self._count("misses")
+            return None
+        self._count("hits")
+        return pickle.loads(raw)
+
+    def set(self, key: str, value: any, ttl_seconds: int = 300, tags: Optional[Iterable[str]] = None):
+        try:
+            pipe = self.client.pipeline()
+            pipe.set(self._key(key), pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), ex=ttl_seconds)
+            for tag in tags or ():
+                tag_key = self._tag(tag)
+                pipe.sadd(tag_key, key)
+                # Only ever extend the tag set's lifetime
+                pipe.expire(tag_key, ttl_seconds, gt=True)
+                pipe.expire(tag_key, ttl_seconds, nx=True)
+            pipe.execute()
+        except Exception as e:
+            self._count("errors")
+            print(f"⚠️ Cache write failed: {str(e)}")
+
+    def delete(self, key: str):
+        try:
+            self.client.delete(self._key(key))
+        except Exception as e:
+            self._count("errors")
+            print(f"⚠️ Cache delete failed: {str(e)}")
+
+    def clear(self):
+        try:
+            keys = list(self.client.scan_iter(match=f"{self.prefix}*"))
+            if keys:
+                self.client.delete(*keys)
+        except Exception as e:
+            self._count("errors")
+            print(f"⚠️ Cache clear failed: {str(e)}")
+
+    def invalidate_tag(self, tag: str) -> int:
+        # Mutations invalidate after their commit, so an outage must not turn them into 500s
+        try:
+            tag_key = self._tag(tag)
+            members = self.client.smembers(tag_key)
+            keys = [self._key(m.decode() if isinstance(m, bytes) else m) for m in members]
+            self.client.delete(tag_key, *keys)
+            return len(keys)
+        except Exception as e:
+            self._count("errors")
+            print(f"⚠️ Cache invalidation failed for {tag}: {str(e)}")
+            return 0
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"backend": "redis", "prefix": self.prefix, **self._stats}
+
+
+def create_cache() -> CacheBackend:
+    """Build the cache backend selected by CACHE_BACKEND (memory or redis)"""
+    backend = os.getenv("CACHE_BACKEND", "memory").lower()
+    if backend == "redis":
+        return RedisCache(url=os.getenv("REDIS_URL"), prefix=os.getenv("CACHE_PREFIX", "sage:"))
+    return MemoryCache(
+        max_entries=int(os.getenv("CACHE_MAX_ENTRIES", "2000")),
+        max_memory_bytes=int(os.getenv("CACHE_MAX_MEMORY_MB", "64")) * 1024 * 1024,
+        sweep_interval_seconds=int(os.getenv("CACHE_SWEEP_INTERVAL_SECONDS", "30")),
+    )
 
 # Global cache instance
-cache = SimpleCache()
+cache = create_cache()
 
 def cache_key(*args, **kwargs) -> str:
     """Generate cache key from arguments"""
     key_data = f"{args}{kwargs}"
     return hashlib.md5(key_data.encode()).hexdigest()
 
-def cached(ttl_seconds: int = 300, key_prefix: str = ""):
-    """Decorator for caching function results"""
+class _Flight:
+    """A computation in progress that concurrent callers for the same key wait on"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+
+
+_flights: Dict[str, _Flight] = {}
+_flights_lock = threading.Lock()
+_async_flights: Dict[str, asyncio.Future] = {}
+_background_tasks: Set[asyncio.Task] = set()
+_refresh_executor = ThreadPoolExecutor(max_workers=int(os.getenv("CACHE_REFRESH_WORKERS", "2")), thread_name_prefix="cache-refresh")
+_flight_stats = {"computed": 0, "coalesced": 0, "stale_served": 0, "refresh_errors": 0}
+
+
+def _count(stat: str):
+    # Request threads and the refresh pool both update these
+    with _flights_lock:
+        _flight_stats[stat] += 1
+
+
+def _store(key: str, value, ttl_seconds: int, stale_ttl_seconds: int, tags):
+    """Store ``value`` with its freshness deadline; the entry outlives it by the stale window"""
+    envelope = {"value": value, "fresh_until": time.time() + ttl_seconds}
+    cache.set(key, envelope, ttl_seconds + stale_ttl_seconds, tags=tags)
+
+
+def _load(key: str, compute: Callable, ttl_seconds: int, stale_ttl_seconds: int, tags):
+    """Compute and store a value, letting only one thread per key do the work"""
+    with _flights_lock:
+        flight = _flights.get(key)
+        leader = flight is None
+        if leader:
+            flight = _flights[key] = _Flight()
+        else:
+            _flight_stats["coalesced"] += 1
+
+    if not leader:
+        flight.event.wait()
+        if flight.error is not None:
+            raise flight.error
+        return flight.value
+
+    try:
+        flight.value = compute()
+        _count("computed")
+        _store(key, flight.value, ttl_seconds, stale_ttl_seconds, tags)
+        return flight.value
+    except Exception as e:
+        flight.error = e
+        raise
+    finally:
+        with _flights_lock:
+            _flights.pop(key, None)
+        flight.event.set()
+
+
+def _refresh(key: str, compute: Callable, ttl_seconds: int, stale_ttl_seconds: int, tags):
+    with _flights_lock:
+        if key in _flights:
+            return
+
+    def run():
+        try:
+            _load(key, compute, ttl_seconds, stale_ttl_seconds, tags)
+        except Exception as e:
+            _count("refresh_errors")
+            print(f"⚠️ Background cache refresh failed for {key}: {str(e)}")
+
+    _refresh_executor.submit(run)
+
+
+async def _load_async(key: str, compute: Callable, ttl_seconds: int, stale_ttl_seconds: int, tags):
+    """Async counterpart of ``_load``: concurrent callers await the same future"""
+    flight = _async_flights.get(key)
+    if flight is not None:
+        _count("coalesced")
+        return await asyncio.shield(flight)
+
+    flight = asyncio.get_running_loop().create_future()
+    # Mark the exception retrieved even when nobody else is waiting
+    flight.add_done_callback(lambda f: f.cancelled() or f.exception())
+    _async_flights[key] = flight
+    try:
+        value = await compute()
+        _count("computed")
+        _store(key, value, ttl_seconds, stale_ttl_seconds, tags)
+        flight.set_result(value)
+        return value
+    except Exception as e:
+        flight.set_exception(e)
+        raise
+    finally:
+        _async_flights.pop(key, None)
+        # A cancelled leader (client disconnect, timeout) must still release its followers
+        if not flight.done():
+            flight.cancel()
+
+
+def _refresh_async(key: str, compute: Callable, ttl_seconds: int, stale_ttl_seconds: int, tags):
+    if key in _async_flights:
+        return
+
+    async def run():
+        try:
+            await _load_async(key, compute, ttl_seconds, stale_ttl_seconds, tags)
+        except Exception as e:
+            _count("refresh_errors")
+            print(f"⚠️ Background cache refresh failed for {key}: {str(e)}")
+
+    task = asyncio.ensure_future(run())
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+
+def cached(ttl_seconds: int = 300, key_prefix: str = "", stale_ttl_seconds: int = 0,
+           key_func: Optional[Callable] = None, tags: Optional[Callable] = None):
+    """Decorator for caching function results.
+
+    Concurrent misses for the same key share a single computation. With
+    ``stale_ttl_seconds`` an expired value keeps being served for that long
+    while one background refresh replaces it, so the arguments must stay
+    usable after the caller returns (don't pass request-scoped sessions).
+    ``key_func`` and ``tags`` receive the call's arguments. Works on both
+    sync and async functions.
+    """
     def decorator(func: Callable):
+        def make_key(args, kwargs) -> str:
+            if key_func:
+                return key_func(*args, **kwargs)
+            return f"{key_prefix}:{func.__name__}:{cache_key(*args, **kwargs)}"
+
+        def lookup(key: str):
+            """Cached value and whether it is still fresh, or (None, None) on a miss"""
+            entry = cache.get(key)
+            if entry is None:
+                return None, None
+            return entry["value"], entry["fresh_until"] > time.time()
+
+        if inspect.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                key = make_key(args, kwargs)
+                entry_tags = tags(*args, **kwargs) if tags else None
+                compute = lambda: func(*args, **kwargs)
+
+                value, fresh = lookup(key)
+                if fresh:
+                    return value
+                if fresh is False and stale_ttl_seconds:
+                    _count("stale_served")
+                    _refresh_async(key, compute, ttl_seconds, stale_ttl_seconds, entry_tags)
+                    return value
+
+                return await _load_async(key, compute, ttl_seconds, stale_ttl_seconds, entry_tags)
+
+            return async_wrapper
+
         @wraps(func)
         def wrapper(*args, **kwargs):
-            # Generate cache key
-            key = f"{key_prefix}:{func.__name__}:{cache_key(*args, **kwargs)}"
-            
-            # Try to get from cache
-            cached_result = cache.get(key)
-            if cached_result is not None:
-                return cached_result
-            
-            # Execute function
-            result = func(*args, **kwargs)
-            
-            # Store in cache
-            cache.set(key, result, ttl_seconds)
-            
-            return result
-        
+            key = make_key(args, kwargs)
+            entry_tags = tags(*args, **kwargs) if tags else None
+            compute = lambda: func(*args, **kwargs)
+
+            value, fresh = lookup(key)
+            if fresh:
+                return value
+            if fresh is False and stale_ttl_seconds:
+                _count("stale_served")
+                _refresh(key, compute, ttl_seconds, stale_ttl_seconds, entry_tags)
+                return value
+
+            return _load(key, compute, ttl_seconds, stale_ttl_seconds, entry_tags)
+
         return wrapper
     return decorator
 
-# Convenience functions for endpoint caching
-def cache_dashboard(username: str, data: dict):
-    """Cache dashboard data"""
-    cache.set(f"dashboard:{username}", data, ttl_seconds=60)
+def cached_stats() -> Dict:
+    """Single-flight and stale-while-revalidate counters for ``@cached`` functions"""
+    with _flights_lock:
+        stats = dict(_flight_stats)
+    return {
+        **stats,
+        "in_flight": len(_flights) + len(_async_flights),
+    }
+
+# Tags for precise invalidation; an entry can carry several of these
+def user_tag(username: str) -> str:
+    return f"user:{username}"
+
+def goals_tag(username: str) -> str:
+    """Entries that list a user's goals (e.g. the goals dashboard)"""
+    return f"goals:{username}"
+
+def goal_tag(goal_id: int) -> str:
+    return f"goal:{goal_id}"
 
-def get_cached_dashboard(username: str) -> Optional[dict]:
-    """Get cached dashboard data"""
-    return cache.get(f"dashboard:{username}")
+def plan_tag(plan_id: int) -> str:
+    return f"plan:{plan_id}"
 
+# Other caches keyed by the same tags (e.g. middleware.cache_response) hook in here
+_invalidation_hooks: List[Callable[[str], Any]] = []
+
+def on_invalidate(hook: Callable[[str], Any]):
+    """Call ``hook(tag)`` whenever a tag is invalidated through this module"""
+    _invalidation_hooks.append(hook)
+    return hook
+
+def invalidate_tags(*tags: str):
+    """Drop every entry carrying any of ``tags``, here and in the hooked caches"""
+    cache.invalidate_tags(*tags)
+    for hook in _invalidation_hooks:
+        for tag in tags:
+            hook(tag)
+
+# Convenience functions for endpoint caching
 def invalidate_user_cache(username: str):
     """Invalidate all cache for a user"""
-    cache.invalidate_pattern(username)
\ No newline at end of file
+    invalidate_tags(user_tag(username))
+
+def invalidate_goal_cache(username: str, goal_id: Optional[int] = None):
+    """Invalidate a goal's cached views and the user's goal listings"""
+    tags = [goals_tag(username)]
+    if goal_id is not None:
+        tags.append(goal_tag(goal_id))
+    invalidate_tags(*tags)
+
+def invalidate_plan_cache(plan_id: int):
+    """Invalidate cached views of an action plan"""
+    invalidate_tags(plan_tag(plan_id))
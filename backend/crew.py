@@ -1,11 +1,10 @@
 from crewai import Task, Crew, Process
 from agents import analyst, psychologist, strategist, contrarian
-from typing import Dict, List
+from deliberation import DeliberationRecorder
+from typing import Callable, Dict, List, Optional
 import json
 import models
 from datetime import datetime
-import io
-import sys
 
 class SageMentorCrew:
     def __init__(self):
@@ -75,35 +74,36 @@ class SageMentorCrew:
             context=[analysis_task, psychology_task]
         )
         
+        recorder = DeliberationRecorder()
         crew = Crew(
             agents=[self.analyst, self.psychologist, self.strategist],
             tasks=[analysis_task, psychology_task, strategy_task],
             process=Process.sequential,
-            verbose=True
+            verbose=True,
+            task_callback=recorder.record
         )
         
-        result = crew.kickoff()
+        result = recorder.kickoff(crew)
         
-        return self._structure_output(result, github_data)
-    
-    def _capture_output(self, crew):
-        """Capture verbose output from crew execution"""
-        # CrewAI's verbose mode prints to stdout, we'll capture it
-        old_stdout = sys.stdout
-        sys.stdout = captured_output = io.StringIO()
-        
-        try:
-            result = crew.kickoff()
-            output = captured_output.getvalue()
-            self.raw_output = output.split('\n')
-            return result
-        finally:
-            sys.stdout = old_stdout
+        output = self._structure_output(result, github_data)
+        output["deliberation"] = recorder.entries
+        output["usage"] = recorder.summary()
+        return output
     
-    def chat_deliberation(self, user_message: str, user_context: Dict, additional_context: Dict = None) -> Dict:
-        """Multi-agent deliberation for chat messages with raw output"""
+    def chat_deliberation(
+        self,
+        user_message: str,
+        user_context: Dict,
+        additional_context: Dict = None,
+        on_agent_output: Optional[Callable[[Dict], None]] = None
+    ) -> Dict:
+        """Multi-agent deliberation for chat messages with raw output.
+        
+        ``on_agent_output`` is called with each agent's contribution as soon
+        as its task finishes, so callers can stream the debate.
+        """
         
-        self.raw_output = []  # Reset raw output
+        recorder = DeliberationRecorder(on_entry=on_agent_output)
         
         context_str = f"""
         User Context:
@@ -188,14 +188,11 @@ class SageMentorCrew:
             agents=[self.analyst, self.psychologist, self.contrarian, self.strategist],
             tasks=[analyst_task, psychologist_task, contrarian_task, strategist_task],
             process=Process.sequential,
-            verbose=True
+            verbose=True,
+            task_callback=recorder.record
         )
         
-        # Capture output
-        result = self._capture_output(crew)
-        
-        # Parse raw output for agent contributions
-        agent_contributions = self._parse_agent_output(self.raw_output)
+        result = recorder.kickoff(crew)
         
         return {
             "final_response": str(result),
@@ -207,54 +204,10 @@ class SageMentorCrew:
             ],
             "key_insights": self._extract_key_points(str(result)),
             "actions": self._extract_actions(str(result)),
-            "raw_deliberation": agent_contributions  # NEW: Raw deliberation data
+            "raw_deliberation": recorder.entries,
+            "usage": recorder.summary()
         }
     
-    def _parse_agent_output(self, raw_lines: List[str]) -> List[Dict]:
-        """Parse raw output to extract agent contributions"""
-        contributions = []
-        current_agent = None
-        current_output = []
-        
-        for line in raw_lines:
-            # Detect agent starting to work
-            if "Agent:" in line or "Working Agent:" in line:
-                # Save previous agent's output
-                if current_agent and current_output:
-                    contributions.append({
-                        "agent": current_agent,
-                        "output": "\n".join(current_output),
-                        "timestamp": datetime.now().isoformat()
-                    })
-                
-                # Extract agent name
-                if "Data Analyst" in line:
-                    current_agent = "Analyst"
-                elif "Developer Psychologist" in line:
-                    current_agent = "Psychologist"
-                elif "Devil's Advocate" in line:
-                    current_agent = "Contrarian"
-                elif "Strategic Advisor" in line:
-                    current_agent = "Strategist"
-                
-                current_output = []
-            
-            # Collect output lines
-            elif current_agent and line.strip() and not line.startswith("###"):
-                # Filter out system messages
-                if not any(skip in line for skip in ["Task output:", "Final Answer:", "Thought:"]):
-                    current_output.append(line.strip())
-        
-        # Add last agent's output
-        if current_agent and current_output:
-            contributions.append({
-                "agent": current_agent,
-                "output": "\n".join(current_output),
-                "timestamp": datetime.now().isoformat()
-            })
-        
-        return contributions
-    
     def analyze_life_decision(self, decision: Dict, user_id: int, db) -> Dict:
         """Analyze a major life decision"""
         
@@ -590,16 +543,21 @@ class SageMentorCrew:
             context=[analyst_task, psychologist_task, contrarian_task]
         )
         
+        recorder = DeliberationRecorder()
         crew = Crew(
             agents=[self.analyst, self.psychologist, self.contrarian, self.strategist],
             tasks=[analyst_task, psychologist_task, contrarian_task, strategist_task],
             process=Process.sequential,
-            verbose=True
+            verbose=True,
+            task_callback=recorder.record
         )
         
-        result = crew.kickoff()
+        result = recorder.kickoff(crew)
         
-        return self._parse_goal_analysis(str(result), goal_data)
+        analysis = self._parse_goal_analysis(str(result), goal_data)
+        analysis["deliberation"] = recorder.entries
+        analysis["usage"] = recorder.summary()
+        return analysis
     
     def _parse_goal_analysis(self, analysis: str, goal_data: Dict) -> Dict:
         """Parse the goal analysis into structured format"""
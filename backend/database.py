@@ -1,7 +1,9 @@
-from sqlalchemy import create_engine, event
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import QueuePool
+from sqlalchemy.pool import QueuePool, StaticPool
 import os
 from dotenv import load_dotenv
 import logging
@@ -13,36 +15,163 @@ DATABASE_URL = os.getenv("DATABASE_URL")
 if not DATABASE_URL:
     raise ValueError("DATABASE_URL is not set! Please add it to backend/.env")
 
-# Production-grade connection pooling
-engine = create_engine(
-    DATABASE_URL,
-    poolclass=QueuePool,
-    pool_size=20,  # Increased for production
-    max_overflow=40,  # Allow more overflow connections
-    pool_pre_ping=True,  # Verify connections
-    pool_recycle=3600,  # Recycle after 1 hour
-    pool_timeout=30,  # Wait up to 30s for connection
-    echo=False,  # Disable SQL logging in production
-    connect_args={
+def _env_int(name: str, default: int) -> int:
+    return int(os.getenv(name, str(default)))
+
+
+def create_db_engine(database_url: str):
+    """Create an engine with pool and connection settings tuned for its dialect"""
+    url = make_url(database_url)
+    if url.get_backend_name() == "sqlite":
+        return _create_sqlite_engine(url)
+    return _create_postgres_engine(url)
+
+
+def _sqlite_url(url):
+    """``url`` and whether it is in memory.
+
+    Each connection to plain ``:memory:`` opens its own empty database, so the
+    sync and aiosqlite engines would never see each other's tables. Both are
+    pointed at one shared-cache in-memory database instead.
+    """
+    if url.database in (None, "", ":memory:"):
+        return url.set(database="file::memory:", query={"cache": "shared", "uri": "true"}), True
+    return url, url.database.startswith("file::memory:") or url.query.get("mode") == "memory"
+
+
+def _create_sqlite_engine(url):
+    """SQLite: WAL so readers don't block the writer, plus a busy timeout instead of lock errors"""
+    url, in_memory = _sqlite_url(url)
+    connect_args = {
+        "check_same_thread": False,  # Sessions are used from FastAPI's threadpool
+        "timeout": _env_int("SQLITE_BUSY_TIMEOUT_MS", 5000) / 1000
+    }
+
+    if in_memory:
+        # The database lives as long as a connection to it, so keep exactly one open
+        sqlite_engine = create_engine(url, poolclass=StaticPool, connect_args=connect_args, echo=False)
+    else:
+        sqlite_engine = create_engine(
+            url,
+            poolclass=QueuePool,
+            pool_size=_env_int("DB_POOL_SIZE", 10),
+            max_overflow=_env_int("DB_MAX_OVERFLOW", 10),
+            pool_pre_ping=True,
+            pool_timeout=30,
+            echo=False,
+            connect_args=connect_args
+        )
+
+    _listen_sqlite_pragmas(sqlite_engine, in_memory)
+    return sqlite_engine
+
+
+def _listen_sqlite_pragmas(sqlite_engine, in_memory: bool):
+    """Apply the SQLite tuning pragmas to every new connection of ``sqlite_engine``"""
+    @event.listens_for(sqlite_engine, "connect")
+    def receive_connect(dbapi_conn, connection_record):
+        cursor = dbapi_conn.cursor()
+        if not in_memory:
+            cursor.execute("PRAGMA journal_mode=WAL")
+            # Safe with WAL: only the last transactions can be lost on power failure, never corrupted
+            cursor.execute("PRAGMA synchronous=NORMAL")
+            cursor.execute(f"PRAGMA mmap_size={_env_int('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)}")
+        cursor.execute(f"PRAGMA busy_timeout={_env_int('SQLITE_BUSY_TIMEOUT_MS', 5000)}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.execute(f"PRAGMA cache_size=-{_env_int('SQLITE_CACHE_SIZE_KB', 64000)}")
+        cursor.close()
+
+
+def _create_postgres_engine(url):
+    """Postgres: production-grade connection pooling with per-connection tuning"""
+    connect_args = {
         "connect_timeout": 10,
         "options": "-c statement_timeout=30000"  # 30s query timeout
     }
-)
+    # psycopg 3 prepares statements server-side once they've run this many times
+    if url.get_driver_name() == "psycopg":
+        connect_args["prepare_threshold"] = _env_int("DB_PREPARE_THRESHOLD", 5)
+
+    pg_engine = create_engine(
+        url,
+        poolclass=QueuePool,
+        pool_size=_env_int("DB_POOL_SIZE", 20),  # Increased for production
+        max_overflow=_env_int("DB_MAX_OVERFLOW", 40),  # Allow more overflow connections
+        pool_pre_ping=True,  # Verify connections
+        pool_recycle=3600,  # Recycle after 1 hour
+        pool_timeout=30,  # Wait up to 30s for connection
+        query_cache_size=_env_int("DB_QUERY_CACHE_SIZE", 1200),  # Compiled statement cache
+        echo=False,  # Disable SQL logging in production
+        connect_args=connect_args
+    )
+
+    # Optimize PostgreSQL settings for each connection
+    @event.listens_for(pg_engine, "connect")
+    def receive_connect(dbapi_conn, connection_record):
+        cursor = dbapi_conn.cursor()
+        # Set optimal work_mem for this connection
+        cursor.execute("SET work_mem = '64MB'")
+        # Enable JIT compilation for complex queries
+        cursor.execute("SET jit = on")
+        cursor.close()
+        # Commit so the first pool rollback doesn't revert the SETs
+        dbapi_conn.commit()
+
+    return pg_engine
+
+
+def create_async_db_engine(database_url: str):
+    """Async counterpart of ``create_db_engine``: aiosqlite for SQLite, asyncpg for Postgres"""
+    url = make_url(database_url)
+
+    if url.get_backend_name() == "sqlite":
+        url, in_memory = _sqlite_url(url)
+        url = url.set(drivername="sqlite+aiosqlite")
+        connect_args = {"timeout": _env_int("SQLITE_BUSY_TIMEOUT_MS", 5000) / 1000}
+        if in_memory:
+            async_sqlite_engine = create_async_engine(url, poolclass=StaticPool, connect_args=connect_args, echo=False)
+        else:
+            async_sqlite_engine = create_async_engine(
+                url,
+                pool_size=_env_int("DB_ASYNC_POOL_SIZE", 10),
+                max_overflow=_env_int("DB_MAX_OVERFLOW", 10),
+                pool_pre_ping=True,
+                pool_timeout=30,
+                echo=False,
+                connect_args=connect_args
+            )
+        _listen_sqlite_pragmas(async_sqlite_engine.sync_engine, in_memory)
+        return async_sqlite_engine
+
+    return create_async_engine(
+        url.set(drivername="postgresql+asyncpg"),
+        pool_size=_env_int("DB_ASYNC_POOL_SIZE", 20),
+        max_overflow=_env_int("DB_MAX_OVERFLOW", 40),
+        pool_pre_ping=True,
+        pool_recycle=3600,
+        pool_timeout=30,
+        query_cache_size=_env_int("DB_QUERY_CACHE_SIZE", 1200),
+        echo=False,
+        connect_args={
+            "timeout": 10,
+            # asyncpg caches prepared statements per connection
+            "prepared_statement_cache_size": _env_int("DB_PREPARED_STATEMENT_CACHE_SIZE", 500),
+            "server_settings": {
+                "statement_timeout": "30000",  # 30s query timeout
+                "work_mem": "64MB",
+                "jit": "on"
+            }
+        }
+    )
+
+
+engine = create_db_engine(DATABASE_URL)
+async_engine = create_async_db_engine(DATABASE_URL)
 
 # Add connection pool logging
 logging.basicConfig()
 logging.getLogger('sqlalchemy.pool').setLevel(logging.INFO)
 
-# Optimize PostgreSQL settings for each connection
-@event.listens_for(engine, "connect")
-def receive_connect(dbapi_conn, connection_record):
-    cursor = dbapi_conn.cursor()
-    # Set optimal work_mem for this connection
-    cursor.execute("SET work_mem = '64MB'")
-    # Enable JIT compilation for complex queries
-    cursor.execute("SET jit = on")
-    cursor.close()
-
 SessionLocal = sessionmaker(
     autocommit=False, 
     autoflush=False, 
@@ -50,6 +179,12 @@ SessionLocal = sessionmaker(
     expire_on_commit=False  # Better for read-heavy workloads
 )
 
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    autoflush=False,
+    expire_on_commit=False
+)
+
 Base = declarative_base()
 
 def get_db():
@@ -59,40 +194,22 @@ def get_db():
     finally:
         db.close()
 
+async def get_async_db():
+    """Async session for read-heavy endpoints; DB waits don't hold a threadpool slot"""
+    async with AsyncSessionLocal() as db:
+        yield db
+
 def init_db():
-    """Initialize database tables with indexes"""
-    Base.metadata.create_all(bind=engine)
-    
-    # Create additional indexes for performance
-    with engine.connect() as conn:
-        # Index for checkins by user and timestamp
-        conn.execute("""
-            CREATE INDEX IF NOT EXISTS idx_checkins_user_timestamp 
-            ON checkins(user_id, timestamp DESC)
-        """)
-        
-        # Index for goals by user and status
-        conn.execute("""
-            CREATE INDEX IF NOT EXISTS idx_goals_user_status 
-            ON goals(user_id, status)
-        """)
-        
-        # Index for notifications by user and read status
-        conn.execute("""
-            CREATE INDEX IF NOT EXISTS idx_notifications_user_read 
-            ON notifications(user_id, read, created_at DESC)
-        """)
-        
-        conn.commit()
-    
-    print("✓ Database tables and indexes created successfully")
+    """Create tables and apply pending schema migrations"""
+    from migrations import migrate
+    migrate()
 
 # Health check function
 def check_db_health():
     """Check database connection health"""
     try:
         with engine.connect() as conn:
-            conn.execute("SELECT 1")
+            conn.execute(text("SELECT 1"))
         return True
     except Exception as e:
         logging.error(f"Database health check failed: {e}")
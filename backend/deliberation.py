@@ -0,0 +1,68 @@
+# backend/deliberation.py
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+import time
+
+# Map agent roles to the names shown in the chat debate
+AGENT_DISPLAY_NAMES = {
+    "Data Analyst": "Analyst",
+    "Developer Psychologist": "Psychologist",
+    "Devil's Advocate": "Contrarian",
+    "Strategic Advisor": "Strategist"
+}
+
+# UsageMetrics fields kept from a crew run
+TOKEN_FIELDS = ("total_tokens", "prompt_tokens", "cached_prompt_tokens", "completion_tokens", "successful_requests")
+
+
+class DeliberationRecorder:
+    """Per-request record of each task's output and duration.
+
+    Pass ``recorder.record`` as the Crew ``task_callback`` and start the crew
+    with ``recorder.kickoff(crew)``. Token usage is kept for the whole run,
+    from the crew output, not per task: the agents share one LLM whose
+    counters also move with every concurrent crew run, and task outputs
+    don't carry their own usage.
+    """
+
+    def __init__(self, on_entry: Optional[Callable[[Dict], None]] = None):
+        self.entries: List[Dict] = []
+        self._on_entry = on_entry
+        self.token_usage: Optional[Dict] = None
+        self._started = None
+        self._last_mark = None
+
+    def kickoff(self, crew):
+        """Run the crew, recording each task as it completes"""
+        self._started = self._last_mark = time.perf_counter()
+        result = crew.kickoff()
+        usage = getattr(result, "token_usage", None)
+        if usage is not None:
+            self.token_usage = {field: getattr(usage, field) for field in TOKEN_FIELDS if hasattr(usage, field)}
+        return result
+
+    def record(self, task_output):
+        """Crew task_callback: store the finished task's output"""
+        now = time.perf_counter()
+        role = (task_output.agent or "").strip()
+
+        entry = {
+            "agent": AGENT_DISPLAY_NAMES.get(role, role),
+            "role": role,
+            "output": task_output.raw,
+            "duration_ms": round((now - (self._last_mark or now)) * 1000),
+            "timestamp": datetime.now().isoformat()
+        }
+        self._last_mark = now
+        self.entries.append(entry)
+
+        if self._on_entry:
+            self._on_entry(entry)
+
+    def summary(self) -> Dict:
+        """Totals across all recorded tasks, with the run's token usage"""
+        return {
+            "tasks": len(self.entries),
+            "duration_ms": round((time.perf_counter() - self._started) * 1000) if self._started else 0,
+            "token_usage": self.token_usage
+        }
@@ -0,0 +1,239 @@
+# backend/github_cache.py
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Optional
+import hashlib
+import os
+import threading
+
+from sqlalchemy import func
+
+from database import SessionLocal
+import models
+
+# Response headers the client needs when it replays a cached body
+STORED_HEADERS = ("content-type", "link")
+
+
+class GitHubResponseCache:
+    """Conditional-request cache for GitHub REST GETs.
+
+    Every 200 that carries an ETag or Last-Modified is stored per URL. The
+    next request for that URL sends If-None-Match / If-Modified-Since, and
+    a 304 is answered from the stored body. GitHub doesn't count 304s
+    against the rate limit, so unchanged repo lists and event pages cost
+    nothing. Entries live in an in-memory LRU backed by the
+    ``github_response_cache`` table; both tiers are bounded, and the
+    table is pruned least-recently-used first.
+    """
+
+    def __init__(self, max_entries: int = 5000, max_bytes: int = 64 * 1024 * 1024,
+                 memory_bytes: int = 16 * 1024 * 1024, persistent: bool = True):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.memory_bytes = memory_bytes
+        self.persistent = persistent
+        self._entries: "OrderedDict[str, Dict]" = OrderedDict()
+        self._memory_size = 0
+        self._stores_since_prune = 0
+        self._lock = threading.Lock()
+        self._stats = {
+            "lookups": 0, "conditional_requests": 0, "not_modified": 0, "bytes_saved": 0,
+            "stores": 0, "evictions": 0, "errors": 0
+        }
+
+    @staticmethod
+    def make_key(authorization: Optional[str], url: str) -> str:
+        """Responses differ per token (private repos), so the token is part of the key"""
+        return hashlib.sha256(f"{authorization or ''}\n{url}".encode("utf-8")).hexdigest()
+
+    def lookup(self, key: str) -> Optional[Dict]:
+        """Stored entry for ``key``, checking memory before the database"""
+        with self._lock:
+            self._stats["lookups"] += 1
+            entry = self._entries.get(key)
+            if entry:
+                self._entries.move_to_end(key)
+                return entry
+
+        entry = self._load(key) if self.persistent else None
+        if entry:
+            self._remember(key, entry)
+        return entry
+
+    def conditional_headers(self, entry: Optional[Dict]) -> Dict[str, str]:
+        if not entry:
+            return {}
+        headers = {}
+        if entry["etag"]:
+            headers["If-None-Match"] = entry["etag"]
+        if entry["last_modified"]:
+            headers["If-Modified-Since"] = entry["last_modified"]
+        with self._lock:
+            self._stats["conditional_requests"] += 1
+        return headers
+
+    def not_modified(self, key: str, entry: Dict):
+        """Record a 304 answered from ``entry``"""
+        with self._lock:
+            self._stats["not_modified"] += 1
+            self._stats["bytes_saved"] += entry["size_bytes"]
+        if self.persistent:
+            self._touch(key)
+
+    def store(self, key: str, url: str, headers, body: str):
+        """Keep a 200 response if GitHub gave it a validator"""
+        etag = headers.get("etag")
+        last_modified = headers.get("last-modified")
+        if not etag and not last_modified:
+            return
+
+        entry = {
+            "etag": etag,
+            "last_modified": last_modified,
+            "headers": {name: headers[name] for name in STORED_HEADERS if name in headers},
+            "body": body,
+            "size_bytes": len(body.encode("utf-8")),
+        }
+        if entry["size_bytes"] > self.memory_bytes:
+            return  # Would evict the whole memory tier on its own
+
+        self._remember(key, entry)
+        with self._lock:
+            self._stats["stores"] += 1
+            self._stores_since_prune += 1
+            prune = self._stores_since_prune >= 100
+            if prune:
+                self._stores_since_prune = 0
+        if self.persistent:
+            self._save(key, url, entry)
+            if prune:
+                self.prune()
+
+    def _remember(self, key: str, entry: Dict):
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous:
+                self._memory_size -= previous["size_bytes"]
+            self._entries[key] = entry
+            self._memory_size += entry["size_bytes"]
+            while len(self._entries) > self.max_entries or self._memory_size > self.memory_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._memory_size -= evicted["size_bytes"]
+                self._stats["evictions"] += 1
+
+    def _load(self, key: str) -> Optional[Dict]:
+        db = SessionLocal()
+        try:
+            row = db.query(models.GitHubCacheEntry).filter(models.GitHubCacheEntry.key == key).first()
+            if not row:
+                return None
+            return {
+                "etag": row.etag,
+                "last_modified": row.last_modified,
+                "headers": row.headers or {},
+                "body": row.body,
+                "size_bytes": row.size_bytes,
+            }
+        except Exception as e:
+            self._record_error("read", e)
+            return None
+        finally:
+            db.close()
+
+    def _save(self, key: str, url: str, entry: Dict):
+        db = SessionLocal()
+        try:
+            now = datetime.utcnow()
+            db.merge(models.GitHubCacheEntry(key=key, url=url, created_at=now, last_used_at=now, hit_count=0, **entry))
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            self._record_error("write", e)
+        finally:
+            db.close()
+
+    def _touch(self, key: str):
+        db = SessionLocal()
+        try:
+            db.query(models.GitHubCacheEntry).filter(models.GitHubCacheEntry.key == key).update({
+                models.GitHubCacheEntry.last_used_at: datetime.utcnow(),
+                models.GitHubCacheEntry.hit_count: models.GitHubCacheEntry.hit_count + 1,
+            }, synchronize_session=False)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            self._record_error("touch", e)
+        finally:
+            db.close()
+
+    def _record_error(self, operation: str, error: Exception):
+        with self._lock:
+            self._stats["errors"] += 1
+        print(f"⚠️ GitHub cache {operation} failed: {str(error)}")
+
+    def prune(self) -> int:
+        """Delete least recently used rows until the table is within its limits"""
+        db = SessionLocal()
+        try:
+            count, total_bytes = db.query(
+                func.count(models.GitHubCacheEntry.key),
+                func.coalesce(func.sum(models.GitHubCacheEntry.size_bytes), 0)
+            ).one()
+            if count <= self.max_entries and total_bytes <= self.max_bytes:
+                return 0
+
+            deleted = []
+            rows = db.query(models.GitHubCacheEntry.key, models.GitHubCacheEntry.size_bytes).order_by(
+                models.GitHubCacheEntry.last_used_at
+            ).all()
+            for key, size_bytes in rows:
+                if count <= self.max_entries and total_bytes <= self.max_bytes:
+                    break
+                deleted.append(key)
+                count -= 1
+                total_bytes -= size_bytes or 0
+
+            db.query(models.GitHubCacheEntry).filter(
+                models.GitHubCacheEntry.key.in_(deleted)
+            ).delete(synchronize_session=False)
+            db.commit()
+            with self._lock:
+                self._stats["evictions"] += len(deleted)
+            return len(deleted)
+        except Exception as e:
+            db.rollback()
+            self._record_error("prune", e)
+            return 0
+        finally:
+            db.close()
+
+    def clear(self):
+        """Drop the in-memory tier"""
+        with self._lock:
+            self._entries.clear()
+            self._memory_size = 0
+
+    def stats(self) -> Dict:
+        """Calls and bytes saved by 304s, plus tier sizes"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["memory_entries"] = len(self._entries)
+            stats["memory_bytes"] = self._memory_size
+        conditional = stats["conditional_requests"]
+        return {
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "persistent": self.persistent,
+            "calls_saved": stats["not_modified"],
+            "not_modified_rate": round(stats["not_modified"] / conditional, 3) if conditional else 0.0,
+            **stats
+        }
+
+
+github_cache = GitHubResponseCache(
+    max_entries=int(os.getenv("GITHUB_CACHE_MAX_ENTRIES", "5000")),
+    max_bytes=int(os.getenv("GITHUB_CACHE_MAX_BYTES", str(64 * 1024 * 1024))),
+    memory_bytes=int(os.getenv("GITHUB_CACHE_MEMORY_BYTES", str(16 * 1024 * 1024))),
+    persistent=os.getenv("GITHUB_CACHE_PERSIST", "true").lower() == "true",
+)
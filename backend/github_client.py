@@ -0,0 +1,259 @@
+# backend/github_client.py
+from datetime import datetime
+from typing import Dict, Iterator, Optional
+import os
+import random
+import threading
+import time
+
+import httpx
+
+DEFAULT_API_URL = "https://api.github.com"
+
+
+def parse_github_datetime(value: Optional[str]) -> Optional[datetime]:
+    """GitHub timestamps ("2024-05-01T12:00:00Z") as naive UTC datetimes"""
+    if not value:
+        return None
+    return datetime.fromisoformat(value.replace("Z", "+00:00")).replace(tzinfo=None)
+
+
+class GitHubAPIError(Exception):
+    """Non-retryable error response from the GitHub API"""
+
+    def __init__(self, status_code: int, message: str):
+        super().__init__(f"{status_code} {message}")
+        self.status_code = status_code
+        self.message = message
+
+
+class GitHubRateLimitError(GitHubAPIError):
+    """The token's primary rate limit is spent and resets too far off to wait for"""
+
+    def __init__(self, reset_at: float, message: str):
+        super().__init__(429, f"GitHub API rate limit exhausted, resets in {max(0, int(reset_at - time.time()))}s: {message}")
+        self.reset_at = reset_at
+
+
+class GitHubClient:
+    """Thread-safe GitHub REST/GraphQL client with secondary-rate-limit backoff.
+
+    The base URL comes from ``GITHUB_API_URL`` so the analyzer can be pointed
+    at GitHub Enterprise or a local fake server. When GitHub asks a request
+    to back off, every thread sharing the client waits out the same cooldown
+    instead of each one hammering the API on its own schedule.
+    """
+
+    def __init__(self, token: Optional[str] = None, base_url: Optional[str] = None,
+                 max_connections: int = 10, max_retries: int = 5, timeout: float = 20.0,
+                 transport: Optional[httpx.BaseTransport] = None, cache=None):
+        self.base_url = (base_url or os.getenv("GITHUB_API_URL", DEFAULT_API_URL)).rstrip("/")
+        # GitHub Enterprise serves GraphQL at /api/graphql rather than under the REST prefix
+        self.graphql_url = os.getenv("GITHUB_GRAPHQL_URL", f"{self.base_url}/graphql")
+        self.max_retries = max_retries
+        # Optional GitHubResponseCache for conditional GETs
+        self.cache = cache
+        # GitHub asks for at least a minute when a secondary limit has no Retry-After
+        self.backoff_seconds = float(os.getenv("GITHUB_BACKOFF_SECONDS", "60"))
+        self.max_wait_seconds = float(os.getenv("GITHUB_MAX_WAIT_SECONDS", "300"))
+        # An exhausted hourly quota is only waited out if it resets this soon
+        self.max_quota_wait_seconds = float(os.getenv("GITHUB_MAX_QUOTA_WAIT_SECONDS", "10"))
+
+        headers = {
+            "Accept": "application/vnd.github+json",
+            "X-GitHub-Api-Version": "2022-11-28",
+            "User-Agent": "reflog",
+        }
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+
+        self._http = httpx.Client(
+            base_url=self.base_url,
+            headers=headers,
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            transport=transport,
+        )
+        self._lock = threading.Lock()
+        self._cooldown_until = 0.0
+        # Epoch time the token's primary quota comes back, while it is spent
+        self._quota_reset_at = 0.0
+        self._stats = {"requests": 0, "retries": 0, "rate_limited": 0, "waited_seconds": 0.0}
+
+    def request(self, method: str, url: str, params: Optional[Dict] = None, json: Optional[Dict] = None) -> httpx.Response:
+        """Send a request, backing off on rate limits and transient 5xx errors.
+
+        With a cache, GETs are sent as conditional requests and a 304 comes
+        back as the cached 200. Once the token's primary quota is spent with
+        a reset further off than ``GITHUB_MAX_QUOTA_WAIT_SECONDS``, requests
+        raise ``GitHubRateLimitError`` until then instead of blocking.
+        """
+        request = self._http.build_request(method, url, params=params, json=json)
+        cache_key = entry = None
+        if self.cache is not None and method == "GET":
+            cache_key = self.cache.make_key(request.headers.get("authorization"), str(request.url))
+            entry = self.cache.lookup(cache_key)
+            request.headers.update(self.cache.conditional_headers(entry))
+
+        for attempt in range(self.max_retries + 1):
+            self._check_quota()
+            self._wait_for_cooldown()
+            response = self._http.send(request)
+            self._count("requests")
+
+            delay = self._retry_delay(response, attempt)
+            if delay is None or attempt == self.max_retries:
+                break
+            self._count("retries")
+            self._start_cooldown(delay)
+            print(f"⏳ GitHub {response.status_code} on {url}, retrying in {delay:.1f}s")
+
+        if response.status_code == 304 and entry:
+            self.cache.not_modified(cache_key, entry)
+            return httpx.Response(200, headers=entry["headers"], content=entry["body"].encode("utf-8"), request=request)
+        if response.status_code >= 400:
+            raise GitHubAPIError(response.status_code, self._error_message(response))
+        if cache_key and response.status_code == 200:
+            self.cache.store(cache_key, str(request.url), response.headers, response.text)
+        return response
+
+    def get_json(self, url: str, params: Optional[Dict] = None):
+        return self.request("GET", url, params=params).json()
+
+    def count(self, url: str, params: Optional[Dict] = None) -> int:
+        """Number of items in a paginated listing without downloading it.
+
+        With per_page=1 the page number of the ``Link: rel="last"`` URL is
+        the item count, so a single one-item page is fetched.
+        """
+        response = self.request("GET", url, params=dict(params or {}, per_page=1))
+        last_url = response.links.get("last", {}).get("url")
+        if last_url:
+            return int(httpx.URL(last_url).params["page"])
+        return len(response.json())
+
+    def graphql(self, query: str, variables: Optional[Dict] = None) -> Dict:
+        """Run a GraphQL query and return its ``data``"""
+        body = self.request("POST", self.graphql_url, json={"query": query, "variables": variables or {}}).json()
+        errors = body.get("errors")
+        if errors:
+            message = "; ".join(error.get("message", "") for error in errors)
+            # GraphQL reports these with a 200, so map them onto the REST statuses callers expect.
+            # RATE_LIMITED has already been retried by request() by the time it gets here.
+            types = self._graphql_error_types(body)
+            if "NOT_FOUND" in types:
+                raise GitHubAPIError(404, f"Not Found: {message}")
+            if "RATE_LIMITED" in types:
+                raise GitHubAPIError(403, message)
+            if not body.get("data"):
+                raise GitHubAPIError(502, message)
+            print(f"⚠️ GitHub GraphQL returned partial data: {message}")
+        return body["data"]
+
+    def paginate(self, url: str, params: Optional[Dict] = None, max_items: Optional[int] = None) -> Iterator[Dict]:
+        """Yield items across pages by following the ``Link: rel="next"`` header"""
+        params = dict(params or {})
+        params.setdefault("per_page", 100)
+        yielded = 0
+        next_url: Optional[str] = url
+        while next_url:
+            response = self.request("GET", next_url, params=params)
+            for item in response.json():
+                yield item
+                yielded += 1
+                if max_items is not None and yielded >= max_items:
+                    return
+            # The next link already carries the query string
+            next_url = response.links.get("next", {}).get("url")
+            params = None
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return dict(self._stats, waited_seconds=round(self._stats["waited_seconds"], 1))
+
+    def close(self):
+        self._http.close()
+
+    def _retry_delay(self, response: httpx.Response, attempt: int) -> Optional[float]:
+        """Seconds to wait before retrying, or None if the response is final.
+
+        Raises ``GitHubRateLimitError`` when the primary quota is spent and
+        doesn't reset soon; only secondary limits are backed off from.
+        """
+        status = response.status_code
+        if status >= 500:
+            return min(2 ** attempt + random.random(), self.max_wait_seconds)
+        if status == 200:
+            # GraphQL reports rate limiting as a 200 with a RATE_LIMITED error
+            if not self._graphql_rate_limited(response):
+                return None
+        elif status not in (403, 429):
+            return None
+
+        headers = response.headers
+        retry_after = headers.get("retry-after")
+        if retry_after is not None:
+            delay = float(retry_after)
+        elif headers.get("x-ratelimit-remaining") == "0" and headers.get("x-ratelimit-reset"):
+            reset_at = float(headers["x-ratelimit-reset"])
+            delay = reset_at - time.time() + 1
+            if delay > self.max_quota_wait_seconds:
+                # Waiting would hold this request, and every other user sharing the token, for up to an hour
+                self._count("rate_limited")
+                with self._lock:
+                    self._quota_reset_at = max(self._quota_reset_at, reset_at)
+                raise GitHubRateLimitError(reset_at, self._error_message(response))
+        elif status != 403 or "rate limit" in self._error_message(response).lower():
+            delay = self.backoff_seconds * 2 ** attempt
+        else:
+            # A plain 403 is a permissions problem, not something to wait out
+            return None
+
+        self._count("rate_limited")
+        return max(0.0, min(delay, self.max_wait_seconds))
+
+    @staticmethod
+    def _graphql_error_types(body) -> set:
+        if not isinstance(body, dict):
+            return set()
+        return {error.get("type") for error in body.get("errors") or ()}
+
+    def _graphql_rate_limited(self, response: httpx.Response) -> bool:
+        if response.request.method != "POST":
+            return False
+        try:
+            return "RATE_LIMITED" in self._graphql_error_types(response.json())
+        except ValueError:
+            return False
+
+    def _check_quota(self):
+        with self._lock:
+            reset_at = self._quota_reset_at
+        if time.time() < reset_at:
+            raise GitHubRateLimitError(reset_at, "skipped without calling GitHub")
+
+    def _start_cooldown(self, delay: float):
+        with self._lock:
+            self._cooldown_until = max(self._cooldown_until, time.monotonic() + delay)
+
+    def _wait_for_cooldown(self):
+        with self._lock:
+            remaining = self._cooldown_until - time.monotonic()
+        if remaining > 0:
+            with self._lock:
+                self._stats["waited_seconds"] += remaining
+            time.sleep(remaining)
+
+    def _count(self, key: str):
+        with self._lock:
+            self._stats[key] += 1
+
+    @staticmethod
+    def _error_message(response: httpx.Response) -> str:
+        try:
+            body = response.json()
+        except ValueError:
+            return response.text[:200] or response.reason_phrase
+        if isinstance(body, dict) and body.get("message"):
+            return body["message"]
+        return response.reason_phrase
@@ -0,0 +1,181 @@
+# backend/github_fixtures.py
+"""Record the GitHub API traffic of an analysis and replay it offline.
+
+    python github_fixtures.py record <username> <fixture.json> [--mode rest|graphql]
+    python github_fixtures.py replay [<fixture.json> ...]
+
+Recording needs GITHUB_TOKEN and calls the real API (or GITHUB_API_URL).
+Replay answers every request from the fixture and exits 1 if the result no
+longer matches the one recorded or the analysis made more API calls than
+its mode allows (see ``call_budget``). Without arguments it replays every
+fixture in fixtures/github. Only the response fields the client reads are
+stored, never the request headers, so fixtures don't contain the token.
+"""
+from collections import defaultdict, deque
+from datetime import datetime
+from typing import Dict, List
+import argparse
+import glob
+import json
+import math
+import os
+import sys
+import threading
+
+import httpx
+
+from github_integration import GitHubAnalyzer
+
+KEPT_HEADERS = ("content-type", "link", "etag", "last-modified", "retry-after",
+                "x-ratelimit-remaining", "x-ratelimit-reset")
+# These depend on today's date, so they drift between recording and replay
+DATE_DEPENDENT_FIELDS = ("active_repos", "started_not_finished", "patterns")
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "github")
+
+
+def call_budget(mode: str, total_repos: int) -> int:
+    """Most API calls an analysis of ``total_repos`` repos may make.
+
+    GraphQL needs one query per 100 repos. REST needs the profile, one
+    listing call per 100 repos and at most one commit count per repo.
+    """
+    pages = max(1, math.ceil(total_repos / 100))
+    if mode == "graphql":
+        return pages
+    return 1 + pages + total_repos
+
+
+def request_key(request: httpx.Request) -> str:
+    """Method, path, sorted query and JSON body; the host is ignored"""
+    query = "&".join(sorted(request.url.query.decode("ascii").split("&"))) if request.url.query else ""
+    key = f"{request.method} {request.url.path}?{query}"
+    if request.content:
+        key += " " + json.dumps(json.loads(request.content), sort_keys=True)
+    return key
+
+
+def _kept_headers(headers: httpx.Headers) -> Dict[str, str]:
+    return {name: value for name, value in headers.items() if name.lower() in KEPT_HEADERS}
+
+
+class RecordingTransport(httpx.BaseTransport):
+    """Passes requests through and keeps every exchange"""
+
+    def __init__(self, inner: httpx.BaseTransport = None):
+        self.inner = inner or httpx.HTTPTransport()
+        self.exchanges: List[Dict] = []
+        self._lock = threading.Lock()
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        response = self.inner.handle_request(request)
+        content = response.read()
+        headers = _kept_headers(response.headers)
+        with self._lock:
+            self.exchanges.append({
+                "key": request_key(request),
+                "status": response.status_code,
+                "headers": headers,
+                "body": content.decode("utf-8"),
+            })
+        # Body is already decoded, so don't hand back content-encoding
+        return httpx.Response(response.status_code, headers=headers, content=content, request=request)
+
+
+class ReplayTransport(httpx.BaseTransport):
+    """Serves recorded exchanges; repeated requests get recorded repeats in order"""
+
+    def __init__(self, exchanges: List[Dict]):
+        self._responses = defaultdict(deque)
+        for exchange in exchanges:
+            self._responses[exchange["key"]].append(exchange)
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        key = request_key(request)
+        with self._lock:
+            self.calls += 1
+            queue = self._responses.get(key)
+            if not queue:
+                raise KeyError(f"No recorded response for {key}")
+            exchange = queue.popleft() if len(queue) > 1 else queue[0]
+        return httpx.Response(
+            exchange["status"], headers=exchange["headers"],
+            content=exchange["body"].encode("utf-8"), request=request
+        )
+
+
+def record(username: str, path: str, mode: str) -> bool:
+    transport = RecordingTransport()
+    analyzer = GitHubAnalyzer(fetch_mode=mode, transport=transport, use_cache=False, incremental=False)
+    result = analyzer.analyze_user(username)
+    if "error" in result:
+        print(f"❌ {result['error']}")
+        return False
+
+    fixture = {
+        "username": username,
+        "mode": mode,
+        "recorded_at": datetime.utcnow().isoformat(),
+        "result": result,
+        "exchanges": transport.exchanges,
+    }
+    with open(path, "w") as f:
+        json.dump(fixture, f, indent=1)
+    print(f"✓ Recorded {len(transport.exchanges)} API calls for {username} ({mode}) to {path}")
+    return True
+
+
+def replay(path: str) -> bool:
+    with open(path) as f:
+        fixture = json.load(f)
+
+    transport = ReplayTransport(fixture["exchanges"])
+    analyzer = GitHubAnalyzer(
+        token="replay", fetch_mode=fixture["mode"], transport=transport, use_cache=False, incremental=False
+    )
+    result = analyzer.analyze_user(fixture["username"])
+    if "error" in result:
+        print(f"❌ {path}: {result['error']}")
+        return False
+
+    mismatched = [
+        field for field, expected in fixture["result"].items()
+        if field not in DATE_DEPENDENT_FIELDS and result.get(field) != expected
+    ]
+    budget = call_budget(fixture["mode"], result["total_repos"])
+    ok = not mismatched and transport.calls <= budget
+    print(f"{'✓' if ok else '❌'} {path}: {fixture['username']} ({fixture['mode']}) "
+          f"in {transport.calls} API calls (budget {budget})")
+    for field in mismatched:
+        print(f"   {field}: recorded {fixture['result'][field]!r}, replayed {result.get(field)!r}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    record_parser = commands.add_parser("record")
+    record_parser.add_argument("username")
+    record_parser.add_argument("fixture")
+    record_parser.add_argument("--mode", choices=("rest", "graphql"), default="graphql")
+
+    replay_parser = commands.add_parser("replay")
+    replay_parser.add_argument("fixtures", nargs="*")
+
+    args = parser.parse_args()
+    if args.command == "record":
+        ok = record(args.username, args.fixture, args.mode)
+    else:
+        paths = args.fixtures or sorted(glob.glob(os.path.join(FIXTURE_DIR, "*.json")))
+        if not paths:
+            print(f"❌ No fixtures in {FIXTURE_DIR}")
+            sys.exit(1)
+        ok = all([replay(path) for path in paths])
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
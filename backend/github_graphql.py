@@ -0,0 +1,97 @@
+# backend/github_graphql.py
+from datetime import datetime, timedelta
+from typing import Dict, List, Tuple
+
+from github_client import GitHubClient, parse_github_datetime
+
+# One page covers 100 repos with their commit totals, instead of 1 + N REST calls
+REPOSITORIES_QUERY = """
+query($login: String!, $cursor: String) {
+  user(login: $login) {
+    url
+    repositories(first: 100, after: $cursor, ownerAffiliations: OWNER) {
+      totalCount
+      pageInfo { hasNextPage endCursor }
+      nodes {
+        databaseId
+        name
+        nameWithOwner
+        isFork
+        diskUsage
+        createdAt
+        pushedAt
+        primaryLanguage { name }
+        defaultBranchRef {
+          target { ... on Commit { history { totalCount } } }
+        }
+      }
+    }
+  }
+}
+"""
+
+CONTRIBUTIONS_QUERY = """
+query($login: String!, $from: DateTime!, $to: DateTime!) {
+  user(login: $login) {
+    contributionsCollection(from: $from, to: $to) {
+      totalCommitContributions
+      commitContributionsByRepository(maxRepositories: 100) {
+        repository { nameWithOwner }
+      }
+    }
+  }
+}
+"""
+
+
+def _commit_total(node: Dict) -> int:
+    # Empty repos have no default branch
+    target = (node.get("defaultBranchRef") or {}).get("target") or {}
+    return (target.get("history") or {}).get("totalCount", 0)
+
+
+def _scan(node: Dict) -> Dict:
+    """A repository node in the same shape GitHubAnalyzer._scan_repo returns"""
+    return {
+        "id": node["databaseId"],
+        "name": node["name"],
+        "size": node["diskUsage"] or 0,
+        "language": (node.get("primaryLanguage") or {}).get("name"),
+        "created_at": parse_github_datetime(node["createdAt"]),
+        "pushed_at": parse_github_datetime(node.get("pushedAt")),
+        "commits": _commit_total(node),
+    }
+
+
+def fetch_repositories(client: GitHubClient, username: str) -> Tuple[str, int, List[Dict]]:
+    """Profile URL, total repo count (forks included) and scans of non-fork repos"""
+    scans = []
+    cursor = None
+    while True:
+        data = client.graphql(REPOSITORIES_QUERY, {"login": username, "cursor": cursor})
+        user = data["user"]
+        repositories = user["repositories"]
+        scans.extend(_scan(node) for node in repositories["nodes"] if not node["isFork"])
+
+        page_info = repositories["pageInfo"]
+        if not page_info["hasNextPage"]:
+            return user["url"], repositories["totalCount"], scans
+        cursor = page_info["endCursor"]
+
+
+def recent_activity(client: GitHubClient, username: str, days: int) -> Dict:
+    """Commit contributions over the last ``days`` in a single query"""
+    to = datetime.utcnow()
+    data = client.graphql(CONTRIBUTIONS_QUERY, {
+        "login": username,
+        "from": (to - timedelta(days=days)).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "to": to.strftime("%Y-%m-%dT%H:%M:%SZ"),
+    })
+    contributions = data["user"]["contributionsCollection"]
+    commit_count = contributions["totalCommitContributions"]
+    return {
+        "days": days,
+        "commits": commit_count,
+        "repos_touched": len(contributions["commitContributionsByRepository"]),
+        "active": commit_count > 0
+    }
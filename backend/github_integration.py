@@ -1,15 +1,71 @@
-from github import Github
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from collections import Counter
+from typing import Dict, List, Optional, Tuple
 import os
 from dotenv import load_dotenv
 
+from github_client import GitHubAPIError, GitHubClient, GitHubRateLimitError, parse_github_datetime
+import github_graphql
+
 load_dotenv()
 
+
+class GitHubAnalysisError(Exception):
+    """Raised when a GitHub profile can't be analyzed"""
+
+
+class GitHubUserNotFound(GitHubAnalysisError):
+    """Raised when the GitHub user doesn't exist"""
+
+
+class GitHubRateLimited(GitHubAnalysisError):
+    """Raised when the GitHub API quota is exhausted"""
+
+
+class GitHubNotConfigured(GitHubAnalysisError):
+    """Raised when no usable GitHub token is configured"""
+
+
+def analysis_error(github_username: str, message: str) -> GitHubAnalysisError:
+    """Turn the error string from GitHubAnalyzer.analyze_user into a domain error"""
+    # Rate limit first: the reset countdown in its message can contain "404"
+    if "rate limit" in message.lower():
+        return GitHubRateLimited("GitHub API rate limit exceeded. Please try again in a few minutes.")
+    if "404" in message or "not found" in message.lower():
+        return GitHubUserNotFound(f"GitHub user '{github_username}' not found. Please check the username and try again.")
+    if "token" in message.lower():
+        return GitHubNotConfigured("GitHub token not configured. Please contact support.")
+    return GitHubAnalysisError(f"Failed to analyze GitHub profile: {message}")
+
+
 class GitHubAnalyzer:
-    def __init__(self, token: str = None):
+    def __init__(self, token: str = None, base_url: str = None, max_workers: int = None,
+                 fetch_mode: str = None, transport=None, use_cache: bool = None, incremental: bool = None):
         self.token = token or os.getenv("GITHUB_TOKEN")
-        self.client = Github(self.token) if self.token else None
+        self.max_workers = max_workers or int(os.getenv("GITHUB_SCAN_CONCURRENCY", "8"))
+        # "rest" fans out one commits call per repo; "graphql" gets everything in a query per 100 repos
+        self.fetch_mode = (fetch_mode or os.getenv("GITHUB_FETCH_MODE", "rest")).lower()
+        if self.fetch_mode not in ("rest", "graphql"):
+            raise ValueError(f"Unknown GITHUB_FETCH_MODE: {self.fetch_mode}")
+        if use_cache is None:
+            use_cache = os.getenv("GITHUB_CACHE", "true").lower() == "true"
+        # Reuse per-repo snapshots for repos nothing was pushed to since the last run
+        if incremental is None:
+            incremental = os.getenv("GITHUB_INCREMENTAL", "true").lower() == "true"
+        self.incremental = incremental
+
+        cache = None
+        if use_cache:
+            # The cache and snapshots need a database, so they're only imported when enabled;
+            # fixture replay runs with both off
+            from github_cache import github_cache as cache
+        self.client = (
+            GitHubClient(self.token, base_url, max_connections=self.max_workers, transport=transport, cache=cache)
+            if self.token else None
+        )
+        # Shared by every analysis so concurrent requests stay within one bound
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="github-scan")
 
     def analyze_user(self, username: str) -> dict:
         """Analyze a GitHub user's repos and activity"""
@@ -17,60 +73,41 @@ class GitHubAnalyzer:
             return {"error": "GitHub token not configured"}
 
         try:
-            user = self.client.get_user(username)
-            repos = list(user.get_repos())
+            profile_url, total_repos, scans = self._fetch_repositories(username)
 
             # Time threshold for "active" repos
             three_months_ago = datetime.now() - timedelta(days=90)
+            six_months_ago = datetime.now() - timedelta(days=180)
 
             active_repos = []
             total_commits = 0
             languages = Counter()
             started_not_finished = []
 
-            for repo in repos:
-                if repo.fork:
-                    continue
-
-                # Check if repo is active
-                last_push = repo.pushed_at
-                # Ensure last_push is timezone-aware or make three_months_ago offset-naive
-                # Assuming repo.pushed_at is offset-naive UTC or comparing doesn't need timezone
-                is_active = last_push and last_push.replace(tzinfo=None) > three_months_ago if last_push.tzinfo else last_push and last_push > three_months_ago
-
+            for scan in scans:
+                last_push = scan["pushed_at"]
+                is_active = bool(last_push and last_push > three_months_ago)
 
                 if is_active:
-                    active_repos.append(repo.name)
-
-                # Count commits (handle potential exceptions more gracefully)
-                # Only count commits if the repo seems to have content
-                if repo.size > 0:
-                    try:
-                        # Fetch commits efficiently, maybe limit further if hitting rate limits
-                        commits = list(repo.get_commits().get_page(0)[:100]) # Get first page up to 100
-                        total_commits += len(commits)
-                    except Exception as commit_error:
-                         # Log this error if needed, but don't stop analysis
-                        print(f"!!! Warning: Could not fetch commits for repo {repo.name}: {commit_error}")
-                        pass # Continue analyzing other aspects
+                    active_repos.append(scan["name"])
+
+                total_commits += scan["commits"]
 
                 # Language stats
-                if repo.language:
-                    languages[repo.language] += 1
+                if scan["language"]:
+                    languages[scan["language"]] += 1
 
                 # Detect tutorial hell / unfinished projects
-                # Ensure created_at is timezone-aware or make comparison offset-naive
-                created_at_naive = repo.created_at.replace(tzinfo=None) if repo.created_at.tzinfo else repo.created_at
-                if repo.size > 0 and not is_active and created_at_naive > (datetime.now() - timedelta(days=180)):
+                if scan["size"] > 0 and not is_active and scan["created_at"] > six_months_ago:
                     started_not_finished.append({
-                        "name": repo.name,
-                        "started": repo.created_at.strftime("%Y-%m-%d"),
+                        "name": scan["name"],
+                        "started": scan["created_at"].strftime("%Y-%m-%d"),
                         "last_activity": last_push.strftime("%Y-%m-%d") if last_push else "Unknown"
                     })
 
             # Detect patterns
             patterns = self._detect_patterns(
-                total_repos=len(repos),
+                total_repos=total_repos,
                 active_repos=len(active_repos),
                 started_not_finished=len(started_not_finished),
                 languages=languages
@@ -78,21 +115,85 @@ class GitHubAnalyzer:
 
             return {
                 "username": username,
-                "total_repos": len(repos),
+                "total_repos": total_repos,
                 "active_repos": len(active_repos),
                 "total_commits": total_commits,
                 "languages": dict(languages.most_common(5)),
                 "started_not_finished": started_not_finished[:5], # Limit to 5 examples
                 "patterns": patterns,
-                "profile_url": user.html_url
+                "profile_url": profile_url
             }
 
         except Exception as e:
-            # --- DEBUGGING LINE ADDED HERE ---
             print(f"!!! GitHubAnalyzer Error: {type(e).__name__} - {str(e)}")
-            # Consider more specific exception handling (e.g., RateLimitExceededException, UnknownObjectException)
             return {"error": f"Failed to analyze GitHub user: {str(e)}"}
 
+    def _fetch_repositories(self, username: str) -> Tuple[str, int, List[Dict]]:
+        """Profile URL, total repo count (forks included) and scans of non-fork repos"""
+        snapshots = {}
+        if self.incremental:
+            import github_snapshots
+            snapshots = github_snapshots.load_snapshots(username)
+
+        if self.fetch_mode == "graphql":
+            # Commit totals come with the listing, so there is nothing to skip
+            profile_url, total_repos, scans = github_graphql.fetch_repositories(self.client, username)
+        else:
+            user = self.client.get_json(f"/users/{username}")
+            repos = list(self.client.paginate(f"/users/{username}/repos"))
+            owned = [repo for repo in repos if not repo["fork"]]
+
+            # Per-repo API calls fan out over the pool; map() keeps repo order
+            scans = list(self._executor.map(lambda repo: self._scan_repo(repo, snapshots.get(repo["id"])), owned))
+            profile_url, total_repos = user["html_url"], len(repos)
+
+            reused = sum(1 for scan in scans if scan["reused"])
+            if reused:
+                print(f"♻️ Reused {reused}/{len(scans)} repo snapshots for {username}")
+
+        if self.incremental:
+            github_snapshots.save_snapshots(username, scans, snapshots)
+        return profile_url, total_repos, scans
+
+    def _scan_repo(self, repo: Dict, snapshot: Optional[Dict] = None) -> Dict:
+        """Everything the analysis needs from one repo; runs on the scan pool.
+
+        The listing already has name, size and language; only the commit
+        count costs a call (a one-commit page), and it's taken from
+        ``snapshot`` when nothing was pushed since.
+        """
+        pushed_at = parse_github_datetime(repo.get("pushed_at"))
+        scan = {
+            "id": repo["id"],
+            "name": repo["name"],
+            "size": repo["size"],
+            "language": repo.get("language"),
+            "created_at": parse_github_datetime(repo["created_at"]),
+            "pushed_at": pushed_at,
+            "commits": 0,
+            "complete": True,
+            "reused": False,
+        }
+
+        # Nothing was pushed since the snapshot, so its commit count still holds
+        if snapshot is not None and pushed_at is not None and snapshot["pushed_at"] == pushed_at:
+            scan["commits"] = snapshot["commits"]
+            scan["reused"] = True
+        # Only count commits if the repo seems to have content
+        elif repo["size"] > 0:
+            try:
+                # Default-branch total from pagination metadata, not capped like a page download
+                scan["commits"] = self.client.count(f"/repos/{repo['full_name']}/commits")
+            except GitHubRateLimitError:
+                # Every remaining repo would fail the same way, so abort the analysis
+                raise
+            except Exception as commit_error:
+                # Empty repos answer 409; anything else is retried on the next run
+                scan["complete"] = isinstance(commit_error, GitHubAPIError) and commit_error.status_code == 409
+                if not scan["complete"]:
+                    print(f"!!! Warning: Could not fetch commits for repo {repo['name']}: {commit_error}")
+        return scan
+
     def _detect_patterns(self, total_repos, active_repos, started_not_finished, languages):
         """Detect behavioral patterns from GitHub data"""
         patterns = []
@@ -155,36 +256,27 @@ class GitHubAnalyzer:
             return {"error": "GitHub token not configured"}
 
         try:
-            user = self.client.get_user(username)
-            since = datetime.now() - timedelta(days=days)
+            if self.fetch_mode == "graphql":
+                return github_graphql.recent_activity(self.client, username, days)
 
-            # PyGithub returns a PaginatedList, which is iterable
-            events = user.get_events()
+            since = datetime.utcnow() - timedelta(days=days)
             commit_count = 0
             repos_touched = set()
 
-            # Iterate safely, GitHub API might limit event history
-            event_count = 0
-            max_events_to_check = 300 # Limit how many events we check to avoid excessive API calls
-
-            for event in events:
-                event_count += 1
-                if event_count > max_events_to_check:
-                    print(f"!!! Warning: Hit max event check limit ({max_events_to_check}) for recent activity.")
-                    break
+            # Limit how many events we check to avoid excessive API calls
+            max_events_to_check = 300
 
-                # Ensure event.created_at is offset-naive for comparison or make 'since' offset-aware
-                created_at_naive = event.created_at.replace(tzinfo=None) if event.created_at.tzinfo else event.created_at
-                if created_at_naive < since:
-                    break # Events are usually ordered newest first
+            for event in self.client.paginate(f"/users/{username}/events", max_items=max_events_to_check):
+                created_at = parse_github_datetime(event["created_at"])
+                if created_at < since:
+                    break # Events are ordered newest first
 
-                if event.type == "PushEvent" and event.payload and 'commits' in event.payload:
-                    # Check if commits list is not None and is iterable
-                    commits_payload = event.payload.get("commits")
+                if event["type"] == "PushEvent":
+                    commits_payload = (event.get("payload") or {}).get("commits")
                     if commits_payload:
-                         commit_count += len(commits_payload)
-                    if event.repo: # Ensure repo information is present
-                        repos_touched.add(event.repo.name)
+                        commit_count += len(commits_payload)
+                    if event.get("repo"):
+                        repos_touched.add(event["repo"]["name"])
 
             return {
                 "days": days,
@@ -193,6 +285,5 @@ class GitHubAnalyzer:
                 "active": commit_count > 0
             }
         except Exception as e:
-             # --- ADDED DEBUGGING HERE TOO ---
             print(f"!!! GitHubAnalyzer get_recent_activity Error: {type(e).__name__} - {str(e)}")
             return {"error": f"Failed to get recent activity: {str(e)}"}
\ No newline at end of file
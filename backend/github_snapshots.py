@@ -0,0 +1,76 @@
+# backend/github_snapshots.py
+from datetime import datetime
+from typing import Dict, List
+
+from database import SessionLocal
+import models
+
+# Scan fields mirrored in a snapshot row, as (scan key, column)
+_FIELDS = (
+    ("name", "name"), ("pushed_at", "pushed_at"), ("created_at", "created_at"),
+    ("size", "size"), ("language", "language"), ("commits", "commit_count"),
+)
+
+
+def load_snapshots(username: str) -> Dict[int, Dict]:
+    """Last stored scan of each of a user's repos, by GitHub repo id"""
+    db = SessionLocal()
+    try:
+        rows = db.query(models.GitHubRepoSnapshot).filter(
+            models.GitHubRepoSnapshot.username == username
+        ).all()
+        return {
+            row.repo_id: {"id": row.repo_id, **{key: getattr(row, column) for key, column in _FIELDS}}
+            for row in rows
+        }
+    except Exception as e:
+        print(f"⚠️ Could not load repo snapshots for {username}: {str(e)}")
+        return {}
+    finally:
+        db.close()
+
+
+def save_snapshots(username: str, scans: List[Dict], previous: Dict[int, Dict]) -> int:
+    """Write scans that differ from ``previous`` and drop repos that are gone.
+
+    Scans marked incomplete (their commit count failed to load) leave the
+    old snapshot in place. Returns the number of rows written.
+    """
+    current_ids = {scan["id"] for scan in scans}
+    changed = [
+        scan for scan in scans
+        if scan.get("complete", True) and any(
+            scan[key] != (previous.get(scan["id"]) or {}).get(key, object()) for key, _ in _FIELDS
+        )
+    ]
+    gone = [repo_id for repo_id in previous if repo_id not in current_ids]
+    stale_ids = gone + [scan["id"] for scan in changed if scan["id"] in previous]
+    if not changed and not stale_ids:
+        return 0
+
+    db = SessionLocal()
+    try:
+        if stale_ids:
+            db.query(models.GitHubRepoSnapshot).filter(
+                models.GitHubRepoSnapshot.username == username,
+                models.GitHubRepoSnapshot.repo_id.in_(stale_ids)
+            ).delete(synchronize_session=False)
+
+        now = datetime.utcnow()
+        db.add_all([
+            models.GitHubRepoSnapshot(
+                username=username,
+                repo_id=scan["id"],
+                updated_at=now,
+                **{column: scan[key] for key, column in _FIELDS}
+            )
+            for scan in changed
+        ])
+        db.commit()
+        return len(changed)
+    except Exception as e:
+        db.rollback()
+        print(f"⚠️ Could not save repo snapshots for {username}: {str(e)}")
+        return 0
+    finally:
+        db.close()
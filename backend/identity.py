@@ -0,0 +1,95 @@
+# backend/identity.py
+from collections import OrderedDict
+from typing import Optional
+import os
+import threading
+
+from fastapi import Depends, HTTPException
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from database import get_db, get_async_db
+import models
+
+
+class UserIdCache:
+    """Small LRU of github_username -> users.id.
+
+    Only found users are cached, so a username that doesn't exist yet
+    is looked up again on every request until it's created.
+    """
+
+    def __init__(self, max_size: int = 10000):
+        self.max_size = max_size
+        self._ids: "OrderedDict[str, int]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, github_username: str) -> Optional[int]:
+        with self._lock:
+            user_id = self._ids.get(github_username)
+            if user_id is None:
+                self.misses += 1
+                return None
+            self._ids.move_to_end(github_username)
+            self.hits += 1
+            return user_id
+
+    def set(self, github_username: str, user_id: int):
+        with self._lock:
+            self._ids[github_username] = user_id
+            self._ids.move_to_end(github_username)
+            if len(self._ids) > self.max_size:
+                self._ids.popitem(last=False)
+
+    def invalidate(self, github_username: str):
+        with self._lock:
+            self._ids.pop(github_username, None)
+
+    def stats(self):
+        with self._lock:
+            return {"size": len(self._ids), "max_size": self.max_size, "hits": self.hits, "misses": self.misses}
+
+
+user_ids = UserIdCache(max_size=int(os.getenv("USER_ID_CACHE_SIZE", "10000")))
+
+
+def resolve_user_id(db: Session, github_username: str) -> Optional[int]:
+    """users.id for a username, from the cache when possible"""
+    user_id = user_ids.get(github_username)
+    if user_id is None:
+        user_id = db.query(models.User.id).filter(
+            models.User.github_username == github_username
+        ).scalar()
+        if user_id is not None:
+            user_ids.set(github_username, user_id)
+    return user_id
+
+
+async def resolve_user_id_async(db: AsyncSession, github_username: str) -> Optional[int]:
+    user_id = user_ids.get(github_username)
+    if user_id is None:
+        user_id = (await db.execute(
+            select(models.User.id).filter(models.User.github_username == github_username)
+        )).scalar()
+        if user_id is not None:
+            user_ids.set(github_username, user_id)
+    return user_id
+
+
+def get_user_id(github_username: str, db: Session = Depends(get_db)) -> int:
+    """Dependency: the path's github_username as a user id, or 404"""
+    user_id = resolve_user_id(db, github_username)
+    if user_id is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    return user_id
+
+
+async def get_user_id_async(github_username: str, db: AsyncSession = Depends(get_async_db)) -> int:
+    """Dependency for async endpoints: the path's github_username as a user id, or 404"""
+    user_id = await resolve_user_id_async(db, github_username)
+    if user_id is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    return user_id
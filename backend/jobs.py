@@ -0,0 +1,237 @@
+# backend/jobs.py
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Optional
+import asyncio
+import functools
+import os
+import threading
+import traceback
+import uuid
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import and_, func as sql_func, or_
+from sqlalchemy.orm import Session
+
+from database import SessionLocal
+import models
+
+
+class JobQueueFull(Exception):
+    """Raised when the job queue has no room for another pending job"""
+
+
+class CrewPoolBusy(Exception):
+    """Raised when too many requests are already waiting for an endpoint's crew slots"""
+
+
+class JobQueue:
+    """Bounded worker pool for long-running crew kickoffs.
+
+    Each job runs with its own database session so request handlers can
+    return a job id immediately instead of holding a worker and a pooled
+    connection for the whole multi-agent run. Job state lives in the
+    ``crew_jobs`` table, so a poll can be answered by any worker process;
+    ``max_pending`` bounds this process's own pool.
+    """
+
+    # Unfinished jobs this old were lost with a worker process that died
+    ABANDONED_AFTER = timedelta(hours=6)
+
+    def __init__(self, max_workers: int = 4, max_pending: int = 100, result_ttl_seconds: int = 3600):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.result_ttl = timedelta(seconds=result_ttl_seconds)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="crew-job")
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def submit(self, job_type: str, func: Callable, *args, user_id: Optional[int] = None, **kwargs) -> str:
+        """Enqueue ``func(db, *args, **kwargs)`` and return the job id"""
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise JobQueueFull(f"{self._pending} jobs already pending")
+            self._pending += 1
+
+        job_id = uuid.uuid4().hex
+        db = SessionLocal()
+        try:
+            self._prune(db)
+            db.add(models.CrewJob(id=job_id, job_type=job_type, user_id=user_id, status="queued"))
+            db.commit()
+        except Exception:
+            db.rollback()
+            self._release()
+            raise
+        finally:
+            db.close()
+
+        self._executor.submit(self._run, job_id, func, args, kwargs)
+        return job_id
+
+    def _run(self, job_id: str, func: Callable, args: tuple, kwargs: dict):
+        db = SessionLocal()
+        try:
+            self._update(job_id, status="running", started_at=datetime.utcnow())
+            result = func(db, *args, **kwargs)
+            self._update(job_id, status="completed", result=jsonable_encoder(result), finished_at=datetime.utcnow())
+        except Exception as e:
+            db.rollback()
+            print(f"❌ Job {job_id} failed: {str(e)}")
+            traceback.print_exc()
+            self._update(job_id, status="failed", error=str(e), finished_at=datetime.utcnow())
+        finally:
+            db.close()
+            self._release()
+
+    def _release(self):
+        with self._lock:
+            self._pending -= 1
+
+    def _update(self, job_id: str, **fields):
+        db = SessionLocal()
+        try:
+            db.query(models.CrewJob).filter(models.CrewJob.id == job_id).update(fields, synchronize_session=False)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            print(f"⚠️ Could not update job {job_id}: {str(e)}")
+        finally:
+            db.close()
+
+    def _prune(self, db: Session):
+        """Drop finished jobs older than the result TTL and abandoned ones; the caller commits"""
+        now = datetime.utcnow()
+        db.query(models.CrewJob).filter(or_(
+            models.CrewJob.finished_at < now - self.result_ttl,
+            and_(models.CrewJob.finished_at == None, models.CrewJob.created_at < now - self.ABANDONED_AFTER)
+        )).delete(synchronize_session=False)
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        """Get a snapshot of a job's state"""
+        db = SessionLocal()
+        try:
+            job = db.query(models.CrewJob).filter(models.CrewJob.id == job_id).first()
+        finally:
+            db.close()
+        if not job:
+            return None
+        return {
+            "id": job.id,
+            "type": job.job_type,
+            "user_id": job.user_id,
+            "status": job.status,
+            "result": job.result,
+            "error": job.error,
+            "created_at": job.created_at,
+            "started_at": job.started_at,
+            "finished_at": job.finished_at,
+        }
+
+    def stats(self) -> Dict:
+        """Counts of jobs by status across all workers, and this process's backlog"""
+        db = SessionLocal()
+        try:
+            rows = db.query(models.CrewJob.status, sql_func.count()).group_by(models.CrewJob.status).all()
+        finally:
+            db.close()
+        counts = {"queued": 0, "running": 0, "completed": 0, "failed": 0}
+        counts.update(dict(rows))
+        with self._lock:
+            pending = self._pending
+        return {
+            "max_workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "pending_in_process": pending,
+            **counts
+        }
+
+
+job_queue = JobQueue(
+    max_workers=int(os.getenv("CREW_JOB_WORKERS", "4")),
+    max_pending=int(os.getenv("CREW_JOB_MAX_PENDING", "100")),
+)
+
+
+class CrewThreadPool:
+    """Dedicated thread pool for synchronous crew work called from async endpoints.
+
+    Kept separate from FastAPI's default threadpool so long multi-agent runs
+    can't starve ordinary sync endpoints. Each endpoint gets its own
+    concurrency cap; callers beyond the cap wait on the event loop (not in
+    a thread) and are rejected once the wait queue is full.
+    """
+
+    def __init__(self, max_workers: int = 8, endpoint_limits: Optional[Dict[str, int]] = None,
+                 default_limit: int = 2, max_waiting: int = 20):
+        self.max_workers = max_workers
+        self.endpoint_limits = endpoint_limits or {}
+        self.default_limit = default_limit
+        self.max_waiting = max_waiting
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="crew-sync")
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+
+        # Only touched from the event loop thread
+        self._waiting = defaultdict(int)
+        self._running = defaultdict(int)
+        self._completed = defaultdict(int)
+        self._rejected = defaultdict(int)
+
+    def _limit(self, endpoint: str) -> int:
+        return self.endpoint_limits.get(endpoint, self.default_limit)
+
+    def _semaphore(self, endpoint: str) -> asyncio.Semaphore:
+        if endpoint not in self._semaphores:
+            self._semaphores[endpoint] = asyncio.Semaphore(self._limit(endpoint))
+        return self._semaphores[endpoint]
+
+    async def run(self, endpoint: str, func: Callable, *args, **kwargs):
+        """Run ``func`` on the crew pool once a slot for ``endpoint`` is free"""
+        if self._waiting[endpoint] >= self.max_waiting:
+            self._rejected[endpoint] += 1
+            raise CrewPoolBusy(f"{self._waiting[endpoint]} requests already waiting for {endpoint}")
+
+        semaphore = self._semaphore(endpoint)
+        self._waiting[endpoint] += 1
+        try:
+            await semaphore.acquire()
+        finally:
+            self._waiting[endpoint] -= 1
+
+        self._running[endpoint] += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+        finally:
+            self._running[endpoint] -= 1
+            self._completed[endpoint] += 1
+            semaphore.release()
+
+    def stats(self) -> Dict:
+        """Queue depth and throughput per endpoint"""
+        endpoints = set(self.endpoint_limits) | set(self._waiting) | set(self._running) | set(self._completed)
+        return {
+            "max_workers": self.max_workers,
+            "endpoints": {
+                endpoint: {
+                    "limit": self._limit(endpoint),
+                    "running": self._running[endpoint],
+                    "waiting": self._waiting[endpoint],
+                    "completed": self._completed[endpoint],
+                    "rejected": self._rejected[endpoint]
+                }
+                for endpoint in sorted(endpoints)
+            }
+        }
+
+
+crew_pool = CrewThreadPool(
+    max_workers=int(os.getenv("CREW_POOL_WORKERS", "8")),
+    endpoint_limits={
+        "chat": int(os.getenv("CREW_POOL_CHAT_LIMIT", "4")),
+        "goals": int(os.getenv("CREW_POOL_GOALS_LIMIT", "2")),
+        "action_plans": int(os.getenv("CREW_POOL_ACTION_PLANS_LIMIT", "2")),
+    },
+    max_waiting=int(os.getenv("CREW_POOL_MAX_WAITING", "20")),
+)
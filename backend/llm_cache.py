@@ -0,0 +1,193 @@
+# backend/llm_cache.py
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple, Union
+import hashlib
+import json
+import os
+import re
+import threading
+
+from database import SessionLocal
+import models
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def _normalize_text(text) -> str:
+    """Collapse whitespace so formatting-only prompt changes share a key"""
+    return _WHITESPACE.sub(" ", str(text or "")).strip()
+
+
+class LLMResponseCache:
+    """Two-tier cache for LLM completions.
+
+    Entries are keyed by agent role + model settings + a hash of the
+    normalized prompt messages. The user's history is rendered into the
+    prompt, so a key only repeats when the underlying data is unchanged.
+    Hot entries live in an in-memory LRU; every entry is also written to
+    the ``llm_response_cache`` table so hits survive restarts and are
+    shared between workers.
+    """
+
+    def __init__(self, max_entries: int = 500, ttl_seconds: int = 86400, persistent: bool = True):
+        self.max_entries = max_entries
+        self.ttl = timedelta(seconds=ttl_seconds)
+        self.persistent = persistent
+        self._entries: "OrderedDict[str, Tuple[str, datetime]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"memory_hits": 0, "persistent_hits": 0, "misses": 0, "stores": 0, "evictions": 0, "errors": 0}
+
+    @staticmethod
+    def make_key(role: str, model: str, temperature, messages: Union[str, List[Dict]]) -> str:
+        """Canonical key for a prompt: role, model settings and normalized messages"""
+        if isinstance(messages, str):
+            messages = [{"role": "user", "content": messages}]
+
+        payload = {
+            "role": _normalize_text(role),
+            "model": model,
+            "temperature": temperature,
+            "messages": [
+                [m.get("role"), _normalize_text(m.get("content"))]
+                for m in messages
+            ],
+        }
+        canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Cached response for ``key``, checking memory before the database"""
+        now = datetime.utcnow()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[1] > now:
+                self._entries.move_to_end(key)
+                self._stats["memory_hits"] += 1
+                return entry[0]
+            if entry:
+                del self._entries[key]
+
+        response = self._load(key, now) if self.persistent else None
+
+        with self._lock:
+            if response is None:
+                self._stats["misses"] += 1
+                return None
+            self._stats["persistent_hits"] += 1
+
+        self._remember(key, response, now + self.ttl)
+        return response
+
+    def set(self, key: str, role: str, response: str):
+        """Store a response in both tiers"""
+        expires_at = datetime.utcnow() + self.ttl
+        self._remember(key, response, expires_at)
+        with self._lock:
+            self._stats["stores"] += 1
+        if self.persistent:
+            self._save(key, role, response, expires_at)
+
+    def _remember(self, key: str, response: str, expires_at: datetime):
+        with self._lock:
+            self._entries[key] = (response, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def _load(self, key: str, now: datetime) -> Optional[str]:
+        db = SessionLocal()
+        try:
+            row = db.query(models.LLMCacheEntry).filter(models.LLMCacheEntry.key == key).first()
+            if not row:
+                return None
+            if row.expires_at <= now:
+                db.delete(row)
+                db.commit()
+                return None
+            row.hit_count = (row.hit_count or 0) + 1
+            db.commit()
+            return row.response
+        except Exception as e:
+            db.rollback()
+            self._record_error("read", e)
+            return None
+        finally:
+            db.close()
+
+    def _save(self, key: str, role: str, response: str, expires_at: datetime):
+        db = SessionLocal()
+        try:
+            db.merge(models.LLMCacheEntry(
+                key=key,
+                agent_role=role,
+                response=response,
+                created_at=datetime.utcnow(),
+                expires_at=expires_at,
+                hit_count=0
+            ))
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            self._record_error("write", e)
+        finally:
+            db.close()
+
+    def _record_error(self, operation: str, error: Exception):
+        with self._lock:
+            self._stats["errors"] += 1
+        print(f"⚠️ LLM cache {operation} failed: {str(error)}")
+
+    def purge_expired(self) -> int:
+        """Delete expired rows from the persistent tier"""
+        now = datetime.utcnow()
+        with self._lock:
+            for key in [k for k, (_, expires_at) in self._entries.items() if expires_at <= now]:
+                del self._entries[key]
+
+        if not self.persistent:
+            return 0
+
+        db = SessionLocal()
+        try:
+            deleted = db.query(models.LLMCacheEntry).filter(
+                models.LLMCacheEntry.expires_at <= now
+            ).delete(synchronize_session=False)
+            db.commit()
+            return deleted
+        except Exception as e:
+            db.rollback()
+            self._record_error("purge", e)
+            return 0
+        finally:
+            db.close()
+
+    def clear(self):
+        """Drop the in-memory tier"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        """Hit/miss counters and memory tier size"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["size"] = len(self._entries)
+        hits = stats["memory_hits"] + stats["persistent_hits"]
+        lookups = hits + stats["misses"]
+        return {
+            "max_entries": self.max_entries,
+            "ttl_seconds": int(self.ttl.total_seconds()),
+            "persistent": self.persistent,
+            "hits": hits,
+            "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+            **stats
+        }
+
+
+llm_cache = LLMResponseCache(
+    max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", "500")),
+    ttl_seconds=int(os.getenv("LLM_CACHE_TTL_SECONDS", "86400")),
+    persistent=os.getenv("LLM_CACHE_PERSIST", "true").lower() == "true",
+)
+
@@ -1,10 +1,14 @@
-from fastapi import FastAPI, Depends, HTTPException, Request, Header
+from fastapi import FastAPI, Depends, HTTPException, Request, Header, Response
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy import select, func
-from sqlalchemy.orm import Session, joinedload, selectinload
+from fastapi.responses import JSONResponse, StreamingResponse
+from sqlalchemy import select, func, true
+from sqlalchemy.orm import Session, joinedload, selectinload, load_only, undefer_group
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Dict, Optional
 import models
-from database import engine, get_db, init_db
+from database import engine, get_db, get_async_db, init_db, SessionLocal, AsyncSessionLocal
+import ai_stack
+from ai_stack import github_analyzer, sage_crew, action_plan_service, insights_engine
 from models import (
     UserCreate, UserResponse, CheckInCreate, CheckInUpdate, CheckInResponse,
     AgentAdviceResponse, GitHubAnalysisResponse, ChatMessage,
@@ -13,20 +17,32 @@ from models import (
     ActionPlanCreate, ActionPlanResponse, SkillFocusCreate,
     DailyTaskUpdate, SkillReminderResponse, SkillReminderCreate,
 )
-from github_integration import GitHubAnalyzer
-from crew import SageMentorCrew
 from datetime import datetime, timedelta
 from pydantic import BaseModel
 from datetime import datetime, timedelta, time
 from typing import Optional
+import asyncio
+import json
 from notification_service import NotificationService
-from action_plan_service import ActionPlanService
-from cache import cache, cached, cache_dashboard, get_cached_dashboard, invalidate_user_cache
-
-init_db()
+from cache import (
+    cache, cached, cached_stats, invalidate_tags, invalidate_user_cache,
+    invalidate_goal_cache, invalidate_plan_cache, user_tag, goals_tag, goal_tag, plan_tag
+)
+from jobs import job_queue, JobQueueFull, crew_pool, CrewPoolBusy
+from github_integration import (
+    analysis_error, GitHubAnalysisError, GitHubNotConfigured, GitHubRateLimited, GitHubUserNotFound
+)
+from llm_cache import llm_cache
+from github_cache import github_cache
+from identity import get_user_id, get_user_id_async, resolve_user_id, resolve_user_id_async, user_ids
+from middleware import cache_response, cache_response_stats, rate_limit_middleware
+from pagination import keyset, next_page, NEXT_CURSOR_HEADER
 
 app = FastAPI(title="Reflog AI Mentor API", version="1.0.0")
 
+# Registered before CORS so CORS stays outermost and 429s carry its headers
+app.middleware("http")(rate_limit_middleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=[
@@ -37,11 +53,56 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-RateLimit-Limit", "X-RateLimit-Remaining", "X-RateLimit-Reset", "Retry-After", NEXT_CURSOR_HEADER],
 )
 
-github_analyzer = GitHubAnalyzer()
-sage_crew = SageMentorCrew()
-action_plan_service = ActionPlanService()
+# The AI stack (github_analyzer, sage_crew, ...) is built lazily; warm it up off the request path
+@app.on_event("startup")
+def warm_up_ai_stack():
+    ai_stack.start_warm_up()
+
+
+def enqueue_crew_job(job_type: str, func, *args, user_id: int, github_username: str) -> JSONResponse:
+    """Queue a crew run on the job workers and return 202 with the job id.
+
+    The job is owned by ``user_id``; only that user's status URL can read it.
+    """
+    try:
+        job_id = job_queue.submit(job_type, func, *args, user_id=user_id)
+    except JobQueueFull:
+        raise HTTPException(
+            status_code=503,
+            detail="AI workers are busy. Please try again shortly.",
+            headers={"Retry-After": "30"}
+        )
+    
+    return JSONResponse(
+        status_code=202,
+        content={"job_id": job_id, "status": "queued", "status_url": f"/jobs/{github_username}/{job_id}"}
+    )
+
+
+async def run_on_crew_pool(endpoint: str, func, *args):
+    """Run a synchronous crew handler on the dedicated crew pool.
+
+    The handler gets its own session as its last argument; the request-scoped
+    one from get_db must not be shared with a pool thread.
+    """
+    def run_with_session():
+        db = SessionLocal()
+        try:
+            return func(*args, db)
+        finally:
+            db.close()
+    
+    try:
+        return await crew_pool.run(endpoint, run_with_session)
+    except CrewPoolBusy:
+        raise HTTPException(
+            status_code=503,
+            detail="Too many AI requests in progress. Please try again shortly.",
+            headers={"Retry-After": "10"}
+        )
 
 @app.get("/")
 def read_root():
@@ -51,6 +112,51 @@ def read_root():
         "status": "running"
     }
 
+
+@app.get("/metrics/workers")
+def get_worker_metrics():
+    """Queue depth and concurrency for the AI job queue and crew pool, and AI stack readiness"""
+    return {
+        "jobs": job_queue.stats(),
+        "crew_pool": crew_pool.stats(),
+        "ai_stack": ai_stack.stats()
+    }
+
+
+@app.get("/metrics/llm-cache")
+def get_llm_cache_metrics():
+    """Hit/miss counters for the LLM response cache"""
+    return llm_cache.stats()
+
+
+@app.get("/metrics/github-cache")
+def get_github_cache_metrics():
+    """API calls and bytes saved by conditional GitHub requests"""
+    return github_cache.stats()
+
+
+@app.get("/metrics/cache")
+def get_cache_metrics():
+    """Size and hit/miss counters for the response cache backend"""
+    return {
+        **cache.stats(),
+        "decorator": cached_stats(),
+        "endpoints": cache_response_stats(),
+        "user_ids": user_ids.stats()
+    }
+
+
+@app.get("/jobs/{github_username}/{job_id}")
+def get_job(job_id: str, user_id: int = Depends(get_user_id)):
+    """Poll the status of one of a user's background AI jobs"""
+    job = job_queue.get(job_id)
+    
+    # Someone else's job looks the same as a missing one
+    if not job or job["user_id"] != user_id:
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+    
+    return job
+
 @app.post("/users", response_model=UserResponse)
 def create_user(user: UserCreate, db: Session = Depends(get_db)):
     """
@@ -82,6 +188,7 @@ def create_user(user: UserCreate, db: Session = Depends(get_db)):
     db.add(new_user)
     db.commit()
     db.refresh(new_user)
+    user_ids.invalidate(user.github_username)
     
     print(f"✅ Created new user: {user.github_username}")
     return new_user
@@ -120,54 +227,50 @@ def complete_onboarding(github_username: str, db: Session = Depends(get_db)):
     return {"message": "Onboarding completed", "user": user}
 
 
+ANALYSIS_ERROR_STATUS = {
+    GitHubUserNotFound: 404,
+    GitHubRateLimited: 429,
+    GitHubNotConfigured: 500,
+}
+
+
 # Also improve the analyze-github endpoint error handling
 @app.post("/analyze-github/{github_username}")
-def analyze_github(github_username: str, db: Session = Depends(get_db)):
+def analyze_github(github_username: str, background: bool = False, db: Session = Depends(get_db)):
     """Analyze GitHub profile and store results"""
     
     # Get or create user
-    user = db.query(models.User).filter(
-        models.User.github_username == github_username
-    ).first()
+    user_id = resolve_user_id(db, github_username)
     
-    if not user:
+    if user_id is None:
         raise HTTPException(
             status_code=404, 
             detail="User not found. Please create user first via /users endpoint."
         )
     
+    if background:
+        return enqueue_crew_job("analyze_github", run_github_analysis, user_id, github_username, user_id=user_id, github_username=github_username)
+    
+    try:
+        return run_github_analysis(db, user_id, github_username)
+    except GitHubAnalysisError as e:
+        status_code = ANALYSIS_ERROR_STATUS.get(type(e), 400)
+        raise HTTPException(status_code=status_code, detail=str(e))
+
+
+def run_github_analysis(db: Session, user_id: int, github_username: str) -> Dict:
+    """Fetch GitHub data, run the crew and store the results"""
+    
     # Analyze GitHub
     github_data = github_analyzer.analyze_user(github_username)
     
     # Check for errors from GitHub API
     if "error" in github_data:
-        error_msg = github_data["error"]
-        
-        # Provide helpful error messages
-        if "404" in error_msg or "not found" in error_msg.lower():
-            raise HTTPException(
-                status_code=404, 
-                detail=f"GitHub user '{github_username}' not found. Please check the username and try again."
-            )
-        elif "rate limit" in error_msg.lower():
-            raise HTTPException(
-                status_code=429, 
-                detail="GitHub API rate limit exceeded. Please try again in a few minutes."
-            )
-        elif "token" in error_msg.lower():
-            raise HTTPException(
-                status_code=500, 
-                detail="GitHub token not configured. Please contact support."
-            )
-        else:
-            raise HTTPException(
-                status_code=400, 
-                detail=f"Failed to analyze GitHub profile: {error_msg}"
-            )
+        raise analysis_error(github_username, github_data["error"])
     
     # Store analysis in database
     analysis = models.GitHubAnalysis(
-        user_id=user.id,
+        user_id=user_id,
         username=github_username,
         total_repos=github_data["total_repos"],
         active_repos=github_data["active_repos"],
@@ -179,8 +282,10 @@ def analyze_github(github_username: str, db: Session = Depends(get_db)):
     db.commit()
     
     # Get recent check-ins for context
-    recent_checkins = db.query(models.CheckIn).filter(
-        models.CheckIn.user_id == user.id
+    recent_checkins = db.query(models.CheckIn).options(
+        load_only(models.CheckIn.timestamp, models.CheckIn.energy_level, models.CheckIn.commitment, models.CheckIn.shipped)
+    ).filter(
+        models.CheckIn.user_id == user_id
     ).order_by(models.CheckIn.timestamp.desc()).limit(7).all()
     
     checkin_history = [
@@ -198,7 +303,7 @@ def analyze_github(github_username: str, db: Session = Depends(get_db)):
     
     # Store AI insights
     advice = models.AgentAdvice(
-        user_id=user.id,
+        user_id=user_id,
         agent_name="Multi-Agent Analysis",
         advice=crew_result["agent_insights"]["full_analysis"],
         evidence=github_data,
@@ -207,9 +312,11 @@ def analyze_github(github_username: str, db: Session = Depends(get_db)):
     db.add(advice)
     
     # Mark onboarding as complete
-    user.onboarding_complete = True
+    db.query(models.User).filter(models.User.id == user_id).update({"onboarding_complete": True})
     db.commit()
     
+    invalidate_user_cache(github_username)
+    
     print(f"✅ Analysis complete for {github_username}")
     
     return {
@@ -219,16 +326,9 @@ def analyze_github(github_username: str, db: Session = Depends(get_db)):
     }
 
 @app.get("/github-analysis/{github_username}", response_model=GitHubAnalysisResponse)
-def get_github_analysis(github_username: str, db: Session = Depends(get_db)):
-    user = db.query(models.User).filter(
-        models.User.github_username == github_username
-    ).first()
-    
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
+def get_github_analysis(github_username: str, user_id: int = Depends(get_user_id), db: Session = Depends(get_db)):
     analysis = db.query(models.GitHubAnalysis).filter(
-        models.GitHubAnalysis.user_id == user.id
+        models.GitHubAnalysis.user_id == user_id
     ).order_by(models.GitHubAnalysis.analyzed_at.desc()).first()
     
     if not analysis:
@@ -240,17 +340,14 @@ def get_github_analysis(github_username: str, db: Session = Depends(get_db)):
 def create_checkin(
     github_username: str,
     checkin: CheckInCreate,
+    background: bool = False,
+    user_id: int = Depends(get_user_id),
     db: Session = Depends(get_db)
 ):
-    user = db.query(models.User).filter(
-        models.User.github_username == github_username
-    ).first()
+    import stats_rollup
     
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
-    recent_checkins = db.query(models.CheckIn).filter(
-        models.CheckIn.user_id == user.id
+    recent_checkins = db.query(models.CheckIn).options(load_only(*models.checkin_stats_columns)).filter(
+        models.CheckIn.user_id == user_id
     ).order_by(models.CheckIn.timestamp.desc()).limit(7).all()
     
     history = {
@@ -259,32 +356,44 @@ def create_checkin(
         "commitments_kept": sum(1 for c in recent_checkins if c.shipped) if recent_checkins else 0
     }
     
-    analysis = sage_crew.quick_checkin_analysis(
-        {
-            "energy_level": checkin.energy_level,
-            "avoiding_what": checkin.avoiding_what,
-            "commitment": checkin.commitment,
-            "mood": checkin.mood
-        },
-        history
-    )
+    checkin_data = {
+        "energy_level": checkin.energy_level,
+        "avoiding_what": checkin.avoiding_what,
+        "commitment": checkin.commitment,
+        "mood": checkin.mood
+    }
+    
+    if background:
+        # Record the check-in now; the job fills in ai_analysis when the crew finishes
+        new_checkin = models.CheckIn(user_id=user_id, **checkin_data)
+        db.add(new_checkin)
+        stats_rollup.record_checkin(db, new_checkin)
+        db.commit()
+        db.refresh(new_checkin)
+        invalidate_user_cache(github_username)
+        
+        return enqueue_crew_job(
+            "checkin_analysis", run_checkin_analysis,
+            new_checkin.id, checkin_data, history, github_username,
+            user_id=user_id, github_username=github_username
+        )
+    
+    analysis = sage_crew.quick_checkin_analysis(checkin_data, history)
     
     new_checkin = models.CheckIn(
-        user_id=user.id,
-        energy_level=checkin.energy_level,
-        avoiding_what=checkin.avoiding_what,
-        commitment=checkin.commitment,
-        mood=checkin.mood,
-        ai_analysis=analysis["analysis"]
+        user_id=user_id,
+        ai_analysis=analysis["analysis"],
+        **checkin_data
     )
     db.add(new_checkin)
+    stats_rollup.record_checkin(db, new_checkin)
     
     # Store as interaction
     advice = models.AgentAdvice(
-        user_id=user.id,
+        user_id=user_id,
         agent_name="Psychologist",
         advice=analysis["analysis"],
-        evidence={"checkin": checkin.dict()},
+        evidence={"checkin": checkin_data},
         interaction_type="checkin"
     )
     db.add(advice)
@@ -300,12 +409,51 @@ def create_checkin(
         "message": "Check-in recorded"
     }
 
+
+def run_checkin_analysis(db: Session, checkin_id: int, checkin_data: Dict, history: Dict, github_username: str) -> Dict:
+    """Analyze an already-recorded check-in and store the psychologist's response"""
+    analysis = sage_crew.quick_checkin_analysis(checkin_data, history)
+    
+    checkin = db.query(models.CheckIn).filter(models.CheckIn.id == checkin_id).first()
+    if not checkin:
+        raise ValueError(f"Check-in {checkin_id} no longer exists")
+    
+    checkin.ai_analysis = analysis["analysis"]
+    
+    advice = models.AgentAdvice(
+        user_id=checkin.user_id,
+        agent_name="Psychologist",
+        advice=analysis["analysis"],
+        evidence={"checkin": checkin_data},
+        interaction_type="checkin"
+    )
+    db.add(advice)
+    db.commit()
+    
+    invalidate_user_cache(github_username)
+    
+    return {
+        "checkin_id": checkin_id,
+        "ai_response": analysis["analysis"]
+    }
+
+def invalidate_checkin_owner_cache(db: Session, checkin: models.CheckIn):
+    """Drop cached views of the user a check-in belongs to; review routes only carry the check-in id"""
+    github_username = db.query(models.User.github_username).filter(
+        models.User.id == checkin.user_id
+    ).scalar()
+    if github_username:
+        invalidate_user_cache(github_username)
+
+
 @app.patch("/checkins/{checkin_id}/evening")
 def evening_checkin(
     checkin_id: int,
     update: CheckInUpdate,
     db: Session = Depends(get_db)
 ):
+    import stats_rollup
+    
     checkin = db.query(models.CheckIn).filter(
         models.CheckIn.id == checkin_id
     ).first()
@@ -313,9 +461,12 @@ def evening_checkin(
     if not checkin:
         raise HTTPException(status_code=404, detail="Check-in not found")
     
+    previous_shipped = checkin.shipped
     checkin.shipped = update.shipped
     checkin.excuse = update.excuse
+    stats_rollup.record_review(db, checkin, previous_shipped)
     db.commit()
+    invalidate_checkin_owner_cache(db, checkin)
     
     feedback = sage_crew.evening_checkin_review(
         checkin.commitment,
@@ -331,81 +482,133 @@ def evening_checkin(
 @app.get("/checkins/{github_username}", response_model=List[CheckInResponse])
 def get_checkins(
     github_username: str,
+    response: Response,
     limit: int = 30,
+    cursor: Optional[str] = None,
+    user_id: int = Depends(get_user_id),
     db: Session = Depends(get_db)
 ):
-    user = db.query(models.User).filter(
-        models.User.github_username == github_username
-    ).first()
-    
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
-    checkins = db.query(models.CheckIn).filter(
-        models.CheckIn.user_id == user.id
-    ).order_by(models.CheckIn.timestamp.desc()).limit(limit).all()
+    # The response includes the AI analysis, so load the deferred columns up front
+    checkins = keyset(
+        db.query(models.CheckIn).options(undefer_group("analysis")).filter(
+            models.CheckIn.user_id == user_id
+        ),
+        models.CheckIn.timestamp, models.CheckIn.id, cursor, limit
+    ).all()
     
+    checkins, _ = next_page(checkins, limit, "timestamp", response)
     return checkins
 
 @app.get("/advice/{github_username}", response_model=List[AgentAdviceResponse])
-def get_advice(github_username: str, limit: int = 20, db: Session = Depends(get_db)):
-    user = db.query(models.User).filter(
-        models.User.github_username == github_username
-    ).first()
-    
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
-    advice = db.query(models.AgentAdvice).filter(
-        models.AgentAdvice.user_id == user.id
-    ).order_by(models.AgentAdvice.created_at.desc()).limit(limit).all()
+def get_advice(
+    github_username: str,
+    response: Response,
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    user_id: int = Depends(get_user_id),
+    db: Session = Depends(get_db)
+):
+    advice = keyset(
+        db.query(models.AgentAdvice).filter(models.AgentAdvice.user_id == user_id),
+        models.AgentAdvice.created_at, models.AgentAdvice.id, cursor, limit
+    ).all()
     
+    advice, _ = next_page(advice, limit, "created_at", response)
     return advice
 
 @app.get("/dashboard/{github_username}")
-def get_dashboard(github_username: str, db: Session = Depends(get_db)):
-    # Check cache first
-    cached_data = get_cached_dashboard(github_username)
-    if cached_data:
-        return cached_data
-    
-    user = db.query(models.User).filter(
-        models.User.github_username == github_username
-    ).first()
+async def get_dashboard(github_username: str):
+    return await build_dashboard(github_username)
+
+
+@cached(
+    ttl_seconds=60,
+    stale_ttl_seconds=240,
+    key_func=lambda github_username: f"dashboard:{github_username}",
+    tags=lambda github_username: [user_tag(github_username)]
+)
+async def build_dashboard(github_username: str) -> Dict:
+    """Dashboard payload, cached with single-flight refresh.
+
+    Opens its own session because stale entries are refreshed in the
+    background after the request that triggered them has finished.
+    """
+    async with AsyncSessionLocal() as db:
+        return await _build_dashboard(db, github_username)
+
+
+async def _build_dashboard(db: AsyncSession, github_username: str) -> Dict:
+    user_id = await resolve_user_id_async(db, github_username)
     
-    if not user:
+    # Raised rather than returned so a missing user is never cached
+    if user_id is None:
         raise HTTPException(status_code=404, detail="User not found")
     
-    # Use single optimized query with eager loading
-    github_analysis = db.query(models.GitHubAnalysis).filter(
-        models.GitHubAnalysis.user_id == user.id
-    ).order_by(models.GitHubAnalysis.analyzed_at.desc()).first()
-    
-    # Optimized checkins query with limit
-    checkins = db.query(models.CheckIn).filter(
-        models.CheckIn.user_id == user.id
-    ).order_by(models.CheckIn.timestamp.desc()).limit(7).all()
-    
-    # Optimized advice query
-    latest_advice = db.query(models.AgentAdvice).filter(
-        models.AgentAdvice.user_id == user.id
-    ).order_by(models.AgentAdvice.created_at.desc()).limit(3).all()
+    # Latest analysis is joined by id from a latest-row subquery
+    latest_analysis_id = select(models.GitHubAnalysis.id).filter(
+        models.GitHubAnalysis.user_id == user_id
+    ).order_by(models.GitHubAnalysis.analyzed_at.desc()).limit(1).scalar_subquery()
     
-    # Calculate stats efficiently
-    total_checkins = len(checkins)
-    commitments_kept = sum(1 for c in checkins if c.shipped == True)
-    avg_energy = sum(c.energy_level for c in checkins) / total_checkins if total_checkins > 0 else 0
+    # Aggregate the last 7 check-ins in SQL
+    recent_checkins = select(
+        models.CheckIn.shipped, models.CheckIn.energy_level
+    ).filter(
+        models.CheckIn.user_id == user_id
+    ).order_by(models.CheckIn.timestamp.desc()).limit(7).subquery()
+    
+    checkin_stats = select(
+        func.count().label("total_checkins"),
+        func.count().filter(recent_checkins.c.shipped == True).label("commitments_kept"),
+        func.avg(recent_checkins.c.energy_level).label("avg_energy")
+    ).select_from(recent_checkins).subquery()
+    
+    row = (await db.execute(
+        select(
+            models.User.github_username,
+            models.User.created_at,
+            models.GitHubAnalysis.total_repos,
+            models.GitHubAnalysis.active_repos,
+            models.GitHubAnalysis.languages,
+            models.GitHubAnalysis.patterns,
+            checkin_stats.c.total_checkins,
+            checkin_stats.c.commitments_kept,
+            checkin_stats.c.avg_energy
+        ).select_from(models.User).outerjoin(
+            models.GitHubAnalysis, models.GitHubAnalysis.id == latest_analysis_id
+        ).join(
+            checkin_stats, true()
+        ).filter(models.User.id == user_id)
+    )).one()
+    
+    # Only the first 200 characters of each advice are needed
+    latest_advice = (await db.execute(
+        select(
+            models.AgentAdvice.id,
+            models.AgentAdvice.agent_name,
+            func.substr(models.AgentAdvice.advice, 1, 200).label("advice"),
+            (func.length(models.AgentAdvice.advice) > 200).label("truncated"),
+            models.AgentAdvice.created_at,
+            models.AgentAdvice.interaction_type
+        ).filter(
+            models.AgentAdvice.user_id == user_id
+        ).order_by(models.AgentAdvice.created_at.desc()).limit(3)
+    )).all()
+    
+    total_checkins = row.total_checkins
+    commitments_kept = row.commitments_kept
+    avg_energy = float(row.avg_energy) if row.avg_energy is not None else 0
+    has_analysis = row.total_repos is not None
     
     dashboard_data = {
         "user": {
-            "username": user.github_username,
-            "member_since": user.created_at.strftime("%Y-%m-%d")
+            "username": row.github_username,
+            "member_since": row.created_at.strftime("%Y-%m-%d")
         },
         "github": {
-            "total_repos": github_analysis.total_repos if github_analysis else 0,
-            "active_repos": github_analysis.active_repos if github_analysis else 0,
-            "languages": github_analysis.languages if github_analysis else {},
-            "patterns": github_analysis.patterns if github_analysis else []
+            "total_repos": row.total_repos if has_analysis else 0,
+            "active_repos": row.active_repos if has_analysis else 0,
+            "languages": row.languages if has_analysis else {},
+            "patterns": row.patterns if has_analysis else []
         },
         "stats": {
             "total_checkins": total_checkins,
@@ -417,7 +620,7 @@ def get_dashboard(github_username: str, db: Session = Depends(get_db)):
             {
                 "id": a.id,
                 "agent": a.agent_name,
-                "advice": a.advice[:200] + "..." if len(a.advice) > 200 else a.advice,
+                "advice": a.advice + "..." if a.truncated else a.advice,
                 "date": a.created_at.strftime("%Y-%m-%d"),
                 "type": a.interaction_type
             }
@@ -425,34 +628,48 @@ def get_dashboard(github_username: str, db: Session = Depends(get_db)):
         ]
     }
     
-    # Cache the result
-    cache_dashboard(github_username, dashboard_data)
-    
     return dashboard_data
 
 @app.post("/chat/{github_username}")
 async def chat_with_mentor(
     github_username: str,
     message: ChatMessage,
-    db: Session = Depends(get_db)
+    background: bool = False
 ):
-    user = db.query(models.User).filter(
-        models.User.github_username == github_username
-    ).first()
+    return await run_on_crew_pool("chat", handle_chat, github_username, message, background)
+
+
+def handle_chat(github_username: str, message: ChatMessage, background: bool, db: Session):
+    """Blocking body of chat_with_mentor, run on the crew pool"""
+    user_id = resolve_user_id(db, github_username)
     
-    if not user:
+    if user_id is None:
         raise HTTPException(status_code=404, detail="User not found")
     
+    if background:
+        return enqueue_crew_job("chat", run_chat_deliberation, user_id, message.message, message.context, user_id=user_id, github_username=github_username)
+    
+    return run_chat_deliberation(db, user_id, message.message, message.context)
+
+
+def run_chat_deliberation(
+    db: Session,
+    user_id: int,
+    user_message: str,
+    message_context: Optional[Dict] = None,
+    on_agent_output=None
+) -> Dict:
+    """Run the four-agent chat deliberation and store it as an interaction"""
     github_analysis = db.query(models.GitHubAnalysis).filter(
-        models.GitHubAnalysis.user_id == user.id
+        models.GitHubAnalysis.user_id == user_id
     ).order_by(models.GitHubAnalysis.analyzed_at.desc()).first()
     
-    recent_checkins = db.query(models.CheckIn).filter(
-        models.CheckIn.user_id == user.id
+    recent_checkins = db.query(models.CheckIn).options(load_only(*models.checkin_stats_columns)).filter(
+        models.CheckIn.user_id == user_id
     ).order_by(models.CheckIn.timestamp.desc()).limit(7).all()
     
     life_events = db.query(models.LifeEvent).filter(
-        models.LifeEvent.user_id == user.id
+        models.LifeEvent.user_id == user_id
     ).order_by(models.LifeEvent.timestamp.desc()).limit(10).all()
     
     user_context = {
@@ -478,16 +695,22 @@ async def chat_with_mentor(
     }
     
     deliberation = sage_crew.chat_deliberation(
-        message.message,
+        user_message,
         user_context,
-        message.context
+        message_context,
+        on_agent_output=on_agent_output
     )
     
     advice = models.AgentAdvice(
-        user_id=user.id,
+        user_id=user_id,
         agent_name="Multi-Agent Chat",
         advice=deliberation["final_response"],
-        evidence={"user_message": message.message, "deliberation": deliberation["debate"], "raw_deliberation": deliberation.get("raw_deliberation", [])},
+        evidence={
+            "user_message": user_message,
+            "deliberation": deliberation["debate"],
+            "raw_deliberation": deliberation.get("raw_deliberation", []),
+            "usage": deliberation.get("usage")
+        },
         interaction_type="chat"
     )
     db.add(advice)
@@ -499,23 +722,75 @@ async def chat_with_mentor(
         "key_insights": deliberation["key_insights"],
         "recommended_actions": deliberation["actions"],
         "raw_deliberation": deliberation.get("raw_deliberation", []),
+        "usage": deliberation.get("usage"),
         "interaction_id": advice.id
     }
 
+@app.post("/chat/{github_username}/stream")
+async def stream_chat_with_mentor(
+    github_username: str,
+    message: ChatMessage,
+    user_id: int = Depends(get_user_id_async)
+):
+    """Chat deliberation as Server-Sent Events.
+    
+    Emits an ``agent`` event as each of the Analyst, Psychologist, Contrarian
+    and Strategist finishes, then a ``final`` event with the same payload as
+    POST /chat, or an ``error`` event if the run fails.
+    """
+    loop = asyncio.get_running_loop()
+    events: asyncio.Queue = asyncio.Queue()
+    
+    def on_agent_output(contribution: Dict):
+        # Called from the crew thread
+        loop.call_soon_threadsafe(events.put_nowait, ("agent", contribution))
+    
+    def deliberate():
+        # The request-scoped session may be closed before the stream ends, so use our own
+        db = SessionLocal()
+        try:
+            return run_chat_deliberation(db, user_id, message.message, message.context, on_agent_output)
+        finally:
+            db.close()
+    
+    async def run_deliberation():
+        try:
+            result = await crew_pool.run("chat", deliberate)
+            events.put_nowait(("final", result))
+        except CrewPoolBusy:
+            events.put_nowait(("error", {"detail": "Too many AI requests in progress. Please try again shortly."}))
+        except Exception as e:
+            print(f"❌ Streaming chat failed: {str(e)}")
+            events.put_nowait(("error", {"detail": str(e)}))
+    
+    async def event_stream():
+        runner = asyncio.create_task(run_deliberation())
+        try:
+            while True:
+                event, data = await events.get()
+                yield f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+                if event in ("final", "error"):
+                    break
+        finally:
+            # A disconnected client doesn't cancel the crew; it finishes and is still stored
+            if not runner.done():
+                print(f"ℹ️  Chat stream for {github_username} closed before deliberation finished")
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @app.post("/life-decisions/{github_username}", response_model=LifeDecisionResponse)
 def create_life_decision(
     github_username: str,
     decision: LifeDecisionCreate,
+    background: bool = False,
+    user_id: int = Depends(get_user_id),
     db: Session = Depends(get_db)
 ):
     """Create a new life decision and analyze it with AI"""
-    user = db.query(models.User).filter(
-        models.User.github_username == github_username
-    ).first()
-    
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
     # Create the life event FIRST (without AI analysis)
     context_data = {
         "full_description": decision.description,
@@ -524,7 +799,7 @@ def create_life_decision(
     }
     
     life_event = models.LifeEvent(
-        user_id=user.id,
+        user_id=user_id,
         event_type=decision.decision_type,
         description=decision.title,
         time_horizon=decision.time_horizon,
@@ -535,39 +810,27 @@ def create_life_decision(
     db.commit()
     db.refresh(life_event)
     
+    decision_data = {
+        "title": decision.title,
+        "description": decision.description,
+        "type": decision.decision_type,
+        "impact_areas": decision.impact_areas,
+        "time_horizon": decision.time_horizon
+    }
+    
+    if background:
+        print(f"📝 Life event created (ID: {life_event.id}), analysis queued")
+        return enqueue_crew_job(
+            "life_decision", run_life_decision_analysis,
+            life_event.id, user_id, decision_data,
+            user_id=user_id, github_username=github_username
+        )
+    
     print(f"📝 Life event created (ID: {life_event.id}), now analyzing...")
     
     # NOW run AI analysis
     try:
-        analysis = sage_crew.analyze_life_decision(
-            {
-                "title": decision.title,
-                "description": decision.description,
-                "type": decision.decision_type,
-                "impact_areas": decision.impact_areas,
-                "time_horizon": decision.time_horizon
-            },
-            user.id,
-            db
-        )
-        
-        print(f"🤖 AI Analysis completed:")
-        print(f"  - Analysis length: {len(analysis.get('analysis', ''))}")
-        print(f"  - Lessons count: {len(analysis.get('lessons', []))}")
-        
-        # Update the context with AI analysis
-        life_event.context["ai_analysis"] = analysis["analysis"]
-        life_event.context["lessons"] = analysis["lessons"]
-        life_event.outcome = analysis["long_term_impact"]
-        
-        # IMPORTANT: Mark the object as modified for PostgreSQL JSON
-        from sqlalchemy.orm.attributes import flag_modified
-        flag_modified(life_event, "context")
-        
-        db.commit()
-        db.refresh(life_event)
-        
-        print(f"✅ AI analysis saved to database")
+        analysis = run_life_decision_analysis(db, life_event.id, user_id, decision_data)
         
         return {
             "id": life_event.id,
@@ -582,6 +845,7 @@ def create_life_decision(
         }
         
     except Exception as e:
+        db.rollback()
         print(f"❌ AI analysis failed: {str(e)}")
         # Return without AI analysis if it fails
         return {
@@ -597,24 +861,51 @@ def create_life_decision(
         }
 
 
+def run_life_decision_analysis(db: Session, event_id: int, user_id: int, decision_data: Dict) -> Dict:
+    """Analyze a recorded life decision and store the analysis in its context"""
+    analysis = sage_crew.analyze_life_decision(decision_data, user_id, db)
+    
+    print(f"🤖 AI Analysis completed:")
+    print(f"  - Analysis length: {len(analysis.get('analysis', ''))}")
+    print(f"  - Lessons count: {len(analysis.get('lessons', []))}")
+    
+    life_event = db.query(models.LifeEvent).filter(models.LifeEvent.id == event_id).first()
+    if not life_event:
+        raise ValueError(f"Life event {event_id} no longer exists")
+    
+    # Update the context with AI analysis
+    life_event.context["ai_analysis"] = analysis["analysis"]
+    life_event.context["lessons"] = analysis["lessons"]
+    life_event.outcome = analysis["long_term_impact"]
+    
+    # IMPORTANT: Mark the object as modified for PostgreSQL JSON
+    from sqlalchemy.orm.attributes import flag_modified
+    flag_modified(life_event, "context")
+    
+    db.commit()
+    
+    print(f"✅ AI analysis saved to database")
+    
+    return {
+        "decision_id": event_id,
+        "analysis": analysis["analysis"],
+        "lessons": analysis["lessons"],
+        "long_term_impact": analysis["long_term_impact"]
+    }
+
+
 # Add new endpoint to re-analyze existing decisions
 @app.post("/life-decisions/{github_username}/{decision_id}/reanalyze")
 def reanalyze_life_decision(
     github_username: str,
     decision_id: int,
+    user_id: int = Depends(get_user_id),
     db: Session = Depends(get_db)
 ):
     """Re-run AI analysis on an existing life decision"""
-    user = db.query(models.User).filter(
-        models.User.github_username == github_username
-    ).first()
-    
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
     life_event = db.query(models.LifeEvent).filter(
         models.LifeEvent.id == decision_id,
-        models.LifeEvent.user_id == user.id
+        models.LifeEvent.user_id == user_id
     ).first()
     
     if not life_event:
@@ -634,7 +925,7 @@ def reanalyze_life_decision(
                 "impact_areas": context.get("impact_areas", []),
                 "time_horizon": life_event.time_horizon
             },
-            user.id,
+            user_id,
             db
         )
         
@@ -671,20 +962,18 @@ def reanalyze_life_decision(
 @app.get("/life-decisions/{github_username}", response_model=List[LifeDecisionResponse])
 def get_life_decisions(
     github_username: str,
+    response: Response,
     limit: int = 20,
+    cursor: Optional[str] = None,
+    user_id: int = Depends(get_user_id),
     db: Session = Depends(get_db)
 ):
     """Get all life decisions for a user"""
-    user = db.query(models.User).filter(
-        models.User.github_username == github_username
-    ).first()
-    
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
-    events = db.query(models.LifeEvent).filter(
-        models.LifeEvent.user_id == user.id
-    ).order_by(models.LifeEvent.timestamp.desc()).limit(limit).all()
+    events = keyset(
+        db.query(models.LifeEvent).filter(models.LifeEvent.user_id == user_id),
+        models.LifeEvent.timestamp, models.LifeEvent.id, cursor, limit
+    ).all()
+    events, _ = next_page(events, limit, "timestamp", response)
     
     results = []
     for e in events:
@@ -713,19 +1002,13 @@ def get_life_decisions(
 def get_life_decision_detail(
     github_username: str,
     decision_id: int,
+    user_id: int = Depends(get_user_id),
     db: Session = Depends(get_db)
 ):
     """Get detailed view of a specific life decision"""
-    user = db.query(models.User).filter(
-        models.User.github_username == github_username
-    ).first()
-    
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
     event = db.query(models.LifeEvent).filter(
         models.LifeEvent.id == decision_id,
-        models.LifeEvent.user_id == user.id
+        models.LifeEvent.user_id == user_id
     ).first()
     
     if not event:
@@ -829,22 +1112,15 @@ def debug_life_decisions(github_username: str, db: Session = Depends(get_db)):
 # ==================== COMMITMENT TRACKING ====================
 
 @app.get("/commitments/{github_username}/today")
-def get_today_commitment(github_username: str, db: Session = Depends(get_db)):
+def get_today_commitment(github_username: str, user_id: int = Depends(get_user_id), db: Session = Depends(get_db)):
     """Get today's commitment if exists"""
-    user = db.query(models.User).filter(
-        models.User.github_username == github_username
-    ).first()
-    
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
     # Get today's date range (start and end of day)
     today_start = datetime.combine(datetime.now().date(), time.min)
     today_end = datetime.combine(datetime.now().date(), time.max)
     
     # Find today's check-in
     checkin = db.query(models.CheckIn).filter(
-        models.CheckIn.user_id == user.id,
+        models.CheckIn.user_id == user_id,
         models.CheckIn.timestamp >= today_start,
         models.CheckIn.timestamp <= today_end
     ).order_by(models.CheckIn.timestamp.desc()).first()
@@ -878,26 +1154,38 @@ def get_today_commitment(github_username: str, db: Session = Depends(get_db)):
 
 
 @app.get("/commitments/{github_username}/pending")
-def get_pending_commitments(github_username: str, db: Session = Depends(get_db)):
+def get_pending_commitments(
+    github_username: str,
+    response: Response,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    user_id: int = Depends(get_user_id),
+    db: Session = Depends(get_db)
+):
     """Get all unreviewed commitments (past days not marked shipped/failed)"""
-    user = db.query(models.User).filter(
-        models.User.github_username == github_username
-    ).first()
-    
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
     # Get check-ins from last 7 days that haven't been reviewed
     week_ago = datetime.now() - timedelta(days=7)
     
-    pending = db.query(models.CheckIn).filter(
-        models.CheckIn.user_id == user.id,
+    pending_query = db.query(models.CheckIn).filter(
+        models.CheckIn.user_id == user_id,
         models.CheckIn.timestamp >= week_ago,
         models.CheckIn.shipped == None  # Not yet reviewed
-    ).order_by(models.CheckIn.timestamp.desc()).all()
+    )
+    
+    pending = keyset(
+        pending_query.options(load_only(models.CheckIn.timestamp, models.CheckIn.commitment)),
+        models.CheckIn.timestamp, models.CheckIn.id, cursor, limit
+    ).all()
+    pending, next_cursor = next_page(pending, limit, "timestamp", response)
+    
+    # Count every pending commitment, not just this page
+    pending_count = len(pending) if not next_cursor and not cursor else pending_query.with_entities(
+        func.count(models.CheckIn.id)
+    ).scalar()
     
     return {
-        "pending_count": len(pending),
+        "pending_count": pending_count,
+        "next_cursor": next_cursor,
         "commitments": [
             {
                 "id": c.id,
@@ -917,6 +1205,8 @@ def review_commitment(
     db: Session = Depends(get_db)
 ):
     """Mark commitment as shipped or failed with excuse"""
+    import stats_rollup
+    
     checkin = db.query(models.CheckIn).filter(
         models.CheckIn.id == checkin_id
     ).first()
@@ -925,19 +1215,20 @@ def review_commitment(
         raise HTTPException(status_code=404, detail="Check-in not found")
     
     # Update shipped status
+    previous_shipped = checkin.shipped
     checkin.shipped = review.shipped
     checkin.excuse = review.excuse
+    stats_rollup.record_review(db, checkin, previous_shipped)
     
     db.commit()
     db.refresh(checkin)
     
+    invalidate_checkin_owner_cache(db, checkin)
+    
     # Generate AI feedback on the excuse/success
-    user = db.query(models.User).filter(
-        models.User.id == checkin.user_id
-    ).first()
     
     # Get recent pattern
-    recent_checkins = db.query(models.CheckIn).filter(
+    recent_checkins = db.query(models.CheckIn).options(load_only(*models.checkin_stats_columns)).filter(
         models.CheckIn.user_id == checkin.user_id,
         models.CheckIn.shipped != None
     ).order_by(models.CheckIn.timestamp.desc()).limit(10).all()
@@ -972,33 +1263,26 @@ def review_commitment(
         "shipped": review.shipped,
         "feedback": feedback["feedback"],
         "success_rate": f"{shipped_count}/{total_count}" if total_count > 0 else "N/A",
-        "streak_info": calculate_streak(recent_checkins)
+        "streak_info": streak_info(stats_rollup.get_rollup(db, checkin.user_id))
     }
 
 
 @app.get("/commitments/{github_username}/stats")
-def get_commitment_stats(
+async def get_commitment_stats(
     github_username: str,
     days: int = 30,
-    db: Session = Depends(get_db)
+    user_id: int = Depends(get_user_id_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get commitment statistics"""
-    user = db.query(models.User).filter(
-        models.User.github_username == github_username
-    ).first()
-    
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
-    since = datetime.now() - timedelta(days=days)
+    import stats_rollup
     
-    checkins = db.query(models.CheckIn).filter(
-        models.CheckIn.user_id == user.id,
-        models.CheckIn.timestamp >= since,
-        models.CheckIn.shipped != None  # Only reviewed ones
-    ).order_by(models.CheckIn.timestamp.desc()).all()
+    rollup = await stats_rollup.get_rollup_async(db, user_id)
+    since = (datetime.now() - timedelta(days=days)).date()
+    buckets = await stats_rollup.buckets_between_async(db, rollup, since)
+    totals = stats_rollup.summarize(buckets.values())
     
-    if not checkins:
+    if not totals["total"]:
         return {
             "total_commitments": 0,
             "shipped": 0,
@@ -1009,99 +1293,40 @@ def get_commitment_stats(
             "common_excuses": []
         }
     
-    shipped_count = sum(1 for c in checkins if c.shipped)
-    failed_count = len(checkins) - shipped_count
-    
-    # Calculate streaks
-    current_streak, best_streak = calculate_streaks_detailed(checkins)
-    
-    # Get common excuses
-    excuses = [c.excuse for c in checkins if c.excuse and not c.shipped]
-    excuse_counter = {}
-    for excuse in excuses:
-        # Simple keyword extraction
-        words = excuse.lower().split()
-        for word in ['time', 'tired', 'hard', 'busy', 'complex', 'stuck']:
-            if word in words:
-                excuse_counter[word] = excuse_counter.get(word, 0) + 1
-    
-    common_excuses = sorted(excuse_counter.items(), key=lambda x: x[1], reverse=True)[:3]
+    common_excuses = totals["excuses"].most_common(3)
+    # Streaks count only the reviews inside the requested window
+    current_streak, best_streak = stats_rollup.streaks(buckets)
     
     return {
         "period_days": days,
-        "total_commitments": len(checkins),
-        "shipped": shipped_count,
-        "failed": failed_count,
-        "success_rate": round((shipped_count / len(checkins) * 100), 1),
+        "total_commitments": totals["total"],
+        "shipped": totals["shipped"],
+        "failed": totals["failed"],
+        "success_rate": round((totals["shipped"] / totals["total"] * 100), 1),
         "current_streak": current_streak,
         "best_streak": best_streak,
         "common_excuses": [{"excuse": e[0], "count": e[1]} for e in common_excuses],
-        "weekly_breakdown": get_weekly_breakdown(checkins)
+        "weekly_breakdown": get_weekly_breakdown(buckets)
     }
 
 
-def calculate_streak(checkins: list) -> dict:
-    """Calculate current streak from recent check-ins"""
-    if not checkins:
-        return {"current": 0, "best": 0}
-    
-    current_streak = 0
-    for checkin in checkins:
-        if checkin.shipped:
-            current_streak += 1
-        else:
-            break
-    
-    return {"current": current_streak, "type": "shipping" if current_streak > 0 else "none"}
-
-
-def calculate_streaks_detailed(checkins: list) -> tuple:
-    """Calculate current and best streak"""
-    if not checkins:
-        return 0, 0
-    
-    current_streak = 0
-    best_streak = 0
-    temp_streak = 0
-    
-    for checkin in reversed(checkins):  # Start from oldest
-        if checkin.shipped:
-            temp_streak += 1
-            best_streak = max(best_streak, temp_streak)
-        else:
-            temp_streak = 0
-    
-    # Current streak is from most recent
-    for checkin in checkins:
-        if checkin.shipped:
-            current_streak += 1
-        else:
-            break
-    
-    return current_streak, best_streak
+def streak_info(rollup: models.UserStatsRollup) -> dict:
+    """Current shipping streak from the user's rollup"""
+    return {"current": rollup.current_streak, "type": "shipping" if rollup.current_streak > 0 else "none"}
 
 
-def get_weekly_breakdown(checkins: list) -> list:
+def get_weekly_breakdown(buckets: Dict[str, Dict]) -> list:
     """Get week-by-week breakdown"""
-    weeks = {}
-    for checkin in checkins:
-        week_start = checkin.timestamp.date() - timedelta(days=checkin.timestamp.weekday())
-        week_key = week_start.strftime("%Y-%m-%d")
-        
-        if week_key not in weeks:
-            weeks[week_key] = {"shipped": 0, "failed": 0}
-        
-        if checkin.shipped:
-            weeks[week_key]["shipped"] += 1
-        else:
-            weeks[week_key]["failed"] += 1
+    import stats_rollup
+    
+    weeks = stats_rollup.weekly_totals(buckets)
     
     return [
         {
             "week_start": week,
             "shipped": data["shipped"],
             "failed": data["failed"],
-            "rate": round((data["shipped"] / (data["shipped"] + data["failed"]) * 100), 1)
+            "rate": round((data["shipped"] / data["total"] * 100), 1)
         }
         for week, data in sorted(weeks.items(), reverse=True)[:4]  # Last 4 weeks
     ]
@@ -1110,11 +1335,9 @@ def get_weekly_breakdown(checkins: list) -> list:
 @app.get("/commitments/{github_username}/reminder-needed")
 def check_reminder_needed(github_username: str, db: Session = Depends(get_db)):
     """Check if user needs a reminder (for notifications)"""
-    user = db.query(models.User).filter(
-        models.User.github_username == github_username
-    ).first()
+    user_id = resolve_user_id(db, github_username)
     
-    if not user:
+    if user_id is None:
         return {"needs_reminder": False}
     
     # Check if there's a commitment today that needs review
@@ -1123,7 +1346,7 @@ def check_reminder_needed(github_username: str, db: Session = Depends(get_db)):
     current_hour = datetime.now().hour
     
     checkin = db.query(models.CheckIn).filter(
-        models.CheckIn.user_id == user.id,
+        models.CheckIn.user_id == user_id,
         models.CheckIn.timestamp >= today_start,
         models.CheckIn.timestamp <= today_end,
         models.CheckIn.shipped == None
@@ -1160,54 +1383,38 @@ def check_reminder_needed(github_username: str, db: Session = Depends(get_db)):
     }
 
 @app.get("/commitments/{github_username}/weekly-summary")
+@cache_response(ttl=300, max_size=500, tags=lambda github_username, **_: [user_tag(github_username)])
 def get_weekly_summary(
     github_username: str,
+    user_id: int = Depends(get_user_id),
     db: Session = Depends(get_db)
 ):
     """Get week-by-week commitment summary with insights"""
-    user = db.query(models.User).filter(
-        models.User.github_username == github_username
-    ).first()
-    
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
+    import stats_rollup
     
     # Get last 4 weeks of data
-    four_weeks_ago = datetime.now() - timedelta(days=28)
+    four_weeks_ago = (datetime.now() - timedelta(days=28)).date()
+    
+    rollup = stats_rollup.get_rollup(db, user_id)
+    weeks = stats_rollup.weekly_totals(stats_rollup.buckets_between(db, rollup, four_weeks_ago))
     
-    checkins = db.query(models.CheckIn).filter(
-        models.CheckIn.user_id == user.id,
-        models.CheckIn.timestamp >= four_weeks_ago,
+    # Only the commitment texts still come from the check-ins themselves
+    commitments = db.query(
+        models.CheckIn.timestamp, models.CheckIn.commitment, models.CheckIn.shipped
+    ).filter(
+        models.CheckIn.user_id == user_id,
+        models.CheckIn.timestamp >= datetime.combine(four_weeks_ago, time.min),
         models.CheckIn.shipped != None
     ).order_by(models.CheckIn.timestamp.asc()).all()
     
-    # Group by week
-    weeks = {}
-    for checkin in checkins:
-        week_start = checkin.timestamp.date() - timedelta(days=checkin.timestamp.weekday())
-        week_key = week_start.strftime("%Y-%m-%d")
-        
-        if week_key not in weeks:
-            weeks[week_key] = {
-                "shipped": 0,
-                "failed": 0,
-                "total_energy": 0,
-                "count": 0,
-                "commitments": []
-            }
-        
-        weeks[week_key]["count"] += 1
-        weeks[week_key]["total_energy"] += checkin.energy_level
-        weeks[week_key]["commitments"].append({
-            "text": checkin.commitment,
-            "shipped": checkin.shipped,
-            "date": checkin.timestamp.strftime("%Y-%m-%d")
+    commitments_by_week = {}
+    for timestamp, commitment, shipped in commitments:
+        week_start = timestamp.date() - timedelta(days=timestamp.weekday())
+        commitments_by_week.setdefault(week_start.strftime("%Y-%m-%d"), []).append({
+            "text": commitment,
+            "shipped": shipped,
+            "date": timestamp.strftime("%Y-%m-%d")
         })
-        
-        if checkin.shipped:
-            weeks[week_key]["shipped"] += 1
-        else:
-            weeks[week_key]["failed"] += 1
     
     # Format for response
     summary = []
@@ -1216,9 +1423,9 @@ def get_weekly_summary(
             "week_start": week_start,
             "shipped": data["shipped"],
             "failed": data["failed"],
-            "success_rate": round((data["shipped"] / data["count"] * 100), 1) if data["count"] > 0 else 0,
-            "avg_energy": round(data["total_energy"] / data["count"], 1) if data["count"] > 0 else 0,
-            "commitments": data["commitments"]
+            "success_rate": round((data["shipped"] / data["total"] * 100), 1),
+            "avg_energy": round(data["reviewed_energy"] / data["total"], 1),
+            "commitments": commitments_by_week.get(week_start, [])
         })
     
     return {
@@ -1232,28 +1439,31 @@ def get_weekly_summary(
 async def create_goal(
     github_username: str,
     goal: models.GoalCreate,
-    db: Session = Depends(get_db)
+    background: bool = False
 ):
     """Create a new life goal with AI analysis"""
-    user = db.query(models.User).filter(
-        models.User.github_username == github_username
-    ).first()
+    return await run_on_crew_pool("goals", handle_create_goal, github_username, goal, background)
+
+
+def handle_create_goal(github_username: str, goal: models.GoalCreate, background: bool, db: Session):
+    """Blocking body of create_goal, run on the crew pool"""
+    user_id = resolve_user_id(db, github_username)
     
-    if not user:
+    if user_id is None:
         raise HTTPException(status_code=404, detail="User not found")
     
     # Get user context for AI analysis
     github_analysis = db.query(models.GitHubAnalysis).filter(
-        models.GitHubAnalysis.user_id == user.id
+        models.GitHubAnalysis.user_id == user_id
     ).order_by(models.GitHubAnalysis.analyzed_at.desc()).first()
     
-    recent_checkins = db.query(models.CheckIn).filter(
-        models.CheckIn.user_id == user.id,
+    recent_checkins = db.query(models.CheckIn).options(load_only(*models.checkin_stats_columns)).filter(
+        models.CheckIn.user_id == user_id,
         models.CheckIn.shipped != None
     ).order_by(models.CheckIn.timestamp.desc()).limit(30).all()
     
     past_goals = db.query(models.Goal).filter(
-        models.Goal.user_id == user.id,
+        models.Goal.user_id == user_id,
         models.Goal.status == 'completed'
     ).all()
     
@@ -1275,7 +1485,7 @@ async def create_goal(
     
     # Create goal first
     new_goal = models.Goal(
-        user_id=user.id,
+        user_id=user_id,
         title=goal.title,
         description=goal.description,
         goal_type=goal.goal_type,
@@ -1286,69 +1496,97 @@ async def create_goal(
     db.add(new_goal)
     db.commit()
     db.refresh(new_goal)
+    invalidate_goal_cache(github_username)
+    
+    goal_data = {
+        "title": goal.title,
+        "description": goal.description,
+        "goal_type": goal.goal_type,
+        "priority": goal.priority,
+        "target_date": goal.target_date.isoformat() if goal.target_date else None,
+        "success_criteria": goal.success_criteria
+    }
+    milestones = [
+        {"title": ms.title, "description": ms.description, "target_date": ms.target_date}
+        for ms in (goal.milestones or [])
+    ]
+    
+    if background:
+        print(f"🎯 Goal created (ID: {new_goal.id}), analysis queued")
+        return enqueue_crew_job(
+            "goal_analysis", run_goal_analysis,
+            new_goal.id, goal_data, user_context, milestones,
+            user_id=user_id, github_username=github_username
+        )
     
     print(f"🎯 Goal created (ID: {new_goal.id}), analyzing...")
     
     # AI Analysis
     try:
-        analysis = sage_crew.analyze_goal(
-            {
-                "title": goal.title,
-                "description": goal.description,
-                "goal_type": goal.goal_type,
-                "priority": goal.priority,
-                "target_date": goal.target_date.isoformat() if goal.target_date else None,
-                "success_criteria": goal.success_criteria
-            },
-            user_context,
-            db
-        )
-        
-        # Update goal with AI analysis
-        new_goal.ai_analysis = analysis["analysis"]
-        new_goal.ai_insights = {
-            "insights": analysis["insights"],
-            "obstacles": analysis["obstacles"],
-            "recommendations": analysis["recommendations"],
-            "feasibility_score": analysis["feasibility_score"],
-            "estimated_duration": analysis["estimated_duration"]
-        }
-        new_goal.obstacles_identified = {"obstacles": analysis["obstacles"]}
-        
-        # Create suggested subgoals
-        for sg in analysis["suggested_subgoals"]:
-            subgoal = models.SubGoal(
-                goal_id=new_goal.id,
-                title=sg["title"],
-                order=sg["order"]
-            )
-            db.add(subgoal)
-        
-        # Create milestones if provided
-        if goal.milestones:
-            for ms in goal.milestones:
-                milestone = models.Milestone(
-                    goal_id=new_goal.id,
-                    title=ms.title,
-                    description=ms.description,
-                    target_date=ms.target_date
-                )
-                db.add(milestone)
-        
-        from sqlalchemy.orm.attributes import flag_modified
-        flag_modified(new_goal, "ai_insights")
-        flag_modified(new_goal, "obstacles_identified")
-        
-        db.commit()
+        run_goal_analysis(db, new_goal.id, goal_data, user_context, milestones)
         db.refresh(new_goal)
-        
-        print(f"✅ Goal analysis complete")
-        
     except Exception as e:
+        db.rollback()
         print(f"❌ Goal analysis failed: {str(e)}")
         # Continue without analysis if it fails
     
-    return new_goal
+    # Serialize here so relationship lazy-loads stay off the event loop
+    return models.GoalResponse.model_validate(new_goal)
+
+
+def run_goal_analysis(db: Session, goal_id: int, goal_data: Dict, user_context: Dict, milestones: List[Dict]) -> Dict:
+    """Run the goal crew and store its analysis, suggested subgoals and milestones"""
+    analysis = sage_crew.analyze_goal(goal_data, user_context, db)
+    
+    new_goal = db.query(models.Goal).filter(models.Goal.id == goal_id).first()
+    if not new_goal:
+        raise ValueError(f"Goal {goal_id} no longer exists")
+    
+    # Update goal with AI analysis
+    new_goal.ai_analysis = analysis["analysis"]
+    new_goal.ai_insights = {
+        "insights": analysis["insights"],
+        "obstacles": analysis["obstacles"],
+        "recommendations": analysis["recommendations"],
+        "feasibility_score": analysis["feasibility_score"],
+        "estimated_duration": analysis["estimated_duration"]
+    }
+    new_goal.obstacles_identified = {"obstacles": analysis["obstacles"]}
+    
+    # Create suggested subgoals
+    for sg in analysis["suggested_subgoals"]:
+        subgoal = models.SubGoal(
+            goal_id=new_goal.id,
+            title=sg["title"],
+            order=sg["order"]
+        )
+        db.add(subgoal)
+    
+    # Create milestones if provided
+    for ms in milestones:
+        milestone = models.Milestone(
+            goal_id=new_goal.id,
+            title=ms["title"],
+            description=ms["description"],
+            target_date=ms["target_date"]
+        )
+        db.add(milestone)
+    
+    from sqlalchemy.orm.attributes import flag_modified
+    flag_modified(new_goal, "ai_insights")
+    flag_modified(new_goal, "obstacles_identified")
+    
+    db.commit()
+    invalidate_tags(goal_tag(goal_id))
+    
+    print(f"✅ Goal analysis complete")
+    
+    return {
+        "goal_id": goal_id,
+        "feasibility_score": analysis["feasibility_score"],
+        "estimated_duration": analysis["estimated_duration"],
+        "subgoals_created": len(analysis["suggested_subgoals"])
+    }
 
 
 @app.get("/goals/{github_username}", response_model=List[models.GoalResponse])
@@ -1356,18 +1594,12 @@ def get_goals(
     github_username: str,
     status: str = None,  # active, completed, paused, abandoned
     goal_type: str = None,
+    user_id: int = Depends(get_user_id),
     db: Session = Depends(get_db)
 ):
     """Get all goals for a user with optional filters"""
-    user = db.query(models.User).filter(
-        models.User.github_username == github_username
-    ).first()
-    
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
     # Base query
-    query = db.query(models.Goal).filter(models.Goal.user_id == user.id)
+    query = db.query(models.Goal).filter(models.Goal.user_id == user_id)
     
     if status:
         query = query.filter(models.Goal.status == status)
@@ -1384,45 +1616,50 @@ def get_goals(
     return goals
 
 @app.get("/goals/{github_username}/dashboard", response_model=GoalsDashboardResponse)
-def get_goals_dashboard(
+async def get_goals_dashboard(
     github_username: str,
-    db: Session = Depends(get_db)
+    user_id: int = Depends(get_user_id_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get comprehensive goals dashboard"""
-    user = db.query(models.User).filter(
-        models.User.github_username == github_username
-    ).first()
-    
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
+    cache_key = f"goals_dashboard:{github_username}"
+    cached_data = cache.get(cache_key)
+    if cached_data:
+        return cached_data
     
     # Use selectinload instead of joinedload for better collection loading
-    active_goals = db.query(models.Goal).options(
-        selectinload(models.Goal.subgoals).selectinload(models.SubGoal.tasks)
-    ).filter(
-        models.Goal.user_id == user.id,
-        models.Goal.status == 'active'
-    ).all()
+    active_goals = (await db.execute(
+        select(models.Goal).options(
+            selectinload(models.Goal.subgoals)
+        ).filter(
+            models.Goal.user_id == user_id,
+            models.Goal.status == 'active'
+        )
+    )).scalars().all()
     
-    completed_goals = db.query(models.Goal).filter(
-        models.Goal.user_id == user.id,
-        models.Goal.status == 'completed'
-    ).count()
+    completed_goals = (await db.execute(
+        select(func.count(models.Goal.id)).filter(
+            models.Goal.user_id == user_id,
+            models.Goal.status == 'completed'
+        )
+    )).scalar_one()
     
     # Defensive programming: ensure progress is numeric and handle None
     total_progress = sum(float(g.progress or 0.0) for g in active_goals)
     avg_progress = (total_progress / len(active_goals)) if active_goals else 0.0
     
     # Fix the milestone query - properly join Goal table
-    recent_milestones = db.query(models.Milestone).join(
-        models.Goal,
-        models.Milestone.goal_id == models.Goal.id
-    ).filter(
-        models.Goal.user_id == user.id,
-        models.Milestone.achieved == True
-    ).options(
-        joinedload(models.Milestone.goal)
-    ).order_by(models.Milestone.achieved_at.desc()).limit(5).all()
+    recent_milestones = (await db.execute(
+        select(models.Milestone).join(
+            models.Goal,
+            models.Milestone.goal_id == models.Goal.id
+        ).filter(
+            models.Goal.user_id == user_id,
+            models.Milestone.achieved == True
+        ).options(
+            joinedload(models.Milestone.goal)
+        ).order_by(models.Milestone.achieved_at.desc()).limit(5)
+    )).scalars().all()
     
     goals_by_type = {}
     for goal in active_goals:
@@ -1431,7 +1668,7 @@ def get_goals_dashboard(
             goals_by_type[goal_type_key] = 0
         goals_by_type[goal_type_key] += 1
     
-    return {
+    dashboard_data = {
         "active_goals_count": len(active_goals),
         "completed_goals_count": completed_goals,
         "average_progress": round(avg_progress, 1),
@@ -1459,33 +1696,43 @@ def get_goals_dashboard(
                 for m in recent_milestones
             ],
         }
+    
+    # Tagged per goal so a change to any listed goal drops this entry
+    cache.set(
+        cache_key, dashboard_data, ttl_seconds=60,
+        tags=[user_tag(github_username), goals_tag(github_username)] + [goal_tag(g.id) for g in active_goals]
+    )
+    
+    return dashboard_data
 
 @app.get("/goals/{github_username}/{goal_id}", response_model=models.GoalResponse)
 def get_goal_detail(
     github_username: str,
     goal_id: int,
+    user_id: int = Depends(get_user_id),
     db: Session = Depends(get_db)
 ):
     """Get detailed view of a specific goal"""
-    user = db.query(models.User).filter(
-        models.User.github_username == github_username
-    ).first()
-    
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
+    cache_key = f"goal:{github_username}:{goal_id}"
+    cached_goal = cache.get(cache_key)
+    if cached_goal:
+        return cached_goal
     
     goal = db.query(models.Goal).options(
         joinedload(models.Goal.subgoals).joinedload(models.SubGoal.tasks),
         joinedload(models.Goal.milestones)
     ).filter(
         models.Goal.id == goal_id,
-        models.Goal.user_id == user.id
+        models.Goal.user_id == user_id
     ).first()
     
     if not goal:
         raise HTTPException(status_code=404, detail="Goal not found")
     
-    return goal
+    goal_data = models.GoalResponse.model_validate(goal).model_dump()
+    cache.set(cache_key, goal_data, ttl_seconds=300, tags=[user_tag(github_username), goal_tag(goal_id)])
+    
+    return goal_data
 
 
 @app.patch("/goals/{github_username}/{goal_id}")
@@ -1493,19 +1740,13 @@ def update_goal(
     github_username: str,
     goal_id: int,
     update: models.GoalUpdateRequest,
+    user_id: int = Depends(get_user_id),
     db: Session = Depends(get_db)
 ):
     """Update goal details"""
-    user = db.query(models.User).filter(
-        models.User.github_username == github_username
-    ).first()
-    
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
     goal = db.query(models.Goal).filter(
         models.Goal.id == goal_id,
-        models.Goal.user_id == user.id
+        models.Goal.user_id == user_id
     ).first()
     
     if not goal:
@@ -1533,6 +1774,7 @@ def update_goal(
     
     db.commit()
     db.refresh(goal)
+    invalidate_goal_cache(github_username, goal_id)
     
     return {"message": "Goal updated", "goal": goal}
 
@@ -1542,19 +1784,13 @@ def log_progress(
     github_username: str,
     goal_id: int,
     progress: models.GoalProgressCreate,
+    user_id: int = Depends(get_user_id),
     db: Session = Depends(get_db)
 ):
     """Log progress update for a goal"""
-    user = db.query(models.User).filter(
-        models.User.github_username == github_username
-    ).first()
-    
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
     goal = db.query(models.Goal).filter(
         models.Goal.id == goal_id,
-        models.Goal.user_id == user.id
+        models.Goal.user_id == user_id
     ).first()
     
     if not goal:
@@ -1577,6 +1813,7 @@ def log_progress(
     
     db.commit()
     db.refresh(progress_log)
+    invalidate_goal_cache(github_username, goal_id)
     
     # AI Feedback
     try:
@@ -1589,7 +1826,7 @@ def log_progress(
                 "wins": progress.wins,
                 "mood": progress.mood
             },
-            user.id,
+            user_id,
             db
         )
         
@@ -1615,29 +1852,27 @@ def log_progress(
 def get_progress_history(
     github_username: str,
     goal_id: int,
+    response: Response,
     limit: int = 20,
+    cursor: Optional[str] = None,
+    user_id: int = Depends(get_user_id),
     db: Session = Depends(get_db)
 ):
     """Get progress history for a goal"""
-    user = db.query(models.User).filter(
-        models.User.github_username == github_username
-    ).first()
-    
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
     goal = db.query(models.Goal).filter(
         models.Goal.id == goal_id,
-        models.Goal.user_id == user.id
+        models.Goal.user_id == user_id
     ).first()
     
     if not goal:
         raise HTTPException(status_code=404, detail="Goal not found")
     
-    progress_logs = db.query(models.GoalProgress).filter(
-        models.GoalProgress.goal_id == goal.id
-    ).order_by(models.GoalProgress.timestamp.desc()).limit(limit).all()
+    progress_logs = keyset(
+        db.query(models.GoalProgress).filter(models.GoalProgress.goal_id == goal.id),
+        models.GoalProgress.timestamp, models.GoalProgress.id, cursor, limit
+    ).all()
     
+    progress_logs, _ = next_page(progress_logs, limit, "timestamp", response)
     return progress_logs
 
 
@@ -1646,19 +1881,13 @@ def create_subgoal(
     github_username: str,
     goal_id: int,
     subgoal: models.SubGoalCreate,
+    user_id: int = Depends(get_user_id),
     db: Session = Depends(get_db)
 ):
     """Add a subgoal to a goal"""
-    user = db.query(models.User).filter(
-        models.User.github_username == github_username
-    ).first()
-    
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
     goal = db.query(models.Goal).filter(
         models.Goal.id == goal_id,
-        models.Goal.user_id == user.id
+        models.Goal.user_id == user_id
     ).first()
     
     if not goal:
@@ -1689,6 +1918,8 @@ def create_subgoal(
             db.add(task)
         db.commit()
     
+    invalidate_goal_cache(github_username, goal_id)
+    
     return {"message": "Subgoal created", "subgoal": new_subgoal}
 
 
@@ -1698,20 +1929,14 @@ def update_subgoal_status(
     goal_id: int,
     subgoal_id: int,
     status: str,
+    user_id: int = Depends(get_user_id),
     db: Session = Depends(get_db)
 ):
     """Update subgoal status"""
-    user = db.query(models.User).filter(
-        models.User.github_username == github_username
-    ).first()
-    
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
     subgoal = db.query(models.SubGoal).join(models.Goal).filter(
         models.SubGoal.id == subgoal_id,
         models.SubGoal.goal_id == goal_id,
-        models.Goal.user_id == user.id
+        models.Goal.user_id == user_id
     ).first()
     
     if not subgoal:
@@ -1731,6 +1956,7 @@ def update_subgoal_status(
     goal.progress = (completed_subgoals / total_subgoals * 100) if total_subgoals > 0 else 0
     
     db.commit()
+    invalidate_goal_cache(github_username, goal_id)
     
     return {"message": "Subgoal updated", "goal_progress": goal.progress}
 
@@ -1741,20 +1967,14 @@ def achieve_milestone(
     goal_id: int,
     milestone_id: int,
     celebration_note: str = None,
+    user_id: int = Depends(get_user_id),
     db: Session = Depends(get_db)
 ):
     """Mark a milestone as achieved"""
-    user = db.query(models.User).filter(
-        models.User.github_username == github_username
-    ).first()
-    
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
     milestone = db.query(models.Milestone).join(models.Goal).filter(
         models.Milestone.id == milestone_id,
         models.Milestone.goal_id == goal_id,
-        models.Goal.user_id == user.id
+        models.Goal.user_id == user_id
     ).first()
     
     if not milestone:
@@ -1765,6 +1985,7 @@ def achieve_milestone(
     milestone.celebration_note = celebration_note
     
     db.commit()
+    invalidate_goal_cache(github_username, goal_id)
     
     return {
         "message": "🎉 Milestone achieved! Celebrate this win!",
@@ -1775,18 +1996,12 @@ def achieve_milestone(
 @app.get("/goals/{github_username}/weekly-review")
 def get_weekly_review(
     github_username: str,
+    user_id: int = Depends(get_user_id),
     db: Session = Depends(get_db)
 ):
     """Get weekly goals review with AI guidance"""
-    user = db.query(models.User).filter(
-        models.User.github_username == github_username
-    ).first()
-    
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
     try:
-        review = sage_crew.weekly_goals_review(user.id, db)
+        review = sage_crew.weekly_goals_review(user_id, db)
         return review
     except Exception as e:
         print(f"❌ Weekly review failed: {str(e)}")
@@ -1799,16 +2014,10 @@ def update_task_status(
     goal_id: int,
     task_id: int,
     status: str,
+    user_id: int = Depends(get_user_id),
     db: Session = Depends(get_db)
 ):
     """Update a single task's status"""
-    user = db.query(models.User).filter(
-        models.User.github_username == github_username
-    ).first()
-    
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
     # Verify the task belongs to a subgoal that belongs to a goal owned by this user
     task = db.query(models.Task).join(
         models.SubGoal, models.Task.subgoal_id == models.SubGoal.id
@@ -1817,7 +2026,7 @@ def update_task_status(
     ).filter(
         models.Task.id == task_id,
         models.Goal.id == goal_id,
-        models.Goal.user_id == user.id
+        models.Goal.user_id == user_id
     ).first()
     
     if not task:
@@ -1832,25 +2041,20 @@ def update_task_status(
     
     db.commit()
     db.refresh(task)
+    invalidate_goal_cache(github_username, goal_id)
     
     return {"message": "Task updated successfully", "task": task}
 
 @app.get("/insights/{github_username}/weekly")
+@cache_response(ttl=900, max_size=500, tags=lambda github_username, **_: [user_tag(github_username)])
 def get_weekly_insights(
     github_username: str,
+    user_id: int = Depends(get_user_id),
     db: Session = Depends(get_db)
 ):
     """Get weekly insights and recommendations"""
-    user = db.query(models.User).filter(
-        models.User.github_username == github_username
-    ).first()
-    
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
-    engine = ProactiveInsightsEngine()
-    insights = engine.analyze_weekly_patterns(user.id, db)
-    report = engine.generate_weekly_report(user.id, db)
+    insights = insights_engine.analyze_weekly_patterns(user_id, db)
+    report = insights_engine.generate_weekly_report(user_id, db, insights=insights)
     
     return {
         "metrics": insights,
@@ -1859,30 +2063,27 @@ def get_weekly_insights(
     }
 
 @app.get("/notifications/{github_username}", response_model=List[NotificationResponse])
-def get_notifications(
+async def get_notifications(
     github_username: str,
+    response: Response,
     unread_only: bool = False,
     limit: int = 50,
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    user_id: int = Depends(get_user_id_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get notifications for a user"""
-    user = db.query(models.User).filter(
-        models.User.github_username == github_username
-    ).first()
-    
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
-    query = db.query(models.Notification).filter(
-        models.Notification.user_id == user.id
+    query = select(models.Notification).filter(
+        models.Notification.user_id == user_id
     )
     
     if unread_only:
         query = query.filter(models.Notification.read == False)
     
-    notifications = query.order_by(
-        models.Notification.created_at.desc()
-    ).limit(limit).all()
+    notifications = (await db.execute(
+        keyset(query, models.Notification.created_at, models.Notification.id, cursor, limit)
+    )).scalars().all()
+    notifications, _ = next_page(notifications, limit, "created_at", response)
     
     # Convert to response format with metadata mapped from extra_data
     return [
@@ -1891,44 +2092,30 @@ def get_notifications(
 
 
 @app.get("/notifications/{github_username}/stats", response_model=NotificationStats)
-def get_notification_stats(
+async def get_notification_stats(
     github_username: str,
-    db: Session = Depends(get_db)
+    user_id: int = Depends(get_user_id_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get notification statistics"""
-    user = db.query(models.User).filter(
-        models.User.github_username == github_username
-    ).first()
-    
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
-    # Total notifications
-    total = db.query(models.Notification).filter(
-        models.Notification.user_id == user.id
-    ).count()
-    
-    # Unread notifications
-    unread = db.query(models.Notification).filter(
-        models.Notification.user_id == user.id,
-        models.Notification.read == False
-    ).count()
-    
-    # By type
-    all_notifications = db.query(models.Notification).filter(
-        models.Notification.user_id == user.id
-    ).all()
-    
-    by_type = {}
-    for notif in all_notifications:
-        by_type[notif.notification_type] = by_type.get(notif.notification_type, 0) + 1
-    
-    # Recent (last 24 hours)
     day_ago = datetime.utcnow() - timedelta(days=1)
-    recent_count = db.query(models.Notification).filter(
-        models.Notification.user_id == user.id,
-        models.Notification.created_at >= day_ago
-    ).count()
+    
+    # One grouped scan: per-type totals with unread and last-24h counts alongside
+    rows = (await db.execute(
+        select(
+            models.Notification.notification_type,
+            func.count().label("total"),
+            func.count().filter(models.Notification.read == False).label("unread"),
+            func.count().filter(models.Notification.created_at >= day_ago).label("recent")
+        ).filter(
+            models.Notification.user_id == user_id
+        ).group_by(models.Notification.notification_type)
+    )).all()
+    
+    by_type = {row.notification_type: row.total for row in rows}
+    total = sum(row.total for row in rows)
+    unread = sum(row.unread for row in rows)
+    recent_count = sum(row.recent for row in rows)
     
     return {
         "total": total,
@@ -1945,16 +2132,12 @@ def mark_notification_read(
     db: Session = Depends(get_db)
 ):
     """Mark a notification as read"""
-    user = db.query(models.User).filter(
-        models.User.github_username == github_username
-    ).first()
-    
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
-    notification = db.query(models.Notification).filter(
+    # Ownership is checked through the username join, so this is a single statement
+    notification = db.query(models.Notification).join(
+        models.User, models.User.id == models.Notification.user_id
+    ).filter(
         models.Notification.id == notification_id,
-        models.Notification.user_id == user.id
+        models.User.github_username == github_username
     ).first()
     
     if not notification:
@@ -1970,18 +2153,12 @@ def mark_notification_read(
 @app.post("/notifications/{github_username}/mark-all-read")
 def mark_all_notifications_read(
     github_username: str,
+    user_id: int = Depends(get_user_id),
     db: Session = Depends(get_db)
 ):
     """Mark all notifications as read"""
-    user = db.query(models.User).filter(
-        models.User.github_username == github_username
-    ).first()
-    
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
     db.query(models.Notification).filter(
-        models.Notification.user_id == user.id,
+        models.Notification.user_id == user_id,
         models.Notification.read == False
     ).update({
         "read": True,
@@ -2000,16 +2177,12 @@ def delete_notification(
     db: Session = Depends(get_db)
 ):
     """Delete a notification"""
-    user = db.query(models.User).filter(
-        models.User.github_username == github_username
-    ).first()
-    
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
-    notification = db.query(models.Notification).filter(
+    # Ownership is checked through the username join, so this is a single statement
+    notification = db.query(models.Notification).join(
+        models.User, models.User.id == models.Notification.user_id
+    ).filter(
         models.Notification.id == notification_id,
-        models.Notification.user_id == user.id
+        models.User.github_username == github_username
     ).first()
     
     if not notification:
@@ -2024,66 +2197,45 @@ def delete_notification(
 @app.post("/notifications/{github_username}/check")
 def check_and_create_notifications(
     github_username: str,
+    user_id: int = Depends(get_user_id),
     db: Session = Depends(get_db)
 ):
     """Manually trigger notification checks (useful for testing or manual refresh)"""
-    user = db.query(models.User).filter(
-        models.User.github_username == github_username
-    ).first()
-    
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
-    NotificationService.run_all_checks(db, user.id)
+    NotificationService.run_all_checks(db, user_id)
     
     return {"message": "Notification checks completed"}
 
 @app.get("/commitments/{github_username}/stats/comparison")
-def get_stats_comparison(
+async def get_stats_comparison(
     github_username: str,
     days: int = 7,
-    db: Session = Depends(get_db)
+    user_id: int = Depends(get_user_id_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get current and previous period stats for comparison"""
-    user = db.query(models.User).filter(
-        models.User.github_username == github_username
-    ).first()
-    
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
-    # Current period
-    current_start = datetime.now() - timedelta(days=days)
-    current_checkins = db.query(models.CheckIn).filter(
-        models.CheckIn.user_id == user.id,
-        models.CheckIn.timestamp >= current_start,
-        models.CheckIn.shipped != None
-    ).all()
+    import stats_rollup
     
-    # Previous period
-    previous_start = datetime.now() - timedelta(days=days * 2)
-    previous_end = current_start
-    previous_checkins = db.query(models.CheckIn).filter(
-        models.CheckIn.user_id == user.id,
-        models.CheckIn.timestamp >= previous_start,
-        models.CheckIn.timestamp < previous_end,
-        models.CheckIn.shipped != None
-    ).all()
+    rollup = await stats_rollup.get_rollup_async(db, user_id)
+    current_start = (datetime.now() - timedelta(days=days)).date()
+    previous_start = (datetime.now() - timedelta(days=days * 2)).date()
     
-    def calculate_stats(checkins):
-        if not checkins:
+    def calculate_stats(buckets):
+        totals = stats_rollup.summarize(buckets.values())
+        if not totals["total"]:
             return {"success_rate": 0, "avg_energy": 0, "total": 0}
         
-        shipped = sum(1 for c in checkins if c.shipped)
         return {
-            "success_rate": (shipped / len(checkins) * 100) if checkins else 0,
-            "avg_energy": sum(c.energy_level for c in checkins) / len(checkins) if checkins else 0,
-            "total": len(checkins)
+            "success_rate": totals["shipped"] / totals["total"] * 100,
+            "avg_energy": totals["reviewed_energy"] / totals["total"],
+            "total": totals["total"]
         }
     
+    current = await stats_rollup.buckets_between_async(db, rollup, current_start)
+    previous = await stats_rollup.buckets_between_async(db, rollup, previous_start, current_start)
+    
     return {
-        "current": calculate_stats(current_checkins),
-        "previous": calculate_stats(previous_checkins),
+        "current": calculate_stats(current),
+        "previous": calculate_stats(previous),
         "period_days": days
     }
 
@@ -2093,23 +2245,26 @@ def get_stats_comparison(
 async def create_action_plan(
     github_username: str,
     plan: ActionPlanCreate,
-    db: Session = Depends(get_db)
+    background: bool = False
 ):
     """Create a new 30-day action plan with AI"""
-    user = db.query(models.User).filter(
-        models.User.github_username == github_username
-    ).first()
+    return await run_on_crew_pool("action_plans", handle_create_action_plan, github_username, plan, background)
+
+
+def handle_create_action_plan(github_username: str, plan: ActionPlanCreate, background: bool, db: Session):
+    """Blocking body of create_action_plan, run on the crew pool"""
+    user_id = resolve_user_id(db, github_username)
     
-    if not user:
+    if user_id is None:
         raise HTTPException(status_code=404, detail="User not found")
     
     # Get user context for AI
     github_analysis = db.query(models.GitHubAnalysis).filter(
-        models.GitHubAnalysis.user_id == user.id
+        models.GitHubAnalysis.user_id == user_id
     ).order_by(models.GitHubAnalysis.analyzed_at.desc()).first()
     
-    recent_checkins = db.query(models.CheckIn).filter(
-        models.CheckIn.user_id == user.id,
+    recent_checkins = db.query(models.CheckIn).options(load_only(*models.checkin_stats_columns)).filter(
+        models.CheckIn.user_id == user_id,
         models.CheckIn.shipped != None
     ).order_by(models.CheckIn.timestamp.desc()).limit(30).all()
     
@@ -2125,76 +2280,91 @@ async def create_action_plan(
         }
     }
     
+    if background:
+        print(f"🚀 Queued 30-day plan generation for {plan.focus_area}")
+        return enqueue_crew_job("action_plan", run_action_plan_generation, user_id, plan, user_context, user_id=user_id, github_username=github_username)
+    
     print(f"🚀 Generating 30-day plan for {plan.focus_area}...")
     
     # Generate plan with AI
     try:
-        ai_result = action_plan_service.generate_30_day_plan(
-            user_context=user_context,
-            focus_area=plan.focus_area,
-            skills_to_learn=plan.skills_to_learn,
-            skill_level=plan.current_skill_level,
-            hours_per_day=plan.available_hours_per_day
-        )
-        
-        # Create action plan
-        end_date = plan.end_date or (datetime.utcnow() + timedelta(days=30))
-        new_plan = models.ActionPlan(
-            user_id=user.id,
-            title=plan.title,
-            description=plan.description,
-            plan_type=plan.plan_type,
-            focus_area=plan.focus_area,
-            end_date=end_date,
-            ai_analysis=ai_result['analysis'],
-            skills_to_focus={"skills": ai_result['skills_to_focus']},
-            milestones=ai_result['milestones']
-        )
-        db.add(new_plan)
-        db.commit()
-        db.refresh(new_plan)
-        
-        # Create daily tasks
-        for task_data in ai_result['daily_tasks']:
-            task = models.DailyTask(
-                action_plan_id=new_plan.id,
-                day_number=task_data['day_number'],
-                date=new_plan.start_date + timedelta(days=task_data['day_number'] - 1),
-                title=task_data['title'],
-                description=task_data['description'],
-                task_type=task_data['task_type'],
-                difficulty=task_data['difficulty'],
-                estimated_time=task_data['estimated_time']
-            )
-            db.add(task)
-        
-        db.commit()
-        db.refresh(new_plan)
-        
-        print(f"✅ Action plan created with {len(ai_result['daily_tasks'])} daily tasks")
-        
-        return new_plan
+        new_plan = generate_action_plan(db, user_id, plan, user_context)
+        # Serialize here so relationship lazy-loads stay off the event loop
+        return ActionPlanResponse.model_validate(new_plan)
         
     except Exception as e:
         print(f"❌ Plan generation failed: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to generate plan: {str(e)}")
 
 
+def generate_action_plan(db: Session, user_id: int, plan: ActionPlanCreate, user_context: Dict) -> models.ActionPlan:
+    """Run the action plan crew and store the plan with its daily tasks"""
+    ai_result = action_plan_service.generate_30_day_plan(
+        user_context=user_context,
+        focus_area=plan.focus_area,
+        skills_to_learn=plan.skills_to_learn,
+        skill_level=plan.current_skill_level,
+        hours_per_day=plan.available_hours_per_day
+    )
+    
+    # Create action plan
+    end_date = plan.end_date or (datetime.utcnow() + timedelta(days=30))
+    new_plan = models.ActionPlan(
+        user_id=user_id,
+        title=plan.title,
+        description=plan.description,
+        plan_type=plan.plan_type,
+        focus_area=plan.focus_area,
+        end_date=end_date,
+        ai_analysis=ai_result['analysis'],
+        skills_to_focus={"skills": ai_result['skills_to_focus']},
+        milestones=ai_result['milestones']
+    )
+    db.add(new_plan)
+    db.commit()
+    db.refresh(new_plan)
+    
+    # Create daily tasks
+    for task_data in ai_result['daily_tasks']:
+        task = models.DailyTask(
+            action_plan_id=new_plan.id,
+            day_number=task_data['day_number'],
+            date=new_plan.start_date + timedelta(days=task_data['day_number'] - 1),
+            title=task_data['title'],
+            description=task_data['description'],
+            task_type=task_data['task_type'],
+            difficulty=task_data['difficulty'],
+            estimated_time=task_data['estimated_time']
+        )
+        db.add(task)
+    
+    db.commit()
+    db.refresh(new_plan)
+    
+    print(f"✅ Action plan created with {len(ai_result['daily_tasks'])} daily tasks")
+    
+    return new_plan
+
+
+def run_action_plan_generation(db: Session, user_id: int, plan: ActionPlanCreate, user_context: Dict) -> Dict:
+    """Job wrapper for generate_action_plan returning a serializable summary"""
+    new_plan = generate_action_plan(db, user_id, plan, user_context)
+    return {
+        "plan_id": new_plan.id,
+        "title": new_plan.title,
+        "daily_tasks": len(new_plan.daily_tasks)
+    }
+
+
 @app.get("/action-plans/{github_username}", response_model=List[ActionPlanResponse])
 def get_action_plans(
     github_username: str,
     status: str = None,
+    user_id: int = Depends(get_user_id),
     db: Session = Depends(get_db)
 ):
     """Get all action plans for user"""
-    user = db.query(models.User).filter(
-        models.User.github_username == github_username
-    ).first()
-    
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
-    query = db.query(models.ActionPlan).filter(models.ActionPlan.user_id == user.id)
+    query = db.query(models.ActionPlan).filter(models.ActionPlan.user_id == user_id)
     
     if status:
         query = query.filter(models.ActionPlan.status == status)
@@ -2211,46 +2381,42 @@ def get_action_plans(
 def get_action_plan_detail(
     github_username: str,
     plan_id: int,
+    user_id: int = Depends(get_user_id),
     db: Session = Depends(get_db)
 ):
     """Get detailed action plan"""
-    user = db.query(models.User).filter(
-        models.User.github_username == github_username
-    ).first()
-    
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
+    cache_key = f"action_plan:{github_username}:{plan_id}"
+    cached_plan = cache.get(cache_key)
+    if cached_plan:
+        return cached_plan
     
     plan = db.query(models.ActionPlan).options(
         joinedload(models.ActionPlan.daily_tasks)
     ).filter(
         models.ActionPlan.id == plan_id,
-        models.ActionPlan.user_id == user.id
+        models.ActionPlan.user_id == user_id
     ).first()
     
     if not plan:
         raise HTTPException(status_code=404, detail="Action plan not found")
     
-    return plan
+    plan_data = ActionPlanResponse.model_validate(plan).model_dump()
+    cache.set(cache_key, plan_data, ttl_seconds=300, tags=[user_tag(github_username), plan_tag(plan_id)])
+    
+    return plan_data
 
 
 @app.get("/action-plans/{github_username}/{plan_id}/today")
 def get_today_tasks(
     github_username: str,
     plan_id: int,
+    user_id: int = Depends(get_user_id),
     db: Session = Depends(get_db)
 ):
     """Get today's tasks from action plan"""
-    user = db.query(models.User).filter(
-        models.User.github_username == github_username
-    ).first()
-    
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
     plan = db.query(models.ActionPlan).filter(
         models.ActionPlan.id == plan_id,
-        models.ActionPlan.user_id == user.id
+        models.ActionPlan.user_id == user_id
     ).first()
     
     if not plan:
@@ -2277,16 +2443,10 @@ def complete_daily_task(
     plan_id: int,
     task_id: int,
     update: DailyTaskUpdate,
+    user_id: int = Depends(get_user_id),
     db: Session = Depends(get_db)
 ):
     """Mark task as complete and get AI feedback"""
-    user = db.query(models.User).filter(
-        models.User.github_username == github_username
-    ).first()
-    
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
     task = db.query(models.DailyTask).filter(
         models.DailyTask.id == task_id,
         models.DailyTask.action_plan_id == plan_id
@@ -2317,6 +2477,7 @@ def complete_daily_task(
         
         db.commit()
         db.refresh(task)
+        invalidate_plan_cache(plan_id)
         
         return {
             'message': 'Task completed',
@@ -2325,6 +2486,7 @@ def complete_daily_task(
         }
     except Exception as e:
         db.commit()
+        invalidate_plan_cache(plan_id)
         return {
             'message': 'Task completed (AI feedback unavailable)',
             'error': str(e)
@@ -2335,19 +2497,13 @@ def complete_daily_task(
 def advance_to_next_day(
     github_username: str,
     plan_id: int,
+    user_id: int = Depends(get_user_id),
     db: Session = Depends(get_db)
 ):
     """Move to next day in plan"""
-    user = db.query(models.User).filter(
-        models.User.github_username == github_username
-    ).first()
-    
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
     plan = db.query(models.ActionPlan).filter(
         models.ActionPlan.id == plan_id,
-        models.ActionPlan.user_id == user.id
+        models.ActionPlan.user_id == user_id
     ).first()
     
     if not plan:
@@ -2389,6 +2545,7 @@ def advance_to_next_day(
         plan.completed_at = datetime.utcnow()
     
     db.commit()
+    invalidate_plan_cache(plan_id)
     
     return {
         'message': 'Advanced to next day',
@@ -2404,24 +2561,18 @@ def advance_to_next_day(
 def log_skill_focus(
     github_username: str,
     focus: SkillFocusCreate,
+    user_id: int = Depends(get_user_id),
     db: Session = Depends(get_db)
 ):
     """Log time spent on a skill"""
-    user = db.query(models.User).filter(
-        models.User.github_username == github_username
-    ).first()
-    
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
     # Find active action plan
     active_plan = db.query(models.ActionPlan).filter(
-        models.ActionPlan.user_id == user.id,
+        models.ActionPlan.user_id == user_id,
         models.ActionPlan.status == 'active'
     ).first()
     
     log = models.SkillFocusLog(
-        user_id=user.id,
+        user_id=user_id,
         action_plan_id=active_plan.id if active_plan else None,
         skill_name=focus.skill_name,
         time_spent=focus.time_spent,
@@ -2432,54 +2583,51 @@ def log_skill_focus(
     
     db.add(log)
     db.commit()
+    invalidate_user_cache(github_username)
     
     return {"message": "Skill focus logged", "log_id": log.id}
 
 
 @app.get("/skill-focus/{github_username}/summary")
+@cache_response(ttl=300, max_size=500, tags=lambda github_username, **_: [user_tag(github_username)])
 def get_skill_focus_summary(
     github_username: str,
     days: int = 7,
+    user_id: int = Depends(get_user_id),
     db: Session = Depends(get_db)
 ):
     """Get summary of skill focus time"""
-    user = db.query(models.User).filter(
-        models.User.github_username == github_username
-    ).first()
-    
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
+    import numpy as np
+    import analytics
     
     since = datetime.utcnow() - timedelta(days=days)
     
-    logs = db.query(models.SkillFocusLog).filter(
-        models.SkillFocusLog.user_id == user.id,
-        models.SkillFocusLog.focus_date >= since
-    ).all()
+    logs = analytics.skill_focus_history(db, user_id, since=since)
     
     # Aggregate by skill
-    skill_summary = {}
-    for log in logs:
-        if log.skill_name not in skill_summary:
-            skill_summary[log.skill_name] = {
-                'total_time': 0,
-                'sessions': 0,
-                'avg_confidence': []
-            }
-        skill_summary[log.skill_name]['total_time'] += log.time_spent
-        skill_summary[log.skill_name]['sessions'] += 1
-        skill_summary[log.skill_name]['avg_confidence'].append(log.confidence_level)
-    
-    # Calculate averages
-    for skill in skill_summary:
-        confidences = skill_summary[skill]['avg_confidence']
-        skill_summary[skill]['avg_confidence'] = sum(confidences) / len(confidences) if confidences else 0
+    skills, index = analytics.group_index(logs["skill"])
+    total_time = analytics.group_sum(index, logs["time_spent"], skills.size)
+    sessions = np.bincount(index, minlength=skills.size)
+    
+    # Average confidence over the logs that have one
+    rated = ~np.isnan(logs["confidence"])
+    confidence_sum = analytics.group_sum(index[rated], logs["confidence"][rated], skills.size)
+    confidence_count = np.bincount(index[rated], minlength=skills.size)
+    
+    skill_summary = {
+        skill: {
+            'total_time': int(total_time[i]),
+            'sessions': int(sessions[i]),
+            'avg_confidence': float(confidence_sum[i] / confidence_count[i]) if confidence_count[i] else 0
+        }
+        for i, skill in enumerate(skills)
+    }
     
     return {
         'period_days': days,
         'skills': skill_summary,
-        'total_time': sum(s['total_time'] for s in skill_summary.values()),
-        'total_sessions': len(logs)
+        'total_time': int(total_time.sum()),
+        'total_sessions': int(logs["skill"].size)
     }
 
 
@@ -2487,16 +2635,10 @@ def get_skill_focus_summary(
 def create_skill_reminder(
     github_username: str,
     reminder: SkillReminderCreate,
+    user_id: int = Depends(get_user_id),
     db: Session = Depends(get_db)
 ):
     """Create a skill focus reminder"""
-    user = db.query(models.User).filter(
-        models.User.github_username == github_username
-    ).first()
-    
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
     # Calculate next reminder date
     if reminder.frequency == 'daily':
         next_date = datetime.utcnow() + timedelta(days=1)
@@ -2506,7 +2648,7 @@ def create_skill_reminder(
         next_date = datetime.utcnow() + timedelta(days=1)
     
     new_reminder = models.SkillReminder(
-        user_id=user.id,
+        user_id=user_id,
         skill_name=reminder.skill_name,
         reminder_message=reminder.reminder_message,
         priority=reminder.priority,
@@ -2525,18 +2667,12 @@ def create_skill_reminder(
 def get_skill_reminders(
     github_username: str,
     active_only: bool = True,
+    user_id: int = Depends(get_user_id),
     db: Session = Depends(get_db)
 ):
     """Get all skill reminders"""
-    user = db.query(models.User).filter(
-        models.User.github_username == github_username
-    ).first()
-    
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
     query = db.query(models.SkillReminder).filter(
-        models.SkillReminder.user_id == user.id
+        models.SkillReminder.user_id == user_id
     )
     
     if active_only:
@@ -2549,19 +2685,13 @@ def get_skill_reminders(
 def start_pomodoro_session(
     github_username: str,
     session: models.PomodoroSessionCreate,
+    user_id: int = Depends(get_user_id),
     db: Session = Depends(get_db)
 ):
     """Start a new Pomodoro session"""
-    user = db.query(models.User).filter(
-        models.User.github_username == github_username
-    ).first()
-    
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
     # Check if there's an active session
     active_session = db.query(models.PomodoroSession).filter(
-        models.PomodoroSession.user_id == user.id,
+        models.PomodoroSession.user_id == user_id,
         models.PomodoroSession.completed == False,
         models.PomodoroSession.paused_at == None
     ).first()
@@ -2573,7 +2703,7 @@ def start_pomodoro_session(
         }
     
     new_session = models.PomodoroSession(
-        user_id=user.id,
+        user_id=user_id,
         checkin_id=session.checkin_id,
         session_type=session.session_type,
         duration_minutes=session.duration_minutes,
@@ -2593,18 +2723,12 @@ def start_pomodoro_session(
 @app.get("/pomodoro/{github_username}/active")
 def get_active_session(
     github_username: str,
+    user_id: int = Depends(get_user_id),
     db: Session = Depends(get_db)
 ):
     """Get current active Pomodoro session"""
-    user = db.query(models.User).filter(
-        models.User.github_username == github_username
-    ).first()
-    
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
     active_session = db.query(models.PomodoroSession).filter(
-        models.PomodoroSession.user_id == user.id,
+        models.PomodoroSession.user_id == user_id,
         models.PomodoroSession.completed == False
     ).order_by(models.PomodoroSession.started_at.desc()).first()
     
@@ -2622,19 +2746,13 @@ def complete_pomodoro_session(
     github_username: str,
     session_id: int,
     update: models.PomodoroSessionUpdate,
+    user_id: int = Depends(get_user_id),
     db: Session = Depends(get_db)
 ):
     """Complete a Pomodoro session"""
-    user = db.query(models.User).filter(
-        models.User.github_username == github_username
-    ).first()
-    
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
     session = db.query(models.PomodoroSession).filter(
         models.PomodoroSession.id == session_id,
-        models.PomodoroSession.user_id == user.id
+        models.PomodoroSession.user_id == user_id
     ).first()
     
     if not session:
@@ -2659,19 +2777,13 @@ def complete_pomodoro_session(
 def pause_pomodoro_session(
     github_username: str,
     session_id: int,
+    user_id: int = Depends(get_user_id),
     db: Session = Depends(get_db)
 ):
     """Pause a Pomodoro session"""
-    user = db.query(models.User).filter(
-        models.User.github_username == github_username
-    ).first()
-    
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
     session = db.query(models.PomodoroSession).filter(
         models.PomodoroSession.id == session_id,
-        models.PomodoroSession.user_id == user.id
+        models.PomodoroSession.user_id == user_id
     ).first()
     
     if not session:
@@ -2687,19 +2799,13 @@ def pause_pomodoro_session(
 def resume_pomodoro_session(
     github_username: str,
     session_id: int,
+    user_id: int = Depends(get_user_id),
     db: Session = Depends(get_db)
 ):
     """Resume a paused Pomodoro session"""
-    user = db.query(models.User).filter(
-        models.User.github_username == github_username
-    ).first()
-    
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
     session = db.query(models.PomodoroSession).filter(
         models.PomodoroSession.id == session_id,
-        models.PomodoroSession.user_id == user.id
+        models.PomodoroSession.user_id == user_id
     ).first()
     
     if not session:
@@ -2712,49 +2818,53 @@ def resume_pomodoro_session(
 
 
 @app.get("/pomodoro/{github_username}/stats", response_model=models.PomodoroStatsResponse)
-def get_pomodoro_stats(
+async def get_pomodoro_stats(
     github_username: str,
     days: int = 30,
-    db: Session = Depends(get_db)
+    user_id: int = Depends(get_user_id_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get Pomodoro statistics"""
-    user = db.query(models.User).filter(
-        models.User.github_username == github_username
-    ).first()
-    
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
+    import numpy as np
+    import analytics
     
     since = datetime.utcnow() - timedelta(days=days)
+    today_start = datetime.combine(datetime.now().date(), datetime.min.time())
     
-    sessions = db.query(models.PomodoroSession).filter(
-        models.PomodoroSession.user_id == user.id,
-        models.PomodoroSession.started_at >= since
-    ).all()
+    # One pass covers both the stats window and today's sessions
+    def load_history(session: Session):
+        return (
+            analytics.pomodoro_history(session, user_id, since=min(since, today_start)),
+            analytics.completed_pomodoro_days(session, user_id)
+        )
     
-    completed_sessions = [s for s in sessions if s.completed]
-    work_sessions = [s for s in completed_sessions if s.session_type == 'work']
+    sessions, completed_days = await db.run_sync(load_history)
+    
+    started_at = sessions["started_at"]
+    in_window = started_at >= np.datetime64(since)
+    completed = in_window & sessions["completed"]
+    work = completed & sessions["work"]
     
     # Today's sessions
-    today_start = datetime.combine(datetime.now().date(), datetime.min.time())
-    sessions_today = db.query(models.PomodoroSession).filter(
-        models.PomodoroSession.user_id == user.id,
-        models.PomodoroSession.started_at >= today_start
-    ).count()
+    sessions_today = int(np.count_nonzero(started_at >= np.datetime64(today_start)))
     
     # Calculate streaks
-    current_streak, best_streak = calculate_pomodoro_streaks(user.id, db)
+    current_streak, best_streak = analytics.day_streaks(completed_days, datetime.now().date())
     
     # Average focus rating
-    rated_sessions = [s for s in completed_sessions if s.focus_rating]
-    avg_focus = sum(s.focus_rating for s in rated_sessions) / len(rated_sessions) if rated_sessions else 0
+    focus = sessions["focus_rating"]
+    rated = completed & (np.nan_to_num(focus) != 0)
+    avg_focus = float(focus[rated].mean()) if rated.any() else 0
+    
+    total_sessions = int(np.count_nonzero(in_window))
+    completed_sessions = int(np.count_nonzero(completed))
     
     return {
-        "total_sessions": len(sessions),
-        "completed_sessions": len(completed_sessions),
-        "total_work_minutes": sum(s.duration_minutes for s in work_sessions),
+        "total_sessions": total_sessions,
+        "completed_sessions": completed_sessions,
+        "total_work_minutes": int(sessions["duration"][work].sum()),
         "avg_focus_rating": round(avg_focus, 2),
-        "completion_rate": round(len(completed_sessions) / len(sessions) * 100, 1) if sessions else 0,
+        "completion_rate": round(completed_sessions / total_sessions * 100, 1) if total_sessions else 0,
         "sessions_today": sessions_today,
         "current_streak": current_streak,
         "best_streak": best_streak
@@ -2764,69 +2874,24 @@ def get_pomodoro_stats(
 @app.get("/pomodoro/{github_username}/history")
 def get_pomodoro_history(
     github_username: str,
+    response: Response,
     limit: int = 50,
+    cursor: Optional[str] = None,
+    user_id: int = Depends(get_user_id),
     db: Session = Depends(get_db)
 ):
     """Get Pomodoro session history"""
-    user = db.query(models.User).filter(
-        models.User.github_username == github_username
-    ).first()
-    
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
-    sessions = db.query(models.PomodoroSession).filter(
-        models.PomodoroSession.user_id == user.id
-    ).order_by(models.PomodoroSession.started_at.desc()).limit(limit).all()
+    sessions = keyset(
+        db.query(models.PomodoroSession).filter(models.PomodoroSession.user_id == user_id),
+        models.PomodoroSession.started_at, models.PomodoroSession.id, cursor, limit
+    ).all()
     
-    return {"sessions": sessions}
+    sessions, next_cursor = next_page(sessions, limit, "started_at", response)
+    return {"sessions": sessions, "next_cursor": next_cursor}
 
 
-def calculate_pomodoro_streaks(user_id: int, db: Session) -> tuple:
-    """Calculate current and best Pomodoro streaks"""
-    # Get all days with completed sessions
-    sessions = db.query(models.PomodoroSession).filter(
-        models.PomodoroSession.user_id == user_id,
-        models.PomodoroSession.completed == True
-    ).order_by(models.PomodoroSession.started_at.desc()).all()
-    
-    if not sessions:
-        return 0, 0
-    
-    # Group by date
-    dates = set()
-    for session in sessions:
-        dates.add(session.started_at.date())
-    
-    sorted_dates = sorted(dates, reverse=True)
-    
-    # Calculate current streak
-    current_streak = 0
-    today = datetime.now().date()
-    check_date = today
-    
-    for date in sorted_dates:
-        if date == check_date or (check_date - date).days == 1:
-            current_streak += 1
-            check_date = date
-        else:
-            break
-    
-    # Calculate best streak
-    best_streak = 0
-    temp_streak = 1
-    
-    for i in range(len(sorted_dates) - 1):
-        if (sorted_dates[i] - sorted_dates[i + 1]).days == 1:
-            temp_streak += 1
-            best_streak = max(best_streak, temp_streak)
-        else:
-            temp_streak = 1
-    
-    best_streak = max(best_streak, temp_streak, current_streak)
-    
-    return current_streak, best_streak
-
 if __name__ == "__main__":
     import uvicorn
+    # Local runs migrate first; deployments run `python migrations.py` as a release step
+    init_db()
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
@@ -1,133 +1,435 @@
 # backend/middleware.py
-from fastapi import Request, HTTPException
-from datetime import datetime, timedelta
-from collections import defaultdict
+from fastapi import Request, Response, params
+from fastapi.responses import JSONResponse
+from sqlalchemy.orm import Session
+from collections import OrderedDict, defaultdict
 import time
 import functools
-from typing import Dict, Tuple
+import inspect
+import ipaddress
+import math
+import os
+import re
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from cache import on_invalidate
+
+# Sliding-window-counter rate limiting.
+# Each key keeps only the counts for the current and previous fixed window;
+# the previous count is weighted by how much of it still overlaps the
+# sliding window, so every check is O(1) regardless of traffic.
+def _sliding_window(now: float, window: int, current: int, previous: int, max_requests: int) -> Tuple[bool, int, int]:
+    """Decide one request from the window counts: (is_allowed, remaining, reset_seconds)"""
+    elapsed = (now % window) / window
+    estimated = previous * (1 - elapsed) + current
+    reset = int(math.ceil(window - (now % window)))
+    if estimated + 1 > max_requests:
+        return False, 0, reset
+    return True, max(0, int(max_requests - estimated - 1)), reset
+
 
-# In-memory rate limiter (use Redis in production)
 class RateLimiter:
-    def __init__(self):
-        self.requests: Dict[str, list] = defaultdict(list)
-        self.cleanup_interval = 60  # Cleanup old entries every 60 seconds
-        self.last_cleanup = time.time()
-    
-    def is_allowed(self, key: str, max_requests: int = 100, window: int = 60) -> Tuple[bool, int]:
+    """In-process limiter; the least recently seen keys are dropped past ``max_keys``"""
+
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        # key -> [window_index, current_count, previous_count]
+        self.windows: "OrderedDict[str, list]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def is_allowed(self, key: str, max_requests: int = 100, window: int = 60) -> Tuple[bool, int, int]:
         """
         Check if request is allowed.
-        Returns: (is_allowed, remaining_requests)
+        Returns: (is_allowed, remaining_requests, reset_seconds)
         """
-        current_time = time.time()
-        
-        # Periodic cleanup
-        if current_time - self.last_cleanup > self.cleanup_interval:
-            self.cleanup()
-        
-        # Get requests for this key
-        requests = self.requests[key]
-        
-        # Remove old requests outside the window
-        cutoff_time = current_time - window
-        requests = [req_time for req_time in requests if req_time > cutoff_time]
-        self.requests[key] = requests
-        
-        # Check if under limit
-        if len(requests) < max_requests:
-            requests.append(current_time)
-            return True, max_requests - len(requests)
-        
-        return False, 0
-    
-    def cleanup(self):
-        """Remove old entries to prevent memory leak"""
-        current_time = time.time()
-        keys_to_delete = []
-        
-        for key, requests in self.requests.items():
-            # Remove requests older than 5 minutes
-            self.requests[key] = [r for r in requests if current_time - r < 300]
-            
-            # Mark for deletion if empty
-            if not self.requests[key]:
-                keys_to_delete.append(key)
-        
-        for key in keys_to_delete:
-            del self.requests[key]
-        
-        self.last_cleanup = current_time
-
-rate_limiter = RateLimiter()
+        _, results = self.check_all([(key, max_requests, window)])
+        return results[0]
+
+    def check_all(self, budgets: List[Tuple[str, int, int]]) -> Tuple[bool, List[Tuple[bool, int, int]]]:
+        """Decide a request against several (key, max_requests, window) budgets.
+
+        The request is only counted when every budget allows it, so a
+        rejection by one window doesn't use up the others.
+        """
+        now = time.time()
+        with self._lock:
+            states = [self._state(key, int(now // window)) for key, _, window in budgets]
+            results = [
+                _sliding_window(now, window, state[1], state[2], max_requests)
+                for state, (_, max_requests, window) in zip(states, budgets)
+            ]
+            allowed = all(result[0] for result in results)
+            if allowed:
+                for state in states:
+                    state[1] += 1
+            return allowed, results
+
+    def _state(self, key: str, index: int) -> list:
+        state = self.windows.get(key)
+        if state is None:
+            state = self.windows[key] = [index, 0, 0]
+            if len(self.windows) > self.max_keys:
+                self.windows.popitem(last=False)
+        else:
+            self.windows.move_to_end(key)
+
+        if state[0] != index:
+            state[2] = state[1] if state[0] == index - 1 else 0
+            state[1] = 0
+            state[0] = index
+        return state
+
+
+class RedisRateLimiter:
+    """Limiter shared by all workers, storing per-window counters in Redis"""
+
+    def __init__(self, client=None, url: Optional[str] = None, prefix: str = "sage:ratelimit:"):
+        if client is None:
+            try:
+                import redis
+            except ImportError as e:
+                raise ImportError("RATE_LIMIT_BACKEND=redis requires the 'redis' package (pip install redis)") from e
+            client = redis.Redis.from_url(url or "redis://localhost:6379/0")
+        self.client = client
+        self.prefix = prefix
+
+    def is_allowed(self, key: str, max_requests: int = 100, window: int = 60) -> Tuple[bool, int, int]:
+        _, results = self.check_all([(key, max_requests, window)])
+        return results[0]
+
+    def check_all(self, budgets: List[Tuple[str, int, int]]) -> Tuple[bool, List[Tuple[bool, int, int]]]:
+        """Same contract as ``RateLimiter.check_all``, one MGET and one pipeline per request"""
+        now = time.time()
+        window_keys = []
+        for key, _, window in budgets:
+            index = int(now // window)
+            window_keys.append((f"{self.prefix}{key}:{index}", f"{self.prefix}{key}:{index - 1}"))
+
+        try:
+            counts = self.client.mget([k for pair in window_keys for k in pair])
+        except Exception as e:
+            # Fail open: a limiter outage shouldn't take the API down
+            print(f"⚠️ Rate limiter unavailable: {str(e)}")
+            return True, [(True, max_requests, window) for _, max_requests, window in budgets]
+
+        results = [
+            _sliding_window(now, window, int(counts[2 * i] or 0), int(counts[2 * i + 1] or 0), max_requests)
+            for i, (_, max_requests, window) in enumerate(budgets)
+        ]
+        allowed = all(result[0] for result in results)
+        if allowed:
+            try:
+                pipe = self.client.pipeline()
+                for (current_key, _), (_, _, window) in zip(window_keys, budgets):
+                    pipe.incr(current_key)
+                    pipe.expire(current_key, window * 2)
+                pipe.execute()
+            except Exception as e:
+                # Redis went away after the read; the request is still allowed, just not counted
+                print(f"⚠️ Rate limiter could not record request: {str(e)}")
+        return allowed, results
+
+
+def create_rate_limiter():
+    """Build the limiter selected by RATE_LIMIT_BACKEND (memory or redis)"""
+    if os.getenv("RATE_LIMIT_BACKEND", "memory").lower() == "redis":
+        return RedisRateLimiter(url=os.getenv("REDIS_URL"))
+    return RateLimiter()
+
+rate_limiter = create_rate_limiter()
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+
+# Crew/LLM endpoints: (method, path pattern). Everything else gets the default budget.
+LLM_ENDPOINTS = [
+    ("POST", re.compile(r"^/analyze-github/[^/]+$")),
+    ("POST", re.compile(r"^/checkins/[^/]+$")),
+    ("PATCH", re.compile(r"^/checkins/\d+/evening$")),
+    ("POST", re.compile(r"^/chat/[^/]+(/stream)?$")),
+    ("POST", re.compile(r"^/life-decisions/[^/]+(/\d+/reanalyze)?$")),
+    ("POST", re.compile(r"^/life-decisions/\d+/evaluate$")),
+    ("POST", re.compile(r"^/commitments/\d+/review$")),
+    ("POST", re.compile(r"^/goals/[^/]+(/\d+/progress)?$")),
+    ("GET", re.compile(r"^/goals/[^/]+/weekly-review$")),
+    ("POST", re.compile(r"^/action-plans/[^/]+(/\d+/tasks/\d+/complete)?$")),
+]
+
+# (limit, window seconds) budgets; a request must fit all of its class's budgets
+RATE_LIMITS = {
+    "default": [(int(os.getenv("RATE_LIMIT_PER_MINUTE", "120")), 60)],
+    "llm": [
+        (int(os.getenv("RATE_LIMIT_LLM_PER_MINUTE", "10")), 60),
+        (int(os.getenv("RATE_LIMIT_LLM_PER_HOUR", "60")), 3600),
+    ],
+}
+
+SKIP_PATHS = {"/", "/docs", "/redoc", "/openapi.json"}
+
+
+def rate_limit_class(method: str, path: str) -> str:
+    for endpoint_method, pattern in LLM_ENDPOINTS:
+        if method == endpoint_method and pattern.match(path):
+            return "llm"
+    return "default"
+
+
+# Users named in the path aren't authenticated, so every budget is also
+# kept per client IP. One IP gets this many users' worth of requests, which
+# leaves room for a shared NAT but caps username rotation.
+USERS_PER_IP = int(os.getenv("RATE_LIMIT_USERS_PER_IP", "5"))
+
+
+# Reverse proxies (IPs or CIDRs) whose X-Forwarded-For is believed. Empty means
+# the header is ignored, since any client could send it to pick its own bucket.
+TRUSTED_PROXIES = [
+    ipaddress.ip_network(proxy.strip(), strict=False)
+    for proxy in os.getenv("RATE_LIMIT_TRUSTED_PROXIES", "").split(",")
+    if proxy.strip()
+]
+
+
+def _is_trusted_proxy(host: str) -> bool:
+    try:
+        address = ipaddress.ip_address(host)
+    except ValueError:
+        return False
+    return any(address in network for network in TRUSTED_PROXIES)
+
+
+def client_ip(request: Request) -> str:
+    """The caller's address, taken from X-Forwarded-For when a trusted proxy sent it.
+
+    The forwarded chain is read from the right and the first hop that isn't
+    one of our proxies wins, so addresses the client prepended are ignored.
+    """
+    host = request.client.host if request.client else "unknown"
+    if not _is_trusted_proxy(host):
+        return host
+
+    hops = [hop.strip() for value in request.headers.getlist("x-forwarded-for") for hop in value.split(",")]
+    for hop in reversed([hop for hop in hops if hop]):
+        if not _is_trusted_proxy(hop):
+            return hop
+        host = hop
+    return host
+
+
+def rate_limit_identities(request: Request) -> List[Tuple[str, int]]:
+    """(identity, budget multiplier) pairs a request is counted against.
+
+    The client IP always; when the path names a user, also that user as
+    seen from that IP, so spoofing someone's username from another
+    address can't spend their budget.
+    """
+    ip = f"ip:{client_ip(request)}"
+    segments = [s for s in request.url.path.split("/") if s]
+    # Routes are /<resource>/<github_username>/...; numeric ids aren't users
+    if len(segments) >= 2 and not segments[1].isdigit():
+        return [(f"{ip}:user:{segments[1]}", 1), (ip, USERS_PER_IP)]
+    return [(ip, 1)]
+
 
 async def rate_limit_middleware(request: Request, call_next):
     """Rate limiting middleware"""
-    
-    # Get client identifier (IP or user ID)
-    client_id = request.client.host if request.client else "unknown"
-    
-    # Skip rate limiting for certain paths
-    skip_paths = ["/", "/docs", "/redoc", "/openapi.json"]
-    if request.url.path in skip_paths:
+    if not RATE_LIMIT_ENABLED or request.method == "OPTIONS" or request.url.path in SKIP_PATHS:
         return await call_next(request)
-    
-    # Different limits for different endpoints
-    if "chat" in request.url.path or "analyze" in request.url.path:
-        max_requests, window = 10, 60  # 10 requests per minute for AI endpoints
-    else:
-        max_requests, window = 100, 60  # 100 requests per minute for other endpoints
-    
-    is_allowed, remaining = rate_limiter.is_allowed(
-        f"{client_id}:{request.url.path}",
-        max_requests,
-        window
-    )
-    
-    if not is_allowed:
-        raise HTTPException(
+
+    limit_class = rate_limit_class(request.method, request.url.path)
+    budgets = [
+        (f"{identity}:{limit_class}:{window}", max_requests * multiplier, window)
+        for identity, multiplier in rate_limit_identities(request)
+        for max_requests, window in RATE_LIMITS[limit_class]
+    ]
+    allowed, results = rate_limiter.check_all(budgets)
+
+    if not allowed:
+        # Retry once the longest rejecting window has room again
+        max_requests, reset = max(
+            ((budget[1], result[2]) for budget, result in zip(budgets, results) if not result[0]),
+            key=lambda rejected: rejected[1]
+        )
+        return JSONResponse(
             status_code=429,
-            detail="Too many requests. Please slow down.",
-            headers={"Retry-After": str(window)}
+            content={"detail": "Too many requests. Please slow down."},
+            headers={
+                "Retry-After": str(reset),
+                "X-RateLimit-Limit": str(max_requests),
+                "X-RateLimit-Remaining": "0",
+                "X-RateLimit-Reset": str(reset),
+            }
         )
-    
+
+    # Report the tightest budget in the headers
+    (_, max_requests, _), (_, remaining, reset) = min(zip(budgets, results), key=lambda pair: pair[1][1])
     response = await call_next(request)
-    
-    # Add rate limit headers
-    response.headers["X-RateLimit-Limit"] = str(max_requests)
-    response.headers["X-RateLimit-Remaining"] = str(remaining)
-    
+    response.headers.update({
+        "X-RateLimit-Limit": str(max_requests),
+        "X-RateLimit-Remaining": str(remaining),
+        "X-RateLimit-Reset": str(reset),
+    })
     return response
 
 
-# Simple cache decorator
-cache_store: Dict[str, Tuple[any, float]] = {}
+# Endpoint response cache
+_response_caches: Dict[str, "ResponseCache"] = {}
+
+# Values that can be injected into endpoints but never belong in a cache key
+_UNKEYED_TYPES = (Request, Response, Session)
+
+
+class ResponseCache:
+    """Per-endpoint LRU store with a TTL, a size cap, tags and hit/miss counters"""
+
+    def __init__(self, name: str, ttl: int, max_size: int):
+        self.name = name
+        self.ttl = ttl
+        self.max_size = max_size
+        # key -> (value, expires_at, tags)
+        self._store: "OrderedDict[str, Tuple[Any, float, Tuple[str, ...]]]" = OrderedDict()
+        self._tag_keys: Dict[str, Set[str]] = defaultdict(set)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        with self._lock:
+            entry = self._store.get(key)
+            if entry is not None and time.monotonic() < entry[1]:
+                self._store.move_to_end(key)
+                self.hits += 1
+                return True, entry[0]
+            if entry is not None:
+                self._remove(key)
+            self.misses += 1
+            return False, None
+
+    def set(self, key: str, value: Any, tags: Iterable[str] = ()):
+        tags = tuple(tags)
+        with self._lock:
+            if key in self._store:
+                self._remove(key)
+            self._store[key] = (value, time.monotonic() + self.ttl, tags)
+            for tag in tags:
+                self._tag_keys[tag].add(key)
+            if len(self._store) > self.max_size:
+                self._remove(next(iter(self._store)))
+                self.evictions += 1
+
+    def invalidate_tag(self, tag: str) -> int:
+        with self._lock:
+            keys = self._tag_keys.pop(tag, ())
+            for key in keys:
+                self._remove(key)
+            self.invalidations += len(keys)
+            return len(keys)
 
-def cache_response(ttl: int = 300):
-    """Cache decorator with TTL in seconds"""
+    def _remove(self, key: str):
+        _, _, tags = self._store.pop(key)
+        for tag in tags:
+            keys = self._tag_keys.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tag_keys[tag]
+
+    def clear(self):
+        with self._lock:
+            self._store.clear()
+            self._tag_keys.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "ttl": self.ttl,
+                "max_size": self.max_size,
+                "size": len(self._store),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0
+            }
+
+
+@on_invalidate
+def invalidate_response_tag(tag: str) -> int:
+    """Drop every cached endpoint response stored with ``tag``"""
+    return sum(store.invalidate_tag(tag) for store in list(_response_caches.values()))
+
+
+def _key_params(func, vary_on: Optional[List[str]]) -> List[str]:
+    """Parameters that identify a response: ``vary_on`` or every non-injected parameter"""
+    if vary_on is not None:
+        return list(vary_on)
+
+    keyed = []
+    for name, param in inspect.signature(func).parameters.items():
+        if isinstance(param.default, params.Depends):
+            continue
+        if isinstance(param.annotation, type) and issubclass(param.annotation, _UNKEYED_TYPES):
+            continue
+        keyed.append(name)
+    return keyed
+
+
+def cache_response(ttl: int = 300, max_size: int = 1000, vary_on: Optional[List[str]] = None,
+                   tags: Optional[Callable] = None):
+    """Cache an endpoint's response for ``ttl`` seconds.
+
+    Keys are built from the endpoint's declared path/query parameters only
+    (``vary_on`` narrows them), so injected sessions and requests never leak
+    into the key. Each endpoint keeps its own LRU of at most ``max_size``
+    entries. ``tags`` receives the call's arguments by name and returns the
+    cache.py tags (e.g. ``user_tag``) to store the response under, so the
+    ``invalidate_*_cache`` helpers evict it on writes. Entries live in this
+    process only. Works on both sync and async endpoints.
+    """
     def decorator(func):
+        signature = inspect.signature(func)
+        key_params = _key_params(func, vary_on)
+        store = ResponseCache(func.__name__, ttl, max_size)
+        _response_caches[func.__name__] = store
+
+        def bind(args, kwargs) -> Tuple[str, Tuple[str, ...]]:
+            """Cache key and tags for one call"""
+            bound = signature.bind_partial(*args, **kwargs)
+            bound.apply_defaults()
+            key = repr(tuple((name, bound.arguments.get(name)) for name in key_params))
+            return key, tuple(tags(**bound.arguments)) if tags else ()
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                key, entry_tags = bind(args, kwargs)
+                hit, value = store.get(key)
+                if hit:
+                    return value
+                result = await func(*args, **kwargs)
+                store.set(key, result, entry_tags)
+                return result
+
+            async_wrapper.cache = store
+            return async_wrapper
+
         @functools.wraps(func)
-        async def wrapper(*args, **kwargs):
-            # Create cache key
-            cache_key = f"{func.__name__}:{str(args)}:{str(kwargs)}"
-            
-            # Check cache
-            if cache_key in cache_store:
-                cached_value, timestamp = cache_store[cache_key]
-                if time.time() - timestamp < ttl:
-                    return cached_value
-            
-            # Call function and cache result
-            result = await func(*args, **kwargs)
-            cache_store[cache_key] = (result, time.time())
-            
-            # Cleanup old cache entries (simple LRU)
-            if len(cache_store) > 1000:
-                oldest_keys = sorted(
-                    cache_store.items(),
-                    key=lambda x: x[1][1]
-                )[:100]
-                for key, _ in oldest_keys:
-                    del cache_store[key]
-            
+        def wrapper(*args, **kwargs):
+            key, entry_tags = bind(args, kwargs)
+            hit, value = store.get(key)
+            if hit:
+                return value
+            result = func(*args, **kwargs)
+            store.set(key, result, entry_tags)
             return result
+
+        wrapper.cache = store
         return wrapper
     return decorator
+
+
+def cache_response_stats() -> Dict[str, Dict]:
+    """Hit-rate stats for every endpoint decorated with ``cache_response``"""
+    return {name: store.stats() for name, store in _response_caches.items()}
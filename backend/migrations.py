@@ -0,0 +1,160 @@
+# backend/migrations.py
+from datetime import datetime
+from typing import Callable, List, Tuple
+import sys
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+from database import Base, engine
+import models  # noqa: F401 - registers the tables on Base.metadata
+
+# Arbitrary key so concurrent deploys on Postgres apply migrations one at a time
+MIGRATION_LOCK_ID = 7264901
+
+
+def _false(conn: Connection) -> str:
+    """Boolean false as it's rendered in partial index predicates.
+
+    Must match how SQLAlchemy renders ``column == False`` on the dialect,
+    or the planner won't match queries to the partial index.
+    """
+    return "false" if conn.dialect.name == "postgresql" else "0"
+
+
+def _execute_all(conn: Connection, statements: List[str]):
+    for statement in statements:
+        conn.execute(text(statement))
+
+
+def baseline_indexes(conn: Connection):
+    """Indexes init_db used to create on every start"""
+    _execute_all(conn, [
+        "CREATE INDEX IF NOT EXISTS idx_checkins_user_timestamp ON checkins (user_id, timestamp DESC)",
+        "CREATE INDEX IF NOT EXISTS idx_goals_user_status ON goals (user_id, status)",
+        "CREATE INDEX IF NOT EXISTS idx_notifications_user_read ON notifications (user_id, read, created_at DESC)",
+    ])
+
+
+def query_shape_indexes(conn: Connection):
+    """Indexes matching the filters and orderings the endpoints actually run"""
+    false = _false(conn)
+    _execute_all(conn, [
+        # Keyset pages and recent-N reads order by (timestamp, id) per user
+        "CREATE INDEX IF NOT EXISTS idx_checkins_user_timestamp_id ON checkins (user_id, timestamp DESC, id DESC)",
+        "DROP INDEX IF EXISTS idx_checkins_user_timestamp",
+        # Pending commitments, reminders: shipped IS NULL
+        "CREATE INDEX IF NOT EXISTS idx_checkins_unreviewed ON checkins (user_id, timestamp DESC) "
+        "WHERE shipped IS NULL",
+        # Review history, goal context, pattern alerts: shipped IS NOT NULL
+        "CREATE INDEX IF NOT EXISTS idx_checkins_reviewed ON checkins (user_id, timestamp DESC) "
+        "WHERE shipped IS NOT NULL",
+
+        # Dedup checks (type + created_at window) and the stats GROUP BY
+        "CREATE INDEX IF NOT EXISTS idx_notifications_user_type_created "
+        "ON notifications (user_id, notification_type, created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_notifications_user_created_id ON notifications (user_id, created_at DESC, id DESC)",
+        # unread_only lists and mark-all-read
+        f"CREATE INDEX IF NOT EXISTS idx_notifications_unread ON notifications (user_id, created_at DESC, id DESC) "
+        f"WHERE read = {false}",
+
+        # Stats window, streak days and the active-session lookup
+        "CREATE INDEX IF NOT EXISTS idx_pomodoro_user_completed_started "
+        "ON pomodoro_sessions (user_id, completed, started_at)",
+        "CREATE INDEX IF NOT EXISTS idx_pomodoro_user_started_id ON pomodoro_sessions (user_id, started_at DESC, id DESC)",
+
+        "CREATE INDEX IF NOT EXISTS idx_daily_tasks_plan_day ON daily_tasks (action_plan_id, day_number)",
+        "CREATE INDEX IF NOT EXISTS idx_skill_focus_user_date ON skill_focus_logs (user_id, focus_date)",
+        "CREATE INDEX IF NOT EXISTS idx_agent_advice_user_created_id ON agent_advice (user_id, created_at DESC, id DESC)",
+        "CREATE INDEX IF NOT EXISTS idx_life_events_user_timestamp_id ON life_events (user_id, timestamp DESC, id DESC)",
+        "CREATE INDEX IF NOT EXISTS idx_goal_progress_goal_timestamp_id ON goal_progress (goal_id, timestamp DESC, id DESC)",
+        # Latest-analysis lookups
+        "CREATE INDEX IF NOT EXISTS idx_github_analysis_user_analyzed ON github_analysis (user_id, analyzed_at DESC)",
+    ])
+
+
+def recount_capped_commits(conn: Connection):
+    """Snapshot commit counts used to come from one 100-commit page.
+
+    Anything at the cap may be short; dropping those rows makes the next
+    analysis recount them.
+    """
+    conn.execute(text("DELETE FROM github_repo_snapshots WHERE commit_count >= 100"))
+
+
+def rebuild_stats_rollups(conn: Connection):
+    """Rollups now keep a bounded window of buckets with per-day review outcomes.
+
+    Rows in the old shape are dropped; each is rebuilt from the check-ins
+    the next time it's read or written.
+    """
+    conn.execute(text("DELETE FROM user_stats_rollups"))
+
+
+# Append only: (version, name, upgrade). Never edit a migration once it has shipped.
+MIGRATIONS: List[Tuple[int, str, Callable[[Connection], None]]] = [
+    (1, "baseline_indexes", baseline_indexes),
+    (2, "query_shape_indexes", query_shape_indexes),
+    (3, "recount_capped_commits", recount_capped_commits),
+    (4, "rebuild_stats_rollups", rebuild_stats_rollups),
+]
+
+
+def _ensure_version_table(conn: Connection):
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            name VARCHAR(200) NOT NULL,
+            applied_at TIMESTAMP NOT NULL
+        )
+    """))
+
+
+def applied_versions(conn: Connection) -> set:
+    return {row[0] for row in conn.execute(text("SELECT version FROM schema_migrations"))}
+
+
+def migrate(target: Engine = engine) -> List[int]:
+    """Create missing tables, then apply pending migrations in order"""
+    Base.metadata.create_all(bind=target)
+
+    applied = []
+    for version, name, upgrade in MIGRATIONS:
+        # One transaction per migration, so a failure leaves earlier ones recorded
+        with target.begin() as conn:
+            if conn.dialect.name == "postgresql":
+                conn.execute(text("SELECT pg_advisory_xact_lock(:lock_id)"), {"lock_id": MIGRATION_LOCK_ID})
+            _ensure_version_table(conn)
+            if version in applied_versions(conn):
+                continue
+
+            print(f"🔧 Applying migration {version:03d}_{name}")
+            upgrade(conn)
+            conn.execute(
+                text("INSERT INTO schema_migrations (version, name, applied_at) VALUES (:version, :name, :applied_at)"),
+                {"version": version, "name": name, "applied_at": datetime.utcnow()}
+            )
+            applied.append(version)
+
+    if applied:
+        print(f"✓ Applied {len(applied)} migration(s), schema at version {MIGRATIONS[-1][0]}")
+    else:
+        print(f"✓ Schema up to date at version {MIGRATIONS[-1][0]}")
+    return applied
+
+
+def status(target: Engine = engine) -> List[Tuple[int, str, bool]]:
+    """Every known migration and whether it has been applied"""
+    with target.begin() as conn:
+        _ensure_version_table(conn)
+        done = applied_versions(conn)
+    return [(version, name, version in done) for version, name, _ in MIGRATIONS]
+
+
+if __name__ == "__main__":
+    # python migrations.py [status]
+    if len(sys.argv) > 1 and sys.argv[1] == "status":
+        for version, name, is_applied in status():
+            print(f"{'✓' if is_applied else '·'} {version:03d}_{name}")
+    else:
+        migrate()
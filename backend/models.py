@@ -1,6 +1,6 @@
 from sqlalchemy import Column, Integer, String, DateTime, Float, Boolean, Text, ForeignKey
 from sqlalchemy.dialects.postgresql import JSON
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, deferred
 from datetime import datetime
 from database import Base
 from pydantic import BaseModel
@@ -33,8 +33,27 @@ class CheckIn(Base):
     shipped = Column(Boolean, nullable=True)
     excuse = Column(Text, nullable=True)
     mood = Column(String(100), nullable=True)
-    ai_analysis = Column(Text, nullable=True)
-    agent_debate = Column(JSON, nullable=True)
+    # Large AI output is only loaded when asked for with undefer_group("analysis")
+    ai_analysis = deferred(Column(Text, nullable=True), group="analysis")
+    agent_debate = deferred(Column(JSON, nullable=True), group="analysis")
+
+# Columns for reads that only need the numbers behind stats; use with load_only(*...)
+checkin_stats_columns = (CheckIn.timestamp, CheckIn.energy_level, CheckIn.shipped)
+
+class UserStatsRollup(Base):
+    __tablename__ = "user_stats_rollups"
+
+    user_id = Column(Integer, primary_key=True)
+    total_checkins = Column(Integer, default=0)
+    total_reviewed = Column(Integer, default=0)  # Check-ins with shipped set
+    total_shipped = Column(Integer, default=0)
+    energy_sum = Column(Integer, default=0)  # Over all check-ins
+    reviewed_energy_sum = Column(Integer, default=0)  # Over reviewed check-ins only
+    current_streak = Column(Integer, default=0)
+    best_streak = Column(Integer, default=0)
+    last_reviewed_at = Column(DateTime, nullable=True)  # Timestamp of the latest reviewed check-in
+    daily = Column(JSON, default=dict)  # "YYYY-MM-DD" -> checkins, energy, shipped, failed, reviewed_energy, excuses
+    updated_at = Column(DateTime, default=datetime.utcnow)
 
 class GitHubAnalysis(Base):
     __tablename__ = "github_analysis"
@@ -115,7 +134,7 @@ class NotificationResponse(BaseModel):
             priority=obj.priority,
             read=obj.read,
             action_url=obj.action_url,
-            metadata=obj.extra_data,  
+            extra_data=obj.extra_data,
             created_at=obj.created_at,
             read_at=obj.read_at
         )
@@ -711,7 +730,58 @@ class PomodoroSession(Base):
     interruptions = Column(Integer, default=0)
     
     # Relationships
-    user = relationship("User", backpopulates="pomodoro_sessions")
+    user = relationship("User", back_populates="pomodoro_sessions")
+
+class LLMCacheEntry(Base):
+    __tablename__ = "llm_response_cache"
+
+    key = Column(String(64), primary_key=True)  # sha256 of role + model settings + normalized prompt
+    agent_role = Column(String(100), index=True)
+    response = Column(Text)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    expires_at = Column(DateTime, index=True)
+    hit_count = Column(Integer, default=0)
+
+class GitHubRepoSnapshot(Base):
+    __tablename__ = "github_repo_snapshots"
+
+    username = Column(String(255), primary_key=True)
+    repo_id = Column(Integer, primary_key=True)  # GitHub's id, stable across renames
+    name = Column(String(255))
+    pushed_at = Column(DateTime, nullable=True)
+    created_at = Column(DateTime, nullable=True)
+    size = Column(Integer, default=0)
+    language = Column(String(100), nullable=True)
+    commit_count = Column(Integer, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+class GitHubCacheEntry(Base):
+    __tablename__ = "github_response_cache"
+
+    key = Column(String(64), primary_key=True)  # sha256 of token + URL with query
+    url = Column(Text)
+    etag = Column(String(255), nullable=True)
+    last_modified = Column(String(64), nullable=True)
+    headers = Column(JSON, default=dict)  # Link and Content-Type, needed to replay pagination
+    body = Column(Text)
+    size_bytes = Column(Integer, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    last_used_at = Column(DateTime, default=datetime.utcnow, index=True)
+    hit_count = Column(Integer, default=0)
+
+class CrewJob(Base):
+    __tablename__ = "crew_jobs"
+
+    # In the database rather than in memory so any worker process can answer a poll
+    id = Column(String(32), primary_key=True)  # uuid4 hex
+    job_type = Column(String(50))
+    user_id = Column(Integer, index=True)
+    status = Column(String(20), default="queued", index=True)  # queued, running, completed, failed
+    result = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True, index=True)
 
 class PomodoroSessionCreate(BaseModel):
     session_type: str = "work"
@@ -1,4 +1,4 @@
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, load_only
 from datetime import datetime, timedelta
 import models
 from typing import Dict, Optional
@@ -126,22 +126,10 @@ class NotificationService:
     @staticmethod
     def check_streak_achievements(db: Session, user_id: int):
         """Check for streak achievements and celebrate them"""
-        # Get recent check-ins to calculate streak
-        recent_checkins = db.query(models.CheckIn).filter(
-            models.CheckIn.user_id == user_id,
-            models.CheckIn.shipped != None
-        ).order_by(models.CheckIn.timestamp.desc()).limit(10).all()
-        
-        if not recent_checkins:
-            return
+        from stats_rollup import get_rollup
         
-        # Calculate current streak
-        current_streak = 0
-        for checkin in recent_checkins:
-            if checkin.shipped:
-                current_streak += 1
-            else:
-                break
+        # Streak is kept up to date on every review, so no history scan here
+        current_streak = get_rollup(db, user_id).current_streak
         
         # Celebrate milestone streaks
         milestone_streaks = [3, 7, 14, 30, 60, 100]
@@ -173,7 +161,7 @@ class NotificationService:
         week_ago = datetime.now() - timedelta(days=7)
         
         # Get week's check-ins
-        checkins = db.query(models.CheckIn).filter(
+        checkins = db.query(models.CheckIn).options(load_only(*models.checkin_stats_columns)).filter(
             models.CheckIn.user_id == user_id,
             models.CheckIn.timestamp >= week_ago,
             models.CheckIn.shipped != None
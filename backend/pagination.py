@@ -0,0 +1,59 @@
+# backend/pagination.py
+from datetime import datetime
+from typing import List, Optional, Tuple
+import base64
+import json
+
+from fastapi import HTTPException, Response
+from sqlalchemy import tuple_
+
+MAX_PAGE_SIZE = 200
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(timestamp: datetime, row_id: int) -> str:
+    """Opaque cursor for the position just after (timestamp, id)"""
+    payload = json.dumps([timestamp.isoformat(), row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        timestamp, row_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return datetime.fromisoformat(timestamp), int(row_id)
+    except (ValueError, TypeError, UnicodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def page_size(limit: int) -> int:
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+
+def keyset(query, timestamp_column, id_column, cursor: Optional[str], limit: int):
+    """Newest-first page of ``query`` after ``cursor``.
+
+    Works on both ``db.query(...)`` and ``select(...)``. One extra row is
+    fetched so ``next_page`` can tell whether another page exists.
+    """
+    if cursor:
+        timestamp, row_id = decode_cursor(cursor)
+        query = query.filter(tuple_(timestamp_column, id_column) < tuple_(timestamp, row_id))
+    return query.order_by(timestamp_column.desc(), id_column.desc()).limit(page_size(limit) + 1)
+
+
+def next_page(rows: List, limit: int, timestamp_attr: str, response: Optional[Response] = None) -> Tuple[List, Optional[str]]:
+    """Trim the extra row from a ``keyset`` result and build the next cursor.
+
+    When a response is given the cursor is also sent as ``X-Next-Cursor``.
+    """
+    limit = page_size(limit)
+    if len(rows) <= limit:
+        return rows, None
+
+    rows = rows[:limit]
+    last = rows[-1]
+    next_cursor = encode_cursor(getattr(last, timestamp_attr), last.id)
+    if response is not None:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return rows, next_cursor
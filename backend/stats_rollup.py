@@ -0,0 +1,324 @@
+# backend/stats_rollup.py
+from collections import Counter
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+import os
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+import models
+
+EXCUSE_KEYWORDS = ('time', 'tired', 'hard', 'busy', 'complex', 'stuck')
+
+# Daily buckets are kept this many days back; older days only live in the
+# all-time counters, so the row stays the same size however long a user stays.
+WINDOW_DAYS = int(os.getenv("STATS_ROLLUP_WINDOW_DAYS", "90"))
+
+
+def _empty_bucket() -> Dict:
+    # outcomes: "1" shipped / "0" failed per reviewed check-in, in timestamp order
+    return {"checkins": 0, "energy": 0, "shipped": 0, "failed": 0, "reviewed_energy": 0, "excuses": {}, "outcomes": ""}
+
+
+def _excuse_keywords(excuse: Optional[str]) -> List[str]:
+    words = (excuse or "").lower().split()
+    return [word for word in EXCUSE_KEYWORDS if word in words]
+
+
+def _add_review(bucket: Dict, shipped: bool, energy_level: Optional[int], excuse: Optional[str]):
+    bucket["shipped" if shipped else "failed"] += 1
+    bucket["reviewed_energy"] += energy_level or 0
+    bucket["outcomes"] += "1" if shipped else "0"
+    if excuse and not shipped:
+        for word in _excuse_keywords(excuse):
+            bucket["excuses"][word] = bucket["excuses"].get(word, 0) + 1
+
+
+def _cutoff() -> str:
+    """Oldest day kept in ``daily``; a day of slack covers local vs UTC dates"""
+    return (datetime.utcnow().date() - timedelta(days=WINDOW_DAYS + 1)).isoformat()
+
+
+def window_start() -> date:
+    """Earliest day the rollup's buckets are guaranteed to cover"""
+    return date.today() - timedelta(days=WINDOW_DAYS)
+
+
+def compute_rollup(rows: Iterable[Tuple]) -> Dict:
+    """Rollup fields from (timestamp, energy_level, shipped, excuse) rows in timestamp order"""
+    fields = {
+        "total_checkins": 0, "total_reviewed": 0, "total_shipped": 0,
+        "energy_sum": 0, "reviewed_energy_sum": 0,
+        "current_streak": 0, "best_streak": 0, "last_reviewed_at": None,
+    }
+    cutoff = _cutoff()
+    daily = {}
+    for timestamp, energy_level, shipped, excuse in rows:
+        day = timestamp.date().isoformat()
+        bucket = daily.setdefault(day, _empty_bucket()) if day >= cutoff else None
+        if bucket is not None:
+            bucket["checkins"] += 1
+            bucket["energy"] += energy_level or 0
+        fields["total_checkins"] += 1
+        fields["energy_sum"] += energy_level or 0
+
+        if shipped is None:
+            continue
+
+        if bucket is not None:
+            _add_review(bucket, shipped, energy_level, excuse)
+        fields["total_reviewed"] += 1
+        fields["total_shipped"] += 1 if shipped else 0
+        fields["reviewed_energy_sum"] += energy_level or 0
+        fields["last_reviewed_at"] = timestamp
+        fields["current_streak"] = fields["current_streak"] + 1 if shipped else 0
+        fields["best_streak"] = max(fields["best_streak"], fields["current_streak"])
+
+    fields["daily"] = daily
+    return fields
+
+
+def _checkin_rows(db: Session, user_id: int, since: Optional[datetime] = None, until: Optional[datetime] = None):
+    query = db.query(
+        models.CheckIn.timestamp,
+        models.CheckIn.energy_level,
+        models.CheckIn.shipped,
+        models.CheckIn.excuse
+    ).filter(models.CheckIn.user_id == user_id)
+    if since is not None:
+        query = query.filter(models.CheckIn.timestamp >= since)
+    if until is not None:
+        query = query.filter(models.CheckIn.timestamp < until)
+    return query.order_by(models.CheckIn.timestamp.asc(), models.CheckIn.id.asc()).all()
+
+
+def _locked_rollup(db: Session, user_id: int) -> Optional[models.UserStatsRollup]:
+    # Row lock so concurrent reviews for one user don't drop bucket updates (no-op on SQLite)
+    return db.query(models.UserStatsRollup).filter(
+        models.UserStatsRollup.user_id == user_id
+    ).with_for_update().first()
+
+
+def _insert_if_missing(db: Session, user_id: int) -> bool:
+    """Create an empty rollup row unless one exists; True if this call created it.
+
+    ON CONFLICT DO NOTHING, so two first check-ins racing each other don't
+    raise IntegrityError; on Postgres the loser waits for the winner's commit.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    statement = insert(models.UserStatsRollup).values(
+        user_id=user_id, daily={}, updated_at=datetime.utcnow()
+    ).on_conflict_do_nothing(index_elements=["user_id"])
+    return db.execute(statement).rowcount == 1
+
+
+def _rebuild(db: Session, rollup: models.UserStatsRollup):
+    for field, value in compute_rollup(_checkin_rows(db, rollup.user_id)).items():
+        setattr(rollup, field, value)
+    rollup.updated_at = datetime.utcnow()
+
+
+def _rollup_for_update(db: Session, user_id: int) -> Tuple[models.UserStatsRollup, bool]:
+    """The user's locked rollup and whether it was just built from their history.
+
+    A freshly built rollup already includes the caller's flushed changes.
+    One created concurrently by another request can't have seen them, so
+    the caller still applies its update to it.
+    """
+    rollup = _locked_rollup(db, user_id)
+    if rollup is not None:
+        return rollup, False
+
+    db.flush()
+    created = _insert_if_missing(db, user_id)
+    rollup = _locked_rollup(db, user_id)
+    if created:
+        _rebuild(db, rollup)
+    return rollup, created
+
+
+def rebuild_rollup(db: Session, user_id: int) -> models.UserStatsRollup:
+    """Recompute a user's rollup from their check-ins; the caller commits"""
+    db.flush()
+    rollup, rebuilt = _rollup_for_update(db, user_id)
+    if not rebuilt:
+        _rebuild(db, rollup)
+    return rollup
+
+
+def _updated_daily(rollup: models.UserStatsRollup, day: str) -> Tuple[Dict, Optional[Dict]]:
+    """A pruned copy of ``daily`` and a copy of ``day``'s bucket in it (None if too old)"""
+    cutoff = _cutoff()
+    daily = {key: bucket for key, bucket in (rollup.daily or {}).items() if key >= cutoff}
+    if day < cutoff:
+        return daily, None
+    bucket = dict(daily.get(day) or _empty_bucket())
+    bucket["excuses"] = dict(bucket["excuses"])
+    daily[day] = bucket
+    return daily, bucket
+
+
+def record_checkin(db: Session, checkin: models.CheckIn):
+    """Count a newly added check-in in its user's rollup; the caller commits"""
+    if checkin.timestamp is None:
+        db.flush()
+
+    rollup, rebuilt = _rollup_for_update(db, checkin.user_id)
+    if rebuilt:
+        return
+
+    rollup.daily, bucket = _updated_daily(rollup, checkin.timestamp.date().isoformat())
+    if bucket is not None:
+        bucket["checkins"] += 1
+        bucket["energy"] += checkin.energy_level or 0
+    rollup.total_checkins += 1
+    rollup.energy_sum += checkin.energy_level or 0
+    rollup.updated_at = datetime.utcnow()
+
+
+def record_review(db: Session, checkin: models.CheckIn, previous_shipped: Optional[bool]):
+    """Fold a check-in's evening review into its user's rollup; the caller commits.
+
+    Streaks and the per-day outcome order depend on review order, so
+    re-reviews and reviews of a check-in older than the latest reviewed one
+    trigger a full rebuild instead.
+    """
+    if checkin.shipped is None:
+        return
+
+    db.flush()
+    rollup, rebuilt = _rollup_for_update(db, checkin.user_id)
+    if rebuilt:
+        return
+    out_of_order = rollup.last_reviewed_at is not None and checkin.timestamp < rollup.last_reviewed_at
+    if previous_shipped is not None or out_of_order:
+        _rebuild(db, rollup)
+        return
+
+    rollup.daily, bucket = _updated_daily(rollup, checkin.timestamp.date().isoformat())
+    if bucket is not None:
+        _add_review(bucket, checkin.shipped, checkin.energy_level, checkin.excuse)
+    rollup.total_reviewed += 1
+    rollup.total_shipped += 1 if checkin.shipped else 0
+    rollup.reviewed_energy_sum += checkin.energy_level or 0
+    rollup.last_reviewed_at = checkin.timestamp
+    rollup.current_streak = rollup.current_streak + 1 if checkin.shipped else 0
+    rollup.best_streak = max(rollup.best_streak, rollup.current_streak)
+    rollup.updated_at = datetime.utcnow()
+
+
+def get_rollup(db: Session, user_id: int) -> models.UserStatsRollup:
+    """A user's rollup, built from their history the first time it's asked for"""
+    rollup = db.query(models.UserStatsRollup).filter(
+        models.UserStatsRollup.user_id == user_id
+    ).first()
+    if rollup is not None:
+        return rollup
+
+    rollup, _ = _rollup_for_update(db, user_id)
+    db.commit()
+    return rollup
+
+
+async def get_rollup_async(db: AsyncSession, user_id: int) -> models.UserStatsRollup:
+    rollup = (await db.execute(
+        select(models.UserStatsRollup).filter(models.UserStatsRollup.user_id == user_id)
+    )).scalars().first()
+    if rollup is not None:
+        return rollup
+    return await db.run_sync(lambda session: get_rollup(session, user_id))
+
+
+def _window_buckets(rollup: models.UserStatsRollup, start: date, end: Optional[date]) -> Dict[str, Dict]:
+    daily = rollup.daily or {}
+    # Open-ended ranges run to tomorrow in UTC, the newest day a bucket can have
+    last = end - timedelta(days=1) if end else datetime.utcnow().date() + timedelta(days=1)
+    buckets = {}
+    day = start
+    while day <= last:
+        bucket = daily.get(day.isoformat())
+        if bucket is not None:
+            buckets[day.isoformat()] = bucket
+        day += timedelta(days=1)
+    return buckets
+
+
+def buckets_between(db: Session, rollup: models.UserStatsRollup, start: date,
+                    end: Optional[date] = None) -> Dict[str, Dict]:
+    """Daily buckets with start <= day < end (open-ended when end is None).
+
+    Served from the rollup inside its window, one dict lookup per day; a
+    start older than ``window_start()`` falls back to reading the check-ins.
+    """
+    if start >= window_start():
+        return _window_buckets(rollup, start, end)
+    return compute_buckets(_checkin_rows(
+        db, rollup.user_id,
+        since=datetime.combine(start, datetime.min.time()),
+        until=datetime.combine(end, datetime.min.time()) if end else None
+    ))
+
+
+async def buckets_between_async(db: AsyncSession, rollup: models.UserStatsRollup, start: date,
+                                end: Optional[date] = None) -> Dict[str, Dict]:
+    if start >= window_start():
+        return _window_buckets(rollup, start, end)
+    return await db.run_sync(lambda session: buckets_between(session, rollup, start, end))
+
+
+def compute_buckets(rows: Iterable[Tuple]) -> Dict[str, Dict]:
+    """Daily buckets for (timestamp, energy_level, shipped, excuse) rows, with no window"""
+    daily = {}
+    for timestamp, energy_level, shipped, excuse in rows:
+        bucket = daily.setdefault(timestamp.date().isoformat(), _empty_bucket())
+        bucket["checkins"] += 1
+        bucket["energy"] += energy_level or 0
+        if shipped is not None:
+            _add_review(bucket, shipped, energy_level, excuse)
+    return daily
+
+
+def summarize(buckets: Iterable[Dict]) -> Dict:
+    """Reviewed-commitment totals across a set of daily buckets"""
+    shipped = failed = reviewed_energy = 0
+    excuses = Counter()
+    for bucket in buckets:
+        shipped += bucket["shipped"]
+        failed += bucket["failed"]
+        reviewed_energy += bucket["reviewed_energy"]
+        excuses.update(bucket["excuses"])
+    return {
+        "shipped": shipped,
+        "failed": failed,
+        "total": shipped + failed,
+        "reviewed_energy": reviewed_energy,
+        "excuses": excuses
+    }
+
+
+def streaks(buckets: Dict[str, Dict]) -> Tuple[int, int]:
+    """(current, best) shipping streak over the reviews in ``buckets``.
+
+    Current is the run of shipped reviews ending at the latest one, as
+    ``/commitments/stats`` has always reported it for its ``days`` window.
+    """
+    outcomes = "".join(buckets[day].get("outcomes", "") for day in sorted(buckets))
+    runs = outcomes.split("0")
+    return len(runs[-1]), max(len(run) for run in runs)
+
+
+def weekly_totals(buckets: Dict[str, Dict]) -> Dict[str, Dict]:
+    """Daily buckets summed into Monday-start weeks, skipping weeks with nothing reviewed"""
+    weeks = {}
+    for day, bucket in buckets.items():
+        day_date = date.fromisoformat(day)
+        week_key = (day_date - timedelta(days=day_date.weekday())).strftime("%Y-%m-%d")
+        weeks.setdefault(week_key, []).append(bucket)
+
+    totals = {week: summarize(week_buckets) for week, week_buckets in weeks.items()}
+    return {week: data for week, data in totals.items() if data["total"]}
@@ -0,0 +1,25 @@
+# backend/tests/conftest.py
+import os
+import sys
+
+# The backend modules import each other as top-level modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+
+import pytest
+
+
+@pytest.fixture(scope="session")
+def migrated():
+    from migrations import migrate
+    migrate()
+
+
+@pytest.fixture
+def db(migrated):
+    from database import SessionLocal
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
@@ -0,0 +1,11 @@
+# backend/tests/test_analytics.py
+import numpy as np
+
+import analytics
+
+
+def test_group_index_groups_missing_keys():
+    keys = np.array(["rust", None, "go", "rust", None], dtype=object)
+    unique, index = analytics.group_index(keys)
+    assert list(unique) == ["rust", "", "go"]
+    assert list(index) == [0, 1, 2, 0, 1]
@@ -0,0 +1,84 @@
+# backend/tests/test_redis_cache.py
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+
+import cache as cache_module
+from cache import RedisCache
+
+
+@pytest.fixture
+def server():
+    return fakeredis.FakeServer(version=7)
+
+
+@pytest.fixture
+def redis_cache(server):
+    return RedisCache(client=fakeredis.FakeRedis(server=server), prefix="test:")
+
+
+def test_round_trips_values_with_ttl(redis_cache):
+    redis_cache.set("answer", {"value": [1, 2, 3]}, ttl_seconds=60)
+
+    assert redis_cache.get("answer") == {"value": [1, 2, 3]}
+    assert redis_cache.get("missing") is None
+    assert 0 < redis_cache.client.ttl("test:key:answer") <= 60
+    assert redis_cache.stats()["hits"] == 1
+    assert redis_cache.stats()["misses"] == 1
+
+
+def test_invalidate_tag_drops_tagged_keys_only(redis_cache):
+    redis_cache.set("a", 1, tags=["user:alice"])
+    redis_cache.set("b", 2, tags=["user:alice", "goals:alice"])
+    redis_cache.set("c", 3, tags=["user:bob"])
+
+    assert redis_cache.invalidate_tag("user:alice") == 2
+    assert redis_cache.get("a") is None
+    assert redis_cache.get("b") is None
+    assert redis_cache.get("c") == 3
+    assert not redis_cache.client.exists("test:tag:user:alice")
+
+
+def test_tag_set_lives_as_long_as_its_longest_member(redis_cache):
+    redis_cache.set("long", 1, ttl_seconds=600, tags=["user:alice"])
+    redis_cache.set("short", 2, ttl_seconds=10, tags=["user:alice"])
+    assert redis_cache.client.ttl("test:tag:user:alice") > 10
+
+    redis_cache.set("longer", 3, ttl_seconds=1200, tags=["user:alice"])
+    assert redis_cache.client.ttl("test:tag:user:alice") > 600
+
+
+def test_clear_keeps_other_prefixes(server, redis_cache):
+    other = RedisCache(client=fakeredis.FakeRedis(server=server), prefix="other:")
+    redis_cache.set("a", 1, tags=["t"])
+    other.set("a", 2)
+
+    redis_cache.clear()
+
+    assert redis_cache.get("a") is None
+    assert other.get("a") == 2
+
+
+def test_outage_degrades_to_misses(server, redis_cache):
+    server.connected = False
+
+    redis_cache.set("a", 1, tags=["t"])
+    assert redis_cache.get("a") is None
+    assert redis_cache.invalidate_tag("t") == 0
+    assert redis_cache.stats()["errors"] == 3
+
+
+def test_cached_functions_share_and_invalidate_through_redis(monkeypatch, redis_cache):
+    monkeypatch.setattr(cache_module, "cache", redis_cache)
+    calls = []
+
+    @cache_module.cached(ttl_seconds=60, key_prefix="test", tags=lambda username: [cache_module.user_tag(username)])
+    def profile(username):
+        calls.append(username)
+        return {"username": username, "calls": len(calls)}
+
+    assert profile("alice") == {"username": "alice", "calls": 1}
+    assert profile("alice") == {"username": "alice", "calls": 1}
+
+    cache_module.invalidate_user_cache("alice")
+    assert profile("alice") == {"username": "alice", "calls": 2}
@@ -0,0 +1,109 @@
+# backend/tests/test_stats_rollup.py
+from datetime import date, datetime, timedelta
+import itertools
+import random
+
+import pytest
+
+import models
+import stats_rollup
+
+_user_ids = itertools.count(1000)
+
+FIELDS = (
+    "total_checkins", "total_reviewed", "total_shipped", "energy_sum", "reviewed_energy_sum",
+    "current_streak", "best_streak", "last_reviewed_at", "daily",
+)
+
+
+def _rows(db, user_id):
+    return db.query(
+        models.CheckIn.timestamp, models.CheckIn.energy_level, models.CheckIn.shipped, models.CheckIn.excuse
+    ).filter(models.CheckIn.user_id == user_id).order_by(models.CheckIn.timestamp, models.CheckIn.id).all()
+
+
+def _assert_matches_recompute(db, user_id):
+    rollup = db.query(models.UserStatsRollup).filter(models.UserStatsRollup.user_id == user_id).one()
+    expected = stats_rollup.compute_rollup(_rows(db, user_id))
+    assert {field: getattr(rollup, field) for field in FIELDS} == expected
+
+
+def _baseline_stats(db, user_id, since: date):
+    """What /commitments/stats computed from raw check-ins before the rollup"""
+    reviewed = [row for row in _rows(db, user_id) if row.shipped is not None and row.timestamp.date() >= since]
+    best = run = 0
+    for row in reviewed:
+        run = run + 1 if row.shipped else 0
+        best = max(best, run)
+    current = 0
+    for row in reversed(reviewed):
+        if not row.shipped:
+            break
+        current += 1
+    shipped = sum(1 for row in reviewed if row.shipped)
+    return {"shipped": shipped, "failed": len(reviewed) - shipped, "current": current, "best": best}
+
+
+def _random_history(db, rng, user_id, steps=120):
+    """Check-ins and reviews in the order the API would apply them, checked after every step"""
+    now = datetime.utcnow()
+    checkins = []
+    for _ in range(steps):
+        if not checkins or rng.random() < 0.45:
+            # Mostly recent, some older than the rollup window
+            checkin = models.CheckIn(
+                user_id=user_id,
+                timestamp=now - timedelta(days=rng.randint(0, stats_rollup.WINDOW_DAYS + 40), minutes=rng.randint(0, 1440)),
+                energy_level=rng.randint(1, 10),
+                commitment="ship it"
+            )
+            db.add(checkin)
+            stats_rollup.record_checkin(db, checkin)
+            checkins.append(checkin)
+        else:
+            # Reviews arrive in any order, and sometimes twice
+            checkin = rng.choice(checkins)
+            previous = checkin.shipped
+            checkin.shipped = rng.random() < 0.6
+            checkin.excuse = None if checkin.shipped else rng.choice(["too busy", "tired today", "it was hard", "no"])
+            stats_rollup.record_review(db, checkin, previous)
+        db.commit()
+        _assert_matches_recompute(db, user_id)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_incremental_updates_match_full_recompute(db, seed):
+    _random_history(db, random.Random(seed), next(_user_ids))
+
+
+@pytest.mark.parametrize("days", [1, 7, 30, stats_rollup.WINDOW_DAYS, stats_rollup.WINDOW_DAYS + 30])
+def test_window_stats_match_raw_checkins(db, days):
+    user_id = next(_user_ids)
+    _random_history(db, random.Random(days), user_id, steps=200)
+
+    rollup = stats_rollup.get_rollup(db, user_id)
+    since = (datetime.now() - timedelta(days=days)).date()
+    buckets = stats_rollup.buckets_between(db, rollup, since)
+    totals = stats_rollup.summarize(buckets.values())
+    current, best = stats_rollup.streaks(buckets)
+
+    assert {"shipped": totals["shipped"], "failed": totals["failed"], "current": current, "best": best} == \
+        _baseline_stats(db, user_id, since)
+
+
+def test_first_rollup_insert_tolerates_a_concurrent_creator(db):
+    user_id = next(_user_ids)
+    assert stats_rollup._insert_if_missing(db, user_id)
+    # A second creator, e.g. another first check-in, must not raise IntegrityError
+    assert not stats_rollup._insert_if_missing(db, user_id)
+    db.commit()
+    assert db.query(models.UserStatsRollup).filter(models.UserStatsRollup.user_id == user_id).count() == 1
+
+
+def test_daily_buckets_stay_within_the_window(db):
+    user_id = next(_user_ids)
+    _random_history(db, random.Random(42), user_id)
+
+    rollup = stats_rollup.get_rollup(db, user_id)
+    oldest = min(date.fromisoformat(day) for day in rollup.daily)
+    assert oldest >= datetime.utcnow().date() - timedelta(days=stats_rollup.WINDOW_DAYS + 1)